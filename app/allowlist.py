@@ -0,0 +1,256 @@
+"""
+Pre-filter flow known-benign sebelum inference (backup, probe monitoring,
+DNS ke resolver internal). Flow yang cocok dengan allowlist tidak di-score,
+kecuali sebagian kecil (ALLOWLIST_SAMPLE) yang tetap di-score untuk audit.
+
+Format file allowlist (satu aturan per baris, '#' = komentar):
+    src  10.10.5.0/24               semua flow dari subnet ini
+    dst  10.0.0.53 53,853           flow ke host/subnet ini, port tertentu
+    dst  10.0.8.0/22                flow ke subnet ini, semua port
+    flow 10.1.1.5 10.2.2.9 873,874  tuple exact (src, dst, dst_port), satu key per port
+
+Aturan src/dst masuk CIDR radix tree (longest-prefix walk per bit),
+tuple exact masuk Bloom filter (ALLOWLIST_BLOOM_FP). File dicek ulang
+tiap ALLOWLIST_RELOAD_S detik; kalau berubah di-load ulang tanpa restart.
+File yang tidak valid ditolak utuh, allowlist lama tetap dipakai.
+"""
+
+import hashlib
+import ipaddress
+import math
+import os
+import random
+import threading
+import time
+from config import ALLOWLIST_PATH, ALLOWLIST_RELOAD_S, ALLOWLIST_SAMPLE, ALLOWLIST_BLOOM_FP
+
+_ALL_PORTS = "*"
+
+
+class CidrTrie:
+    """Radix tree biner per bit alamat, satu root per versi IP."""
+
+    def __init__(self):
+        # node = [child_0, child_1, ports]; ports: None | _ALL_PORTS | set(port)
+        self._roots = {4: [None, None, None], 6: [None, None, None]}
+        self.size   = 0
+
+    def insert(self, network, ports=None):
+        node = self._roots[network.version]
+        bits = network.max_prefixlen
+        addr = int(network.network_address)
+        for i in range(network.prefixlen):
+            bit = (addr >> (bits - 1 - i)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        if ports is None or node[2] == _ALL_PORTS:
+            node[2] = _ALL_PORTS
+        else:
+            node[2] = (node[2] or set()) | set(ports)
+        self.size += 1
+
+    def match(self, ip, port) -> bool:
+        """True kalau ada prefix yang memuat ip dan mengizinkan port."""
+        node = self._roots[ip.version]
+        bits = ip.max_prefixlen
+        addr = int(ip)
+        for i in range(bits + 1):
+            ports = node[2]
+            if ports is not None and (ports == _ALL_PORTS or port in ports):
+                return True
+            if i == bits:
+                break
+            node = node[(addr >> (bits - 1 - i)) & 1]
+            if node is None:
+                break
+        return False
+
+
+class BloomFilter:
+    """Bloom filter di atas bytearray, k posisi dari satu digest blake2b (double hashing)."""
+
+    def __init__(self, capacity: int, fp_rate: float):
+        capacity    = max(capacity, 1)
+        self.m      = max(1024, int(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.k      = max(1, round(-math.log2(fp_rate)))
+        self._bits  = bytearray((self.m + 7) // 8)
+        self.size   = 0
+
+    def _positions(self, key: bytes):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1     = int.from_bytes(digest[:8], "little")
+        h2     = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.m for i in range(self.k)]
+
+    def add(self, key: bytes):
+        for p in self._positions(key):
+            self._bits[p >> 3] |= 1 << (p & 7)
+        self.size += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+def _flow_key(src, dst, port: int) -> bytes:
+    return src.packed + dst.packed + int(port).to_bytes(2, "big")
+
+
+def _parse_ports(text: str) -> list:
+    ports = [int(p) for p in text.split(",") if p]
+    if not ports or any(not 0 <= p <= 65535 for p in ports):
+        raise ValueError(f"invalid port in {text!r}")
+    return ports
+
+
+class _Index:
+    """Satu snapshot allowlist (immutable setelah dibangun)."""
+
+    def __init__(self, lines: list):
+        self.src   = CidrTrie()
+        self.dst   = CidrTrie()
+        flows      = []
+
+        for n, line in enumerate(lines, 1):
+            parts = line.split("#", 1)[0].split()
+            if not parts:
+                continue
+            kind = parts[0].lower()
+            try:
+                if kind in ("src", "dst") and len(parts) in (2, 3):
+                    network = ipaddress.ip_network(parts[1], strict=False)
+                    ports   = _parse_ports(parts[2]) if len(parts) == 3 else None
+                    (self.src if kind == "src" else self.dst).insert(network, ports)
+                elif kind == "flow" and len(parts) == 4:
+                    src, dst = ipaddress.ip_address(parts[1]), ipaddress.ip_address(parts[2])
+                    flows.extend(_flow_key(src, dst, port) for port in _parse_ports(parts[3]))
+                else:
+                    raise ValueError(f"unknown rule {line.strip()!r}")
+            except ValueError as e:
+                raise ValueError(f"line {n}: {e}")
+
+        self.flows = BloomFilter(len(flows), ALLOWLIST_BLOOM_FP)
+        for key in flows:
+            self.flows.add(key)
+
+    @property
+    def empty(self) -> bool:
+        return self.src.size == 0 and self.dst.size == 0 and self.flows.size == 0
+
+    def match(self, src_ip: str, dst_ip: str, dst_port) -> str | None:
+        """Return jenis aturan yang cocok ('src' / 'dst' / 'flow') atau None."""
+        try:
+            src  = ipaddress.ip_address(src_ip)
+            dst  = ipaddress.ip_address(dst_ip)
+            port = int(dst_port or 0)
+        except (ValueError, TypeError):
+            return None
+        if self.src.match(src, port):
+            return "src"
+        if self.dst.match(dst, port):
+            return "dst"
+        if self.flows.size and _flow_key(src, dst, port) in self.flows:
+            return "flow"
+        return None
+
+
+class Allowlist:
+
+    def __init__(self, path: str = ALLOWLIST_PATH, reload_s: float = ALLOWLIST_RELOAD_S,
+                 sample: float = ALLOWLIST_SAMPLE):
+        self.path     = path
+        self.reload_s = reload_s
+        self.sample   = sample
+
+        self._lock       = threading.Lock()
+        self._index      = _Index([])
+        self._mtime      = None
+        self._next_check = 0.0
+        self._loaded_at  = None
+
+        self.counters = {
+            "checked"      : 0,
+            "matched_src"  : 0,
+            "matched_dst"  : 0,
+            "matched_flow" : 0,
+            "bypassed"     : 0,   # allowlisted, tidak di-score
+            "sampled"      : 0,   # allowlisted, tetap di-score (audit)
+            "reloads"      : 0,
+            "reload_errors": 0,
+        }
+        self.maybe_reload(force=True)
+
+    # ── Hot reload ──────────────────────────────────────
+    def maybe_reload(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        self._next_check = now + self.reload_s
+
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+
+        try:
+            lines = []
+            if mtime is not None:
+                with open(self.path) as f:
+                    lines = f.readlines()
+            index = _Index(lines)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] allowlist {self.path} not reloaded: {e}")
+            self.record("reload_errors")
+            self._mtime = mtime   # jangan coba ulang sampai file berubah lagi
+            return
+
+        self._index, self._mtime, self._loaded_at = index, mtime, time.time()
+        self.record("reloads")
+        if not index.empty:
+            print(
+                f"📋 Allowlist loaded: {index.src.size} src, {index.dst.size} dst, "
+                f"{index.flows.size} flow rules"
+            )
+
+    def record(self, key: str, n: int = 1):
+        with self._lock:
+            self.counters[key] += n
+
+    # ── Filter ──────────────────────────────────────────
+    def skip(self, src_ip, dst_ip, dst_port) -> bool:
+        """True kalau flow known-benign dan tidak perlu di-score."""
+        self.maybe_reload()
+        index = self._index
+        if index.empty or src_ip is None or dst_ip is None:
+            return False
+
+        kind = index.match(src_ip, dst_ip, dst_port)
+        with self._lock:
+            self.counters["checked"] += 1
+            if kind is None:
+                return False
+            self.counters[f"matched_{kind}"] += 1
+            if random.random() < self.sample:
+                self.counters["sampled"] += 1
+                return False
+            self.counters["bypassed"] += 1
+            return True
+
+    def stats(self) -> dict:
+        index = self._index
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "path"      : self.path,
+            "loaded_at" : self._loaded_at,
+            "rules"     : {"src": index.src.size, "dst": index.dst.size, "flow": index.flows.size},
+            "bloom_bits": index.flows.m,
+            "sample"    : self.sample,
+        }
+
+
+# Singleton
+allowlist = Allowlist()
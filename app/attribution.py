@@ -0,0 +1,50 @@
+"""
+Atribusi fitur lokal untuk anomali (tanpa LLM).
+
+Pakai TreeSHAP bawaan XGBoost (pred_contribs=True): kontribusi tiap fitur
+terhadap log-odds XGBoost, exact dan cepat (< 1 ms per flow). Dihitung
+batch hanya untuk baris anomali.
+"""
+
+import numpy as np
+from config import FEATURE_COLS
+
+
+def tree_shap(booster: "xgb.Booster", arr: np.ndarray) -> np.ndarray:
+    """
+    arr: batch (N, 36) yang sudah di-scale.
+    Return kontribusi (N, 36) — kolom bias terakhir dibuang.
+    """
+    # Import di sini supaya worker serve.py / sensor tidak perlu load XGBoost
+    import xgboost as xgb
+
+    dmat = xgb.DMatrix(arr, feature_names=booster.feature_names)
+    return booster.predict(dmat, pred_contribs=True)[:, :-1]
+
+
+def top_contributions(contribs: np.ndarray, raw: np.ndarray, top_n: int) -> list[list[dict]]:
+    """
+    contribs: (N, 36) hasil tree_shap, raw: (N, 36) nilai fitur mentah.
+    Return top-N fitur per baris, urut |kontribusi| terbesar.
+    Kontribusi positif = mendorong ke arah anomali.
+    """
+    order = np.argsort(-np.abs(contribs), axis=1)[:, :top_n]
+    out = []
+    for i, cols in enumerate(order):
+        out.append([
+            {
+                "feature"     : FEATURE_COLS[j],
+                "value"       : round(float(raw[i, j]), 4),
+                "contribution": round(float(contribs[i, j]), 4),
+            }
+            for j in cols
+        ])
+    return out
+
+
+def format_attribution(top_features: list[dict]) -> str:
+    """Satu baris per fitur, dipakai di prompt LLM dan penjelasan lokal."""
+    return "\n".join(
+        f"{f['feature']:<28}: {f['value']} (SHAP {f['contribution']:+})"
+        for f in top_features
+    )
@@ -0,0 +1,115 @@
+"""
+Decoder format ingest biner untuk sensor high-rate.
+
+Sensor mengirim matrix float32 (N, 36) dengan urutan kolom FEATURE_COLS,
+jadi tidak perlu 36 nama field JSON per flow (36 x 4 byte vs ~1.5 KB).
+
+Content-Type yang didukung:
+  application/octet-stream              → raw little-endian float32, row-major
+  application/x-npy                     → file NumPy .npy (2D, dtype float)
+  application/vnd.apache.arrow.stream   → Arrow IPC stream (butuh pyarrow)
+"""
+
+import io
+import numpy as np
+from config import FEATURE_COLS
+
+N_FEATURES = len(FEATURE_COLS)
+
+CT_RAW   = "application/octet-stream"
+CT_NPY   = "application/x-npy"
+CT_ARROW = "application/vnd.apache.arrow.stream"
+
+
+class DecodeError(ValueError):
+    """Payload biner tidak valid (format, shape, atau nilai)."""
+
+
+def _check(X: np.ndarray) -> np.ndarray:
+    if X.ndim != 2 or X.shape[1] != N_FEATURES:
+        raise DecodeError(f"expected shape (N, {N_FEATURES}), got {X.shape}")
+    if not np.isfinite(X).all():
+        raise DecodeError("matrix contains NaN/inf")
+    return X
+
+
+def decode_raw(body: bytes) -> np.ndarray:
+    """Raw float32 LE → view (N, 36) langsung di atas buffer request."""
+    row_bytes = N_FEATURES * 4
+    if len(body) % row_bytes != 0:
+        raise DecodeError(f"body length {len(body)} is not a multiple of {row_bytes}")
+    return _check(np.frombuffer(body, dtype="<f4").reshape(-1, N_FEATURES))
+
+
+def decode_npy(body: bytes) -> np.ndarray:
+    """
+    .npy → view di atas buffer request. Header dibaca manual supaya data
+    tidak disalin seperti np.load().
+    """
+    buf = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(buf)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(buf)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(buf)
+    except ValueError as e:
+        raise DecodeError(f"invalid .npy header: {e}")
+
+    if dtype.kind != "f":
+        raise DecodeError(f"expected float dtype, got {dtype}")
+
+    count = int(np.prod(shape))
+    if len(body) - buf.tell() < count * dtype.itemsize:
+        raise DecodeError("truncated .npy payload")
+
+    X = np.frombuffer(body, dtype=dtype, count=count, offset=buf.tell())
+    X = X.reshape(shape, order="F" if fortran else "C")
+    return _check(X.astype(np.float32, copy=False))
+
+
+def decode_arrow(body: bytes) -> np.ndarray:
+    """
+    Arrow IPC stream. Dua layout:
+      - satu kolom fixed_size_list<float32>[36] → zero-copy
+      - 36 kolom float (urutan FEATURE_COLS)    → di-stack per kolom
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise DecodeError("Arrow payload requires pyarrow (pip install pyarrow)")
+
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowInvalid as e:
+        raise DecodeError(f"invalid Arrow stream: {e}")
+
+    if table.num_columns == 1 and pa.types.is_fixed_size_list(table.column(0).type):
+        col    = table.column(0).combine_chunks()
+        values = col.flatten().to_numpy(zero_copy_only=False)
+        X = values.reshape(-1, col.type.list_size)
+    elif table.num_columns == N_FEATURES:
+        X = np.column_stack([
+            table.column(i).to_numpy() for i in range(N_FEATURES)
+        ])
+    else:
+        raise DecodeError(
+            f"expected 1 fixed_size_list column or {N_FEATURES} columns, "
+            f"got {table.num_columns}"
+        )
+    return _check(X.astype(np.float32, copy=False))
+
+
+DECODERS = {
+    CT_RAW  : decode_raw,
+    CT_NPY  : decode_npy,
+    CT_ARROW: decode_arrow,
+}
+
+
+def decode(content_type: str, body: bytes) -> np.ndarray:
+    ct = (content_type or CT_RAW).split(";")[0].strip().lower()
+    decoder = DECODERS.get(ct)
+    if decoder is None:
+        raise DecodeError(f"unsupported content type: {ct}")
+    return decoder(body)
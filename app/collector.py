@@ -0,0 +1,320 @@
+"""
+Protokol collector: sensor ringan mengirim batch fitur ke node scoring
+pusat lewat koneksi persisten (TCP atau Unix socket), verdict dikembalikan
+async per batch_id. Modul ini tidak mengimport model / TensorFlow.
+
+Frame (little-endian):
+    header  payload_len u32 | msg_type u8 | batch_id u64 | n_rows u32
+    payload tergantung msg_type:
+      CHALLENGE  nonce acak dari collector (frame pertama setelah connect)
+      HELLO      sensor → collector: HMAC-SHA256(authkey, nonce) + sensor id (utf-8)
+                 collector → sensor: payload kosong = autentikasi diterima
+      BATCH    float32 (n_rows, 36) urutan FEATURE_COLS — sama dengan codec.decode_raw
+      VERDICT  float32[n_rows] ensemble_score + uint8[n_rows] is_anomaly
+      ERROR    pesan (utf-8), batch_id = batch yang ditolak
+
+Autentikasi challenge-response dengan shared secret (COLLECTOR_AUTHKEY),
+ide yang sama dengan authkey multiprocessing di app/model_server.py:
+secret tidak pernah dikirim, dan sebelum HELLO valid collector hanya
+menerima frame kecil (HANDSHAKE_MAX_BYTES).
+"""
+
+import asyncio
+import hashlib
+import hmac
+import itertools
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+HEADER              = struct.Struct("<IBQI")
+MAX_FRAME_BYTES     = 64 * 1024 * 1024
+HANDSHAKE_MAX_BYTES = 1024
+NONCE_BYTES         = 32
+DIGEST_BYTES        = hashlib.sha256().digest_size
+
+MSG_HELLO     = 1
+MSG_BATCH     = 2
+MSG_VERDICT   = 3
+MSG_ERROR     = 4
+MSG_CHALLENGE = 5
+
+
+class ProtocolError(ValueError):
+    """Frame rusak atau tidak dikenal."""
+
+
+def parse_address(address: str):
+    """'tcp://host:port' → (AF_INET, (host, port)); 'unix:///path' → (AF_UNIX, path)."""
+    if address.startswith("unix://"):
+        return socket.AF_UNIX, address[len("unix://"):]
+    if address.startswith("tcp://"):
+        host, _, port = address[len("tcp://"):].rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    raise ValueError(f"unsupported collector address: {address}")
+
+
+def encode_frame(msg_type: int, batch_id: int = 0, n_rows: int = 0, payload: bytes = b"") -> bytes:
+    return HEADER.pack(len(payload), msg_type, batch_id, n_rows) + payload
+
+
+def encode_batch(batch_id: int, X: np.ndarray) -> bytes:
+    X = np.ascontiguousarray(X, dtype="<f4")
+    return encode_frame(MSG_BATCH, batch_id, X.shape[0], X.tobytes())
+
+
+def encode_verdict(batch_id: int, scores: np.ndarray, is_anomaly: np.ndarray) -> bytes:
+    payload = np.asarray(scores, dtype="<f4").tobytes() + np.asarray(is_anomaly, dtype=np.uint8).tobytes()
+    return encode_frame(MSG_VERDICT, batch_id, len(scores), payload)
+
+
+def auth_digest(authkey: bytes, nonce: bytes) -> bytes:
+    return hmac.new(authkey, nonce, hashlib.sha256).digest()
+
+
+def check_hello(authkey: bytes, nonce: bytes, payload: bytes) -> str:
+    """Verifikasi HELLO sensor. Return sensor id; raise ProtocolError kalau digest salah."""
+    digest, sensor = payload[:DIGEST_BYTES], payload[DIGEST_BYTES:]
+    if not hmac.compare_digest(digest, auth_digest(authkey, nonce)):
+        raise ProtocolError("authentication failed")
+    return sensor.decode(errors="replace") or "?"
+
+
+def decode_verdict(n_rows: int, payload: bytes):
+    if len(payload) != n_rows * 5:
+        raise ProtocolError(f"verdict payload {len(payload)} bytes for {n_rows} rows")
+    scores     = np.frombuffer(payload, dtype="<f4", count=n_rows)
+    is_anomaly = np.frombuffer(payload, dtype=np.uint8, count=n_rows, offset=n_rows * 4).astype(bool)
+    return scores, is_anomaly
+
+
+def _check_header(payload_len: int, msg_type: int, max_bytes: int):
+    if payload_len > max_bytes:
+        raise ProtocolError(f"frame too large: {payload_len} bytes")
+    if msg_type not in (MSG_HELLO, MSG_BATCH, MSG_VERDICT, MSG_ERROR, MSG_CHALLENGE):
+        raise ProtocolError(f"unknown message type {msg_type}")
+
+
+async def read_frame(reader: asyncio.StreamReader, max_bytes: int = MAX_FRAME_BYTES):
+    """Sisi server (asyncio). Return (msg_type, batch_id, n_rows, payload)."""
+    payload_len, msg_type, batch_id, n_rows = HEADER.unpack(await reader.readexactly(HEADER.size))
+    _check_header(payload_len, msg_type, max_bytes)
+    return msg_type, batch_id, n_rows, await reader.readexactly(payload_len)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray(n)
+    view, got = memoryview(buf), 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if k == 0:
+            raise ConnectionError("collector closed connection")
+        got += k
+    return bytes(buf)
+
+
+def recv_frame(sock: socket.socket, max_bytes: int = MAX_FRAME_BYTES):
+    """Sisi sensor (blocking socket). Return (msg_type, batch_id, n_rows, payload)."""
+    payload_len, msg_type, batch_id, n_rows = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    _check_header(payload_len, msg_type, max_bytes)
+    return msg_type, batch_id, n_rows, _recv_exact(sock, payload_len)
+
+
+class _Node:
+    def __init__(self, address: str):
+        self.address = address
+        self.sock    = None
+        self.lock    = threading.Lock()   # serialisasi sendall per koneksi
+
+
+class CollectorClient:
+    """
+    Client sensor: satu koneksi persisten per node scoring, batch dibagi
+    round-robin ke node yang hidup. Tiap koneksi punya thread receiver yang
+    memanggil on_verdict(context, scores, is_anomaly) per batch_id.
+
+    Batch yang belum dijawab disimpan (maks max_pending); kalau koneksi
+    putus, batch tersebut dikirim ulang ke node lain / setelah reconnect.
+    """
+
+    def __init__(self, nodes: list, sensor_id: str, on_verdict, authkey: bytes,
+                 max_pending: int = 64, reconnect_s: float = 1.0):
+        if not nodes:
+            raise ValueError("CollectorClient needs at least one node")
+        self.sensor_id   = sensor_id
+        self.authkey     = authkey
+        self.on_verdict  = on_verdict
+        self.max_pending = max_pending
+        self.reconnect_s = reconnect_s
+
+        self._nodes   = [_Node(a) for a in nodes]
+        self._rr      = itertools.count()
+        self._ids     = itertools.count(1)
+        self._lock    = threading.Lock()
+        self._pending = OrderedDict()   # batch_id → [node | None, X, context]
+
+        self.counters = {
+            "batches_sent"    : 0,
+            "rows_sent"       : 0,
+            "verdicts"        : 0,
+            "resent"          : 0,
+            "dropped_pending" : 0,   # batch tertua dibuang karena max_pending
+            "errors"          : 0,   # frame ERROR dari collector
+            "reconnects"      : 0,
+        }
+
+        for node in self._nodes:
+            threading.Thread(target=self._run, args=(node,), name=f"collector-{node.address}",
+                             daemon=True).start()
+
+    # ── API ─────────────────────────────────────────────
+    def send(self, X: np.ndarray, context=None) -> int:
+        """Non-blocking kecuali sendall. Return batch_id."""
+        batch_id = next(self._ids)
+        with self._lock:
+            self._pending[batch_id] = [None, X, context]
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+                self.counters["dropped_pending"] += 1
+        self._dispatch(batch_id)
+        return batch_id
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.counters,
+                "pending"  : len(self._pending),
+                "connected": [n.address for n in self._nodes if n.sock is not None],
+            }
+
+    # ── Internal ────────────────────────────────────────
+    def _live_nodes(self) -> list:
+        return [n for n in self._nodes if n.sock is not None]
+
+    def _dispatch(self, batch_id: int, node: _Node = None) -> bool:
+        live = [node] if node is not None else self._live_nodes()
+        if not live:
+            return False   # tetap di pending, dikirim saat ada node connect
+        node = live[next(self._rr) % len(live)]
+
+        with self._lock:
+            entry = self._pending.get(batch_id)
+            if entry is None:
+                return True
+            entry[0] = node
+            X        = entry[1]
+
+        try:
+            with node.lock:
+                node.sock.sendall(encode_batch(batch_id, X))
+        except (OSError, AttributeError):
+            # Koneksi putus di tengah jalan; receiver thread akan reconnect
+            with self._lock:
+                if batch_id in self._pending:
+                    self._pending[batch_id][0] = None
+            self._close(node)
+            return False
+
+        with self._lock:
+            self.counters["batches_sent"] += 1
+            self.counters["rows_sent"]    += len(X)
+        return True
+
+    def _connect(self, node: _Node) -> socket.socket:
+        family, addr = parse_address(node.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.connect(addr)
+            if family == socket.AF_INET:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            msg_type, _, _, nonce = recv_frame(sock, HANDSHAKE_MAX_BYTES)
+            if msg_type != MSG_CHALLENGE:
+                raise ConnectionError("expected CHALLENGE from collector")
+            hello = auth_digest(self.authkey, nonce) + self.sensor_id.encode()
+            sock.sendall(encode_frame(MSG_HELLO, payload=hello))
+            msg_type, _, _, payload = recv_frame(sock, HANDSHAKE_MAX_BYTES)
+            if msg_type != MSG_HELLO:
+                raise ConnectionError(f"collector rejected sensor: {payload.decode(errors='replace')}")
+        except (OSError, ProtocolError) as e:
+            sock.close()
+            raise ConnectionError(str(e)) from e
+        return sock
+
+    def _close(self, node: _Node):
+        sock, node.sock = node.sock, None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        # Batch milik node ini kembali ke antrian kirim ulang
+        with self._lock:
+            orphaned = [bid for bid, e in self._pending.items() if e[0] is node]
+            for bid in orphaned:
+                self._pending[bid][0] = None
+            self.counters["resent"] += len(orphaned)
+        for bid in orphaned:
+            self._dispatch(bid)
+
+    def _flush_unassigned(self, node: _Node):
+        with self._lock:
+            waiting = [bid for bid, e in self._pending.items() if e[0] is None]
+        for bid in waiting:
+            if not self._dispatch(bid, node):
+                break
+
+    def _run(self, node: _Node):
+        backoff = self.reconnect_s
+        while True:
+            try:
+                sock = self._connect(node)
+            except OSError as e:
+                print(f"[WARN] collector {node.address} unreachable: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+
+            node.sock = sock
+            backoff   = self.reconnect_s
+            with self._lock:
+                self.counters["reconnects"] += 1
+            print(f"🔌 Connected to collector {node.address}")
+            self._flush_unassigned(node)
+
+            try:
+                while True:
+                    msg_type, batch_id, n_rows, payload = recv_frame(sock)
+                    self._handle(msg_type, batch_id, n_rows, payload)
+            except (OSError, ProtocolError) as e:
+                print(f"[WARN] collector {node.address} disconnected: {e}")
+            if node.sock is sock:
+                self._close(node)
+            time.sleep(backoff)
+
+    def _handle(self, msg_type: int, batch_id: int, n_rows: int, payload: bytes):
+        if msg_type == MSG_ERROR:
+            with self._lock:
+                self._pending.pop(batch_id, None)
+                self.counters["errors"] += 1
+            print(f"[ERROR] collector rejected batch {batch_id}: {payload.decode(errors='replace')}")
+            return
+        if msg_type != MSG_VERDICT:
+            return
+
+        # Decode dulu: verdict rusak → ProtocolError → koneksi diputus dan
+        # batch (masih di pending) dikirim ulang, bukan hilang diam-diam
+        scores, is_anomaly = decode_verdict(n_rows, payload)
+        with self._lock:
+            entry = self._pending.pop(batch_id, None)
+            if entry is not None:
+                self.counters["verdicts"] += 1
+        if entry is None:
+            return   # verdict duplikat (batch sudah dijawab node lain)
+        try:
+            self.on_verdict(entry[2], scores, is_anomaly)
+        except Exception as e:
+            print(f"[ERROR] verdict callback: {e}")
+
@@ -0,0 +1,199 @@
+"""
+Korelasi event EVE Suricata per flow_id: alert signature + metadata
+protokol (dns / http / tls) + verdict ML digabung jadi satu incident.
+
+Urutan event di EVE untuk satu flow:
+    alert / dns / http / tls   → selama flow aktif
+    flow                       → saat flow ditutup Suricata (timeout / FIN)
+    verdict ML                 → setelah event flow di-score (antrian ingest)
+
+Index hanya menyimpan flow yang punya event non-flow, sebagai entry
+kecil (__slots__, tiap jenis event dibatasi CORRELATE_MAX_PER_KIND).
+Event `flow` tanpa entry tidak disimpan sama sekali — verdict-nya
+langsung diputuskan. Memori dibatasi dua cara:
+  - TTL: entry yang tidak di-update CORRELATE_TTL_S dibuang
+  - kapasitas: lebih dari CORRELATE_MAX_FLOWS → entry tertua dibuang
+OrderedDict diurutkan menurut update terakhir, jadi keduanya O(1) per
+entry dari depan.
+
+Incident di-emit kalau ada alert atau ML menyatakan anomali; entry
+yang dibuang karena TTL / kapasitas tetap di-emit kalau punya alert.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from config import CORRELATE_MAX_FLOWS, CORRELATE_TTL_S, CORRELATE_MAX_PER_KIND
+
+# Field yang disimpan per jenis event (sisanya dibuang supaya entry kecil)
+META_FIELDS = {
+    "alert": ("signature_id", "signature", "category", "severity", "action"),
+    "dns"  : ("type", "rrname", "rrtype", "rcode"),
+    "http" : ("hostname", "url", "http_method", "status", "http_user_agent"),
+    "tls"  : ("sni", "version", "subject", "ja3"),
+}
+FLOW_FIELDS = ("timestamp", "src_ip", "src_port", "dest_ip", "dest_port", "proto", "app_proto")
+SWEEP_BATCH = 64   # entry kadaluarsa maksimum yang dibuang per event (hindari spike)
+
+
+class _Entry:
+    __slots__ = ("last_seen", "events", "dropped", "flow")
+
+    def __init__(self, now: float, flow: tuple):
+        self.last_seen = now
+        self.events    = {}     # jenis → list dict ringkas
+        self.dropped   = 0      # event melebihi CORRELATE_MAX_PER_KIND
+        self.flow      = flow   # nilai FLOW_FIELDS (tuple) dari event pertama, diganti event flow
+
+
+def _pick(body: dict, fields: tuple) -> dict:
+    return {k: body[k] for k in fields if body.get(k) is not None}
+
+
+def _flow_tuple(eve: dict) -> tuple:
+    # Tuple jauh lebih kecil dari dict untuk ratusan ribu entry
+    return tuple(eve.get(k) for k in FLOW_FIELDS)
+
+
+class FlowCorrelator:
+
+    def __init__(self, emit, max_flows: int = CORRELATE_MAX_FLOWS,
+                 ttl: float = CORRELATE_TTL_S, max_per_kind: int = CORRELATE_MAX_PER_KIND):
+        """emit(incident: dict) dipanggil di luar lock, dari thread pemanggil."""
+        self.emit         = emit
+        self.max_flows    = max_flows
+        self.ttl          = ttl
+        self.max_per_kind = max_per_kind
+
+        self._lock    = threading.Lock()
+        self._entries = OrderedDict()   # flow_id → _Entry, urut update terakhir
+
+        self.counters = {
+            "events"          : 0,   # alert / dns / http / tls yang diindeks
+            "incidents"       : 0,
+            "incidents_alert" : 0,   # incident dengan minimal satu alert
+            "incidents_ml"    : 0,   # incident dengan verdict ML anomali
+            "incidents_both"  : 0,   # alert + ML anomali pada flow yang sama
+            "expired"         : 0,   # dibuang karena TTL
+            "evicted"         : 0,   # dibuang karena kapasitas
+            "events_dropped"  : 0,   # melebihi max_per_kind
+        }
+
+    # ── Input ───────────────────────────────────────────
+    def add_event(self, eve: dict):
+        """Index event alert / dns / http / tls. Event lain diabaikan."""
+        kind    = eve.get("event_type")
+        flow_id = eve.get("flow_id")
+        if kind not in META_FIELDS or flow_id is None:
+            return
+
+        body = eve.get(kind) or {}
+        item = _pick(body, META_FIELDS[kind])
+        if kind == "alert":
+            item["timestamp"] = eve.get("timestamp")
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(flow_id)
+            if entry is None:
+                entry = self._entries[flow_id] = _Entry(now, _flow_tuple(eve))
+            else:
+                entry.last_seen = now
+                self._entries.move_to_end(flow_id)
+            items = entry.events.setdefault(kind, [])
+            if len(items) < self.max_per_kind:
+                items.append(item)
+            else:
+                entry.dropped += 1
+                self.counters["events_dropped"] += 1
+            self.counters["events"] += 1
+            stale = self._evict(now)
+        self._emit_all(stale)
+
+    def flow_closed(self, eve: dict, scored: bool):
+        """
+        Event `flow` masuk. scored=False kalau flow tidak akan pernah punya
+        verdict (allowlisted / di-shed / antrian penuh) → incident diputuskan
+        sekarang; scored=True → tunggu verdict().
+        """
+        flow_id = eve.get("flow_id")
+        with self._lock:
+            entry = self._entries.get(flow_id)
+            if entry is None:
+                return
+            if scored:
+                entry.flow      = _flow_tuple(eve)
+                entry.last_seen = time.monotonic()
+                self._entries.move_to_end(flow_id)
+                return
+            del self._entries[flow_id]
+        self._finish(eve, entry, None, "unscored")
+
+    def verdict(self, eve: dict, result: dict):
+        """Verdict ML untuk event flow yang sudah di-score."""
+        with self._lock:
+            entry = self._entries.pop(eve.get("flow_id"), None)
+        if entry is None and not result["is_anomaly"]:
+            return   # flow biasa tanpa metadata: tidak ada yang perlu dikorelasi
+        self._finish(eve, entry, result, "closed")
+
+    def sweep(self):
+        """Buang semua entry kadaluarsa (dipanggil periodik dari loop)."""
+        now = time.monotonic()
+        with self._lock:
+            stale = self._evict(now, limit=None)
+        self._emit_all(stale)
+
+    # ── Internal ────────────────────────────────────────
+    def _evict(self, now: float, limit: int = SWEEP_BATCH) -> list:
+        """Dipanggil dengan lock. Return [(flow_id, entry, reason)] yang dibuang."""
+        stale = []
+        while len(self._entries) > self.max_flows:
+            flow_id, entry = self._entries.popitem(last=False)
+            self.counters["evicted"] += 1
+            stale.append((flow_id, entry, "evicted"))
+        deadline = now - self.ttl
+        while self._entries and (limit is None or len(stale) < limit):
+            flow_id, entry = next(iter(self._entries.items()))
+            if entry.last_seen > deadline:
+                break
+            del self._entries[flow_id]
+            self.counters["expired"] += 1
+            stale.append((flow_id, entry, "expired"))
+        return stale
+
+    def _emit_all(self, stale: list):
+        for flow_id, entry, reason in stale:
+            eve = {"flow_id": flow_id, **dict(zip(FLOW_FIELDS, entry.flow))}
+            self._finish(eve, entry, None, reason)
+
+    def _finish(self, eve: dict, entry: _Entry | None, result: dict | None, reason: str):
+        alerts     = entry.events.get("alert", []) if entry else []
+        ml_anomaly = bool(result and result["is_anomaly"])
+        if not alerts and not ml_anomaly:
+            return
+
+        incident = {
+            "flow_id"   : eve.get("flow_id"),
+            **_pick(eve, FLOW_FIELDS),
+            "reason"    : reason,   # closed | unscored | expired | evicted
+            "severity"  : min((a["severity"] for a in alerts if "severity" in a), default=None),
+            "alerts"    : alerts,
+            "ml"        : None if result is None else {
+                k: result.get(k) for k in ("ensemble_score", "confidence", "is_anomaly", "top_features")
+            },
+            **({k: v for k, v in entry.events.items() if k != "alert"} if entry else {}),
+        }
+        if entry and entry.dropped:
+            incident["events_dropped"] = entry.dropped
+
+        with self._lock:
+            self.counters["incidents"] += 1
+            self.counters["incidents_alert"] += bool(alerts)
+            self.counters["incidents_ml"]    += ml_anomaly
+            self.counters["incidents_both"]  += bool(alerts) and ml_anomaly
+        self.emit(incident)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "active": len(self._entries), "max_flows": self.max_flows}
@@ -0,0 +1,181 @@
+"""
+Monitor drift fitur online terhadap distribusi training (scaler.pkl).
+
+Input monitor adalah output StandardScaler, jadi tiap nilai sudah berupa
+z-score relatif terhadap data training:
+  - Welford (versi batch / Chan) → mean & varians z per fitur.
+    mean z = z-shift, std z = rasio std live vs training.
+  - Sketch histogram dengan bucket sinh-spaced (rapat di sekitar 0,
+    lebar di ekor) → estimasi kuantil + PSI per fitur.
+
+PSI butuh histogram referensi dari data training (drift_reference.py →
+DRIFT_REFERENCE_PATH). Fitur flow CIC heavy-tailed dan banyak nol, jadi
+N(0, 1) bukan referensi yang layak: tanpa file referensi psi = null.
+
+Semua update vektor per batch (N, 36), tidak ada loop per flow.
+"""
+
+import math
+import os
+import threading
+import numpy as np
+
+# Batas bin PSI dalam satuan z
+PSI_EDGES = np.array([-3.0, -2.0, -1.0, -0.5, 0.0, 0.5, 1.0, 2.0, 3.0])
+
+# Batas bucket sketch: sinh-spaced di [-1e4, 1e4] + semua batas PSI
+_Z_LIMIT     = 1e4
+SKETCH_EDGES = np.unique(np.concatenate([
+    np.sinh(np.linspace(-math.asinh(_Z_LIMIT), math.asinh(_Z_LIMIT), 255)),
+    PSI_EDGES,
+]))
+N_BUCKETS = len(SKETCH_EDGES) + 1   # + underflow & overflow
+
+# Index bucket awal tiap bin PSI (untuk np.add.reduceat)
+_PSI_STARTS = np.concatenate([
+    [0], np.searchsorted(SKETCH_EDGES, PSI_EDGES) + 1
+])
+
+QUANTILES = (0.5, 0.95, 0.99)
+_EPS      = 1e-6
+
+
+def psi_score(actual: np.ndarray, expected: np.ndarray) -> np.ndarray:
+    """PSI per baris: sum((a - e) * ln(a / e)) atas proporsi bin, nol di-clip ke _EPS."""
+    a = np.maximum(actual, _EPS)
+    e = np.maximum(expected, _EPS)
+    return ((a - e) * np.log(a / e)).sum(axis=1)
+
+
+def _psi_level(psi: float) -> str:
+    if psi >= 0.25:
+        return "HIGH"
+    elif psi >= 0.10:
+        return "MEDIUM"
+    return "LOW"
+
+
+class DriftMonitor:
+
+    def __init__(self, feature_names: list, train_mean: np.ndarray,
+                 train_scale: np.ndarray, reference_path: str = None):
+        self.feature_names = list(feature_names)
+        self.train_mean    = np.asarray(train_mean, dtype=np.float64)
+        self.train_scale   = np.asarray(train_scale, dtype=np.float64)
+        n_features         = len(self.feature_names)
+
+        self._lock  = threading.Lock()
+        self.count  = 0
+        self.mean   = np.zeros(n_features)
+        self.m2     = np.zeros(n_features)
+        self.sketch = np.zeros((n_features, N_BUCKETS), dtype=np.int64)
+
+        # Referensi PSI: histogram training yang disimpan (save_reference).
+        # Tanpa referensi PSI tidak dihitung, z_shift / std_ratio tetap jalan.
+        self.reference_source = "unavailable"
+        self.reference = None
+        if reference_path and os.path.exists(reference_path):
+            ref = np.load(reference_path)["sketch"]
+            if ref.shape == self.sketch.shape and ref.sum() > 0:
+                self.reference = self._psi_proportions(ref)
+                self.reference_source = reference_path
+            else:
+                print(f"[WARN] drift reference {reference_path} ignored: shape {ref.shape}, "
+                      f"expected {self.sketch.shape} (buat ulang dengan drift_reference.py)")
+
+    # ── Update ──────────────────────────────────────────
+    def update(self, z: np.ndarray):
+        """z: batch (N, 36) hasil scaler.transform."""
+        z = np.asarray(z, dtype=np.float64)
+        n_b, n_features = z.shape
+        if n_b == 0:
+            return
+
+        mean_b = z.mean(axis=0)
+        m2_b   = ((z - mean_b) ** 2).sum(axis=0)
+
+        bucket = np.searchsorted(SKETCH_EDGES, z, side="right")
+        flat   = (bucket + np.arange(n_features) * N_BUCKETS).ravel()
+        counts = np.bincount(flat, minlength=n_features * N_BUCKETS)
+        counts = counts.reshape(n_features, N_BUCKETS)
+
+        with self._lock:
+            # Gabung statistik batch ke statistik berjalan (Chan et al.)
+            total  = self.count + n_b
+            delta  = mean_b - self.mean
+            self.mean  += delta * (n_b / total)
+            self.m2    += m2_b + delta ** 2 * (self.count * n_b / total)
+            self.count  = total
+            self.sketch += counts
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self.mean[:] = 0.0
+            self.m2[:] = 0.0
+            self.sketch[:] = 0
+
+    def save_reference(self, path: str):
+        """Simpan sketch saat ini sebagai referensi PSI (mis. replay data training)."""
+        with self._lock:
+            np.savez_compressed(path, sketch=self.sketch)
+
+    # ── Report ──────────────────────────────────────────
+    def _psi_proportions(self, sketch: np.ndarray) -> np.ndarray:
+        binned = np.add.reduceat(sketch, _PSI_STARTS, axis=1).astype(np.float64)
+        total  = binned.sum(axis=1, keepdims=True)
+        return binned / np.maximum(total, 1)
+
+    def _quantiles(self, sketch: np.ndarray) -> dict:
+        cum   = np.cumsum(sketch, axis=1)
+        total = cum[:, -1:]
+        edges = np.concatenate([SKETCH_EDGES, [SKETCH_EDGES[-1]]])
+        out = {}
+        for q in QUANTILES:
+            idx   = (cum < q * total).sum(axis=1)
+            z_q   = edges[np.minimum(idx, len(edges) - 1)]
+            # Kembalikan ke satuan asli fitur
+            out[f"p{int(q * 100)}"] = z_q * self.train_scale + self.train_mean
+        return out
+
+    def report(self, top: int = None) -> dict:
+        with self._lock:
+            count  = self.count
+            mean   = self.mean.copy()
+            m2     = self.m2.copy()
+            sketch = self.sketch.copy()
+
+        if count == 0:
+            return {"count": 0, "reference": self.reference_source, "features": []}
+
+        std_ratio = np.sqrt(m2 / max(count - 1, 1))
+        psi       = None
+        if self.reference is not None:
+            psi = psi_score(self._psi_proportions(sketch), self.reference)
+        quantiles = self._quantiles(sketch)
+
+        features = []
+        for i, name in enumerate(self.feature_names):
+            features.append({
+                "feature"   : name,
+                "z_shift"   : round(float(mean[i]), 4),
+                "std_ratio" : round(float(std_ratio[i]), 4),
+                "psi"       : None if psi is None else round(float(psi[i]), 4),
+                "level"     : "unavailable" if psi is None else _psi_level(float(psi[i])),
+                "train_mean": round(float(self.train_mean[i]), 4),
+                "live_mean" : round(float(mean[i] * self.train_scale[i] + self.train_mean[i]), 4),
+                **{k: round(float(v[i]), 4) for k, v in quantiles.items()},
+            })
+
+        if psi is None:
+            features.sort(key=lambda f: abs(f["z_shift"]), reverse=True)
+        else:
+            features.sort(key=lambda f: f["psi"], reverse=True)
+        if top:
+            features = features[:top]
+
+        return {
+            "count"    : count,
+            "reference": self.reference_source,
+            "features" : features,
+        }
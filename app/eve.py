@@ -0,0 +1,160 @@
+"""
+Ekstraksi fitur dari EVE JSON Suricata + tail file EVE.
+Tidak mengimport model, jadi bisa dipakai sensor ringan (sensor_agent.py)
+maupun pipeline penuh (eve_to_ml.py).
+"""
+
+import json
+import math
+import os
+import time
+from datetime import datetime
+
+
+# ── Feature extractor dari EVE flow record ────────────────────────────
+def extract_features(eve: dict) -> dict | None:
+    """
+    Map EVE JSON flow record → dict fitur yang dibutuhkan model.
+    Return None kalau bukan event_type 'flow'.
+    """
+    if eve.get("event_type") != "flow":
+        return None
+
+    flow = eve.get("flow", {})
+    tcp  = eve.get("tcp", {})
+
+    # Durasi dalam microseconds (seperti CICFlowMeter)
+    start_str = flow.get("start", "")
+    end_str   = flow.get("end", "")
+    duration_us = 0.0
+    try:
+        fmt = "%Y-%m-%dT%H:%M:%S.%f%z"
+        t_start = datetime.strptime(start_str, fmt)
+        t_end   = datetime.strptime(end_str, fmt)
+        duration_us = (t_end - t_start).total_seconds() * 1_000_000
+    except Exception:
+        duration_us = float(flow.get("age", 0)) * 1_000_000
+
+    duration_s = duration_us / 1_000_000 if duration_us > 0 else 1e-9
+
+    # Bytes dan packets
+    bytes_fwd  = float(flow.get("bytes_toserver", 0))
+    bytes_bwd  = float(flow.get("bytes_toclient", 0))
+    pkts_fwd   = float(flow.get("pkts_toserver", 0))
+    pkts_bwd   = float(flow.get("pkts_toclient", 0))
+    total_pkts = pkts_fwd + pkts_bwd
+    total_bytes= bytes_fwd + bytes_bwd
+
+    # Avg segment size
+    avg_fwd_seg = bytes_fwd / pkts_fwd if pkts_fwd > 0 else 0.0
+    avg_bwd_seg = bytes_bwd / pkts_bwd if pkts_bwd > 0 else 0.0
+    avg_pkt     = total_bytes / total_pkts if total_pkts > 0 else 0.0
+
+    # TCP flags — Suricata catat di tcp.tcp_flags (hex string)
+    # Juga tersedia tcp_flags_ts (to server) dan tcp_flags_tc (to client)
+    flags_ts = int(tcp.get("tcp_flags_ts", "0x00"), 16) if tcp else 0
+    flags_tc = int(tcp.get("tcp_flags_tc", "0x00"), 16) if tcp else 0
+    flags_all = flags_ts | flags_tc
+
+    syn_flag = 1 if (flags_all & 0x02) else 0
+    ack_flag = 1 if (flags_all & 0x10) else 0
+    fin_flag = 1 if (flags_all & 0x01) else 0
+    psh_flag = 1 if (flags_all & 0x08) else 0
+    urg_flag = 1 if (flags_all & 0x20) else 0
+
+    # Init window bytes — tersedia di tcp jika ada
+    init_win_fwd = float(tcp.get("win", 0)) if tcp else 0.0
+    init_win_bwd = 0.0
+
+    # Down/Up ratio
+    down_up = bytes_bwd / bytes_fwd if bytes_fwd > 0 else 0.0
+
+    features = {
+        "Fwd_Header_Length"           : 20.0,           # default TCP header
+        "Destination_Port"            : float(eve.get("dest_port", 0)),
+        "Flow_Duration"               : duration_us,
+        "Total_Length_of_Fwd_Packets" : bytes_fwd,
+        "Total_Length_of_Bwd_Packets" : bytes_bwd,
+        "Fwd_Packet_Length_Std"       : 0.0,            # tidak tersedia langsung
+        "Bwd_Packet_Length_Std"       : 0.0,
+        "Flow_Bytes_s"                : total_bytes / duration_s,
+        "Flow_Packets_s"              : total_pkts / duration_s,
+        "Total_Fwd_Packets"           : pkts_fwd,
+        "Total_Backward_Packets"      : pkts_bwd,
+        "Init_Win_bytes_forward"      : init_win_fwd,
+        "Init_Win_bytes_backward"     : init_win_bwd,
+        "Avg_Fwd_Segment_Size"        : avg_fwd_seg,
+        "Avg_Bwd_Segment_Size"        : avg_bwd_seg,
+        "Average_Packet_Size"         : avg_pkt,
+        "Packet_Length_Mean"          : avg_pkt,
+        "Fwd_IAT_Std"                 : 0.0,
+        "Bwd_IAT_Std"                 : 0.0,
+        "Flow_IAT_Mean"               : duration_us / total_pkts if total_pkts > 1 else 0.0,
+        "Flow_IAT_Std"                : 0.0,
+        "Flow_IAT_Max"                : duration_us,
+        "Fwd_IAT_Mean"                : duration_us / pkts_fwd if pkts_fwd > 1 else 0.0,
+        "Bwd_IAT_Mean"                : duration_us / pkts_bwd if pkts_bwd > 1 else 0.0,
+        "ACK_Flag_Count"              : ack_flag,
+        "SYN_Flag_Count"              : syn_flag,
+        "FIN_Flag_Count"              : fin_flag,
+        "PSH_Flag_Count"              : psh_flag,
+        "URG_Flag_Count"              : urg_flag,
+        "Subflow_Fwd_Packets"         : pkts_fwd,
+        "Subflow_Bwd_Packets"         : pkts_bwd,
+        "Subflow_Fwd_Bytes"           : bytes_fwd,
+        "Subflow_Bwd_Bytes"           : bytes_bwd,
+        "Fwd_Packets_s"               : pkts_fwd / duration_s,
+        "Bwd_Packets_s"               : pkts_bwd / duration_s,
+        "Down_Up_Ratio"               : down_up,
+    }
+
+    # Sanitize: ganti inf/nan dengan 0
+    for k, v in features.items():
+        if isinstance(v, float) and (math.isnan(v) or math.isinf(v)):
+            features[k] = 0.0
+
+    return features
+
+
+# ── Tail EVE JSON ─────────────────────────────────────────────────────
+def _rotated(f, path: str) -> bool:
+    """True kalau path sudah menunjuk file lain (logrotate / rename) atau file di-truncate."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False   # file baru belum dibuat, tetap baca file lama
+    return st.st_ino != os.fstat(f.fileno()).st_ino or st.st_size < f.tell()
+
+
+def follow_eve(path: str):
+    """
+    Generator: yield satu EVE record per baris secara real-time.
+    Ikut pindah ke file baru kalau eve.json dirotasi atau di-truncate.
+    """
+    print(f"📡 Monitoring {path} ...")
+    f = open(path, "r")
+    f.seek(0, 2)  # seek ke akhir file (tail mode)
+    partial = ""
+    try:
+        while True:
+            line = f.readline()
+            if not line:
+                if _rotated(f, path):
+                    # Sisa file lama sudah habis dibaca → buka file baru dari awal
+                    f.close()
+                    f, partial = open(path, "r"), ""
+                    continue
+                time.sleep(0.05)
+                continue
+            if not line.endswith("\n"):
+                partial += line   # writer belum selesai menulis baris ini
+                continue
+            line, partial = (partial + line).strip(), ""
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+    finally:
+        f.close()
@@ -1,94 +1,276 @@
+import asyncio
 import json
-from groq import Groq
-from config import GROQ_API_KEY
+import queue
+import threading
+import time
+from config import (
+    GROQ_API_KEY, LLM_MIN_CONFIDENCE, LLM_MODEL, LLM_BASE_URL,
+    LLM_RATE_PER_SEC, LLM_BURST, LLM_MAX_IN_FLIGHT, LLM_TIMEOUT_S,
+    LLM_MAX_RETRIES, LLM_MAX_QUEUE_WAIT_S, LLM_BREAKER_FAILURES,
+    LLM_BREAKER_RESET_S, LLM_BATCH_SIZE, LLM_BATCH_MAX_WAIT_S, TRACE_ENABLED
+)
+from pydantic import ValidationError
+from app.attribution import format_attribution
+from app.schemas import Explanation
+from app.llm_client import LLMClient
+from app.tracing import StageStats, start_trace, span
 
-client = Groq(api_key=GROQ_API_KEY)
+client = LLMClient(
+    api_key          = GROQ_API_KEY,
+    model            = LLM_MODEL,
+    base_url         = LLM_BASE_URL,
+    rate_per_sec     = LLM_RATE_PER_SEC,
+    burst            = LLM_BURST,
+    max_in_flight    = LLM_MAX_IN_FLIGHT,
+    timeout          = LLM_TIMEOUT_S,
+    max_retries      = LLM_MAX_RETRIES,
+    max_queue_wait   = LLM_MAX_QUEUE_WAIT_S,
+    breaker_failures = LLM_BREAKER_FAILURES,
+    breaker_reset    = LLM_BREAKER_RESET_S,
+)
 
+_CONFIDENCE_RANK = {"LOW": 0, "MEDIUM": 1, "HIGH": 2}
 
-def explain_anomaly(prediction: dict, raw_input: dict) -> str:
 
-    prompt = f"""
-You are an experienced SOC (Security Operation Center) analyst assistant.
-Analyze the network anomaly detection results from our ML ensemble system.
-Provide explanation in BOTH Bahasa Indonesia and English.
+def needs_llm(prediction: dict) -> bool:
+    """Anomali dengan confidence di bawah LLM_MIN_CONFIDENCE cukup pakai penjelasan lokal."""
+    rank = _CONFIDENCE_RANK.get(prediction.get("confidence"), 0)
+    return rank >= _CONFIDENCE_RANK[LLM_MIN_CONFIDENCE]
 
-IMPORTANT RULES:
-- Base your analysis ONLY on the data and scores provided below
+
+def local_explanation(prediction: dict, source: str = "local", error: str = None) -> dict:
+    """Penjelasan instan dari atribusi TreeSHAP, tanpa LLM."""
+    top = prediction.get("top_features")
+    return Explanation(
+        source        = source,
+        threat_level  = prediction.get("confidence"),
+        summary_en    = f"Ensemble score {prediction['ensemble_score']}; top contributing features below.",
+        data_evidence = format_attribution(top) if top else None,
+        error         = error,
+    ).model_dump()
+
+
+def _fallback(prediction: dict, error) -> dict:
+    return local_explanation(prediction, source="unavailable", error=str(error))
+
+
+def render_explanation(exp: dict) -> str:
+    """Teks untuk terminal / log manusia. API & dashboard pakai field terstruktur."""
+    if exp is None:
+        return "⚠️ Tidak dapat menghasilkan penjelasan."
+    if exp["source"] != "llm":
+        head = f"⚠️ LLM explanation unavailable: {exp['error']}\n\n" if exp.get("error") else ""
+        return (
+            f"{head}🔎 [{exp['threat_level']}] {exp['summary_en']}\n"
+            f"{exp['data_evidence'] or ''}"
+        )
+    return (
+        f"🚨 [{exp['threat_level']}] "
+        f"{exp['attack_type_id']} / {exp['attack_type_en']}\n\n"
+        f"📌 MITRE: {exp['mitre_technique']}\n\n"
+        f"📋 [ID] {exp['summary_id']}\n"
+        f"📋 [EN] {exp['summary_en']}\n\n"
+        f"💥 [ID] {exp['impact_id']}\n"
+        f"💥 [EN] {exp['impact_en']}\n\n"
+        f"🛡️ [ID] {exp['recommendation_id']}\n"
+        f"🛡️ [EN] {exp['recommendation_en']}\n\n"
+        f"🔍 Evidence: {exp['data_evidence']}"
+    )
+
+
+# ── Prompt: satu atau banyak anomali, instruksi cukup sekali ──
+_INSTRUCTIONS = """You are an experienced SOC (Security Operation Center) analyst assistant.
+Analyze each network anomaly below, detected by our ML ensemble system
+(XGBoost + CNN + ResNet). Write every *_id field in Bahasa Indonesia and every *_en field in English.
+
+RULES:
+- Analyze every anomaly independently, base each analysis ONLY on its own data
 - Do NOT fabricate attack types not supported by the data
 - Reference actual values from the input data
-- Be specific and actionable
-
-=== ML ENSEMBLE DETECTION RESULTS ===
-Status          : {prediction['status']}
-Ensemble Score  : {prediction['ensemble_score']} (0=normal, 1=definitely anomaly)
-XGBoost Score   : {prediction['xgboost_score']}
-CNN Score       : {prediction['cnn_score']}
-ResNet Score    : {prediction['resnet_score']}
-Confidence      : {prediction['confidence']}
-
-=== KEY INDICATORS ===
-SYN_Flag_Count      : {raw_input.get('SYN_Flag_Count', 0)}
-Flow_Packets_s      : {raw_input.get('Flow_Packets_s', 0)}
-Flow_Bytes_s        : {raw_input.get('Flow_Bytes_s', 0)}
-Total_Fwd_Packets   : {raw_input.get('Total_Fwd_Packets', 0)}
-Total_Bwd_Packets   : {raw_input.get('Total_Backward_Packets', 0)}
-Destination_Port    : {raw_input.get('Destination_Port', 0)}
-
-Respond ONLY with this exact JSON format, no preamble, no backticks:
-result = [
-  {{
-    "threat_level"      : "LOW/MEDIUM/HIGH/CRITICAL",
-    "attack_type_id"    : "nama serangan dalam Bahasa Indonesia",
-    "attack_type_en"    : "attack name in English",
-    "mitre_technique"   : "MITRE ATT&CK technique ID and name",
-    "summary_id"        : "ringkasan berdasarkan data aktual",
-    "summary_en"        : "summary based on actual data",
-    "impact_id"         : "potensi dampak dalam Bahasa Indonesia",
-    "impact_en"         : "potential impact in English",
-    "recommendation_id" : "langkah mitigasi spesifik Bahasa Indonesia",
-    "recommendation_en" : "specific mitigation steps in English",
-    "data_evidence"     : "nilai spesifik dari data yang mendukung kesimpulan"
-  }}
-]
+- Be specific and actionable, keep each field to 1-2 sentences
+
+Input line format:
+[id] ensemble/xgb/cnn/resnet scores, confidence | key indicators | top SHAP features (positive = towards anomaly)
+
+Reply with a JSON object only: {"results": [ ... one object per input id ... ]}
+Object keys:
+id      : id from input
+lvl     : LOW | MEDIUM | HIGH | CRITICAL
+atk_id  : attack name (Indonesian)
+atk_en  : attack name (English)
+mitre   : MITRE ATT&CK technique ID and name
+sum_id  : summary based on actual data (Indonesian)
+sum_en  : summary based on actual data (English)
+imp_id  : potential impact (Indonesian)
+imp_en  : potential impact (English)
+rec_id  : specific mitigation steps (Indonesian)
+rec_en  : specific mitigation steps (English)
+evid    : specific values from the data supporting the conclusion
 """
 
-    try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=2048,
-        )
+# Token output per anomali (1 objek ringkas ~ 250 token)
+_TOKENS_PER_ITEM = 350
+
+
+def _anomaly_line(item_id: str, prediction: dict, raw_input: dict) -> str:
+    top = prediction.get("top_features") or []
+    shap = ", ".join(f"{f['feature']}={f['value']}({f['contribution']:+})" for f in top)
+    return (
+        f"[{item_id}] score={prediction['ensemble_score']} "
+        f"xgb={prediction['xgboost_score']} cnn={prediction['cnn_score']} "
+        f"resnet={prediction['resnet_score']} conf={prediction['confidence']} | "
+        f"SYN={raw_input.get('SYN_Flag_Count', 0)} "
+        f"pkts/s={raw_input.get('Flow_Packets_s', 0)} "
+        f"bytes/s={raw_input.get('Flow_Bytes_s', 0)} "
+        f"fwd_pkts={raw_input.get('Total_Fwd_Packets', 0)} "
+        f"bwd_pkts={raw_input.get('Total_Backward_Packets', 0)} "
+        f"dport={raw_input.get('Destination_Port', 0)} | "
+        f"top: {shap or '-'}"
+    )
+
+
+def _build_messages(chunk: list) -> list:
+    lines = [_anomaly_line(str(i), p, raw) for i, (p, raw) in enumerate(chunk)]
+    return [
+        {"role": "system", "content": _INSTRUCTIONS},
+        {"role": "user",   "content": "\n".join(lines)},
+    ]
+
+
+def _params(n: int) -> dict:
+    return {
+        "temperature"    : 0.3,
+        "max_tokens"     : min(8192, max(1024, n * _TOKENS_PER_ITEM)),
+        "response_format": {"type": "json_object"},
+    }
+
+
+def _parse_results(raw_text: str) -> dict:
+    """
+    JSON strict → {id: Explanation dict}. Item yang tidak valid dibuang satu-satu,
+    sisanya tetap dipakai (call LLM tidak terbuang semua).
+    """
+    data = json.loads(raw_text)
+    out  = {}
+    for item in data.get("results", []) if isinstance(data, dict) else []:
+        if not isinstance(item, dict) or "id" not in item:
+            continue
+        try:
+            exp = Explanation.model_validate({**item, "source": "llm", "error": None})
+        except ValidationError:
+            continue
+        if exp.threat_level or exp.summary_en:
+            out[str(item["id"])] = exp.model_dump()
+    return out
+
+
+def _map_results(chunk: list, raw_text: str) -> list:
+    """Petakan result per-id kembali ke urutan chunk; id hilang → fallback lokal."""
+    by_id = _parse_results(raw_text)
+    return [
+        by_id.get(str(i)) or _fallback(prediction, "missing in LLM response")
+        for i, (prediction, _) in enumerate(chunk)
+    ]
+
+
+def _chunks(items: list) -> list:
+    llm_idx = [i for i, (p, _) in enumerate(items) if needs_llm(p)]
+    return [llm_idx[k:k + LLM_BATCH_SIZE] for k in range(0, len(llm_idx), LLM_BATCH_SIZE)]
+
+
+def explain_anomalies(items: list) -> list:
+    """
+    items: list (prediction, raw_input). Return list Explanation dict, urutan sama.
+    Anomali yang butuh LLM dikirim per LLM_BATCH_SIZE dalam satu prompt.
+    """
+    with span("local_explanation"):
+        out = [local_explanation(p) for p, _ in items]
+    for idx in _chunks(items):
+        chunk = [items[i] for i in idx]
+        try:
+            with span("llm"):
+                raw_text = client.complete(_build_messages(chunk), **_params(len(chunk)))
+            with span("llm_parse"):
+                results = _map_results(chunk, raw_text)
+        except Exception as e:
+            results = [_fallback(p, e) for p, _ in chunk]
+        for i, exp in zip(idx, results):
+            out[i] = exp
+    return out
+
+
+async def explain_anomalies_async(items: list) -> list:
+    """Versi async dari explain_anomalies — semua chunk dikirim paralel."""
+    with span("local_explanation"):
+        out = [local_explanation(p) for p, _ in items]
+
+    async def run(idx):
+        chunk = [items[i] for i in idx]
+        try:
+            with span("llm"):
+                raw_text = await client.acomplete(_build_messages(chunk), **_params(len(chunk)))
+            with span("llm_parse"):
+                results = _map_results(chunk, raw_text)
+        except Exception as e:
+            results = [_fallback(p, e) for p, _ in chunk]
+        for i, exp in zip(idx, results):
+            out[i] = exp
+
+    await asyncio.gather(*[run(idx) for idx in _chunks(items)])
+    return out
+
+
+def explain_anomaly(prediction: dict, raw_input: dict) -> dict:
+    """Versi sync satu anomali."""
+    return explain_anomalies([(prediction, raw_input)])[0]
+
+
+async def explain_anomaly_async(prediction: dict, raw_input: dict) -> dict:
+    """Versi async satu anomali — untuk endpoint FastAPI."""
+    return (await explain_anomalies_async([(prediction, raw_input)]))[0]
+
+
+class StreamingExplainer:
+    """
+    Untuk loop streaming (NFStream / EVE): anomali di-submit tanpa menunggu,
+    worker thread mengumpulkan sampai LLM_BATCH_SIZE atau LLM_BATCH_MAX_WAIT_S
+    lalu kirim satu prompt batch. Callback dipanggil dari thread worker.
+    """
+
+    def __init__(self, batch_size: int = LLM_BATCH_SIZE, max_wait: float = LLM_BATCH_MAX_WAIT_S):
+        self.batch_size = batch_size
+        self.max_wait   = max_wait
+        self._queue     = queue.Queue()
+        self.timings    = StageStats()   # waktu per batch LLM (TRACE_ENABLED=1)
+        threading.Thread(target=self._worker, name="llm-batcher", daemon=True).start()
+
+    def submit(self, prediction: dict, raw_input: dict, callback):
+        """callback(explanation: dict). Anomali LOW langsung dijawab lokal."""
+        if not needs_llm(prediction):
+            callback(local_explanation(prediction))
+            return
+        self._queue.put((prediction, raw_input, callback))
+
+    def _worker(self):
+        while True:
+            batch    = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
 
-        raw_text = response.choices[0].message.content.strip()
-
-        # Bersihkan backtick kalau ada
-        if raw_text.startswith("```"):
-            raw_text = raw_text.split("```")[1]
-            if raw_text.startswith("json"):
-                raw_text = raw_text[4:]
-
-        local_vars = {}
-        exec(raw_text, {}, local_vars)
-        result = local_vars.get("result", [])
-
-        if result:
-            r = result[0]
-            explanation = (
-                f"🚨 [{r.get('threat_level')}] "
-                f"{r.get('attack_type_id')} / {r.get('attack_type_en')}\n\n"
-                f"📌 MITRE: {r.get('mitre_technique')}\n\n"
-                f"📋 [ID] {r.get('summary_id')}\n"
-                f"📋 [EN] {r.get('summary_en')}\n\n"
-                f"💥 [ID] {r.get('impact_id')}\n"
-                f"💥 [EN] {r.get('impact_en')}\n\n"
-                f"🛡️ [ID] {r.get('recommendation_id')}\n"
-                f"🛡️ [EN] {r.get('recommendation_en')}\n\n"
-                f"🔍 Evidence: {r.get('data_evidence')}"
-            )
-            return explanation
-
-    except Exception as e:
-        return f"⚠️ LLM explanation unavailable: {str(e)}"
-
-    return "⚠️ Tidak dapat menghasilkan penjelasan."
\ No newline at end of file
+            trace        = start_trace() if TRACE_ENABLED else None
+            explanations = explain_anomalies([(p, raw) for p, raw, _ in batch])
+            with span("callbacks"):
+                for (_, _, callback), explanation in zip(batch, explanations):
+                    try:
+                        callback(explanation)
+                    except Exception as e:
+                        print(f"[ERROR] explanation callback: {e}")
+            if trace is not None:
+                self.timings.add(trace)
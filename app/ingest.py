@@ -0,0 +1,120 @@
+"""
+Antrian ingest terbatas antara ekstraksi fitur dan scoring, dengan
+backpressure dan load shedding untuk loop streaming (EVE / NFStream).
+
+Producer (tail EVE / NFStream) tidak pernah diblok: put() langsung
+menolak flow kalau antrian penuh, jadi capture tidak kehilangan paket
+karena menunggu model. Consumer mengambil flow per batch sehingga
+scoring makin efisien justru saat tertinggal.
+
+Saat lag (umur flow tertua di antrian) >= INGEST_LAG_SOFT_S, mode
+shedding aktif (mati lagi di bawah setengahnya):
+  - flow ke port benign (INGEST_BENIGN_PORTS) hanya di-sample
+  - caller diharapkan skip update dashboard untuk flow normal
+  - caller diharapkan skip LLM (pakai penjelasan lokal)
+Semua yang dibuang tercatat di counters.
+"""
+
+import queue
+import random
+import threading
+import time
+from config import (
+    INGEST_QUEUE_SIZE, INGEST_BATCH_SIZE, INGEST_LAG_SOFT_S,
+    INGEST_BENIGN_PORTS, INGEST_BENIGN_SAMPLE
+)
+
+
+class IngestQueue:
+
+    def __init__(self, maxsize: int = INGEST_QUEUE_SIZE, batch_size: int = INGEST_BATCH_SIZE,
+                 lag_soft: float = INGEST_LAG_SOFT_S, benign_ports=INGEST_BENIGN_PORTS,
+                 benign_sample: float = INGEST_BENIGN_SAMPLE):
+        self.batch_size    = batch_size
+        self.lag_soft      = lag_soft
+        self.benign_ports  = set(benign_ports)
+        self.benign_sample = benign_sample
+
+        self._q         = queue.Queue(maxsize)
+        self._lock      = threading.Lock()
+        self._shedding  = False
+        self._last_wait = 0.0
+
+        self.counters = {
+            "received"          : 0,
+            "enqueued"          : 0,
+            "scored"            : 0,
+            "failed"            : 0,   # flow di batch yang predict-nya error
+            "shed_benign_sample": 0,   # flow port benign yang tidak di-sample
+            "dropped_full"      : 0,   # antrian penuh
+            "skipped_dashboard" : 0,   # update dashboard flow normal
+            "skipped_llm"       : 0,   # anomali tanpa LLM
+            "shedding_episodes" : 0,
+        }
+
+    # ── Lag & mode shedding ─────────────────────────────
+    @property
+    def lag(self) -> float:
+        """Detik: umur flow tertua yang masih antri (0 kalau antrian kosong)."""
+        with self._q.mutex:
+            head = self._q.queue[0][0] if self._q.queue else None
+        return time.monotonic() - head if head is not None else 0.0
+
+    @property
+    def shedding(self) -> bool:
+        lag = self.lag
+        with self._lock:
+            if not self._shedding and lag >= self.lag_soft:
+                self._shedding = True
+                self.counters["shedding_episodes"] += 1
+            elif self._shedding and lag < self.lag_soft / 2:
+                self._shedding = False
+            return self._shedding
+
+    def record(self, key: str, n: int = 1):
+        with self._lock:
+            self.counters[key] += n
+
+    # ── Producer ────────────────────────────────────────
+    def put(self, item, dst_port=None) -> bool:
+        """Non-blocking. Return False kalau flow di-shed / dibuang."""
+        self.record("received")
+
+        if (dst_port in self.benign_ports and self.shedding
+                and random.random() >= self.benign_sample):
+            self.record("shed_benign_sample")
+            return False
+
+        try:
+            self._q.put_nowait((time.monotonic(), item))
+        except queue.Full:
+            self.record("dropped_full")
+            return False
+
+        self.record("enqueued")
+        return True
+
+    # ── Consumer ────────────────────────────────────────
+    def get_batch(self) -> list:
+        """Blok sampai ada minimal satu flow, ambil sampai batch_size."""
+        batch = [self._q.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._q.get_nowait())
+            except queue.Empty:
+                break
+        self._last_wait = time.monotonic() - batch[0][0]
+        return [item for _, item in batch]
+
+    def stats(self) -> dict:
+        shedding = self.shedding
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "queue_size" : self._q.qsize(),
+            "queue_max"  : self._q.maxsize,
+            "lag_s"      : round(self.lag, 3),
+            "last_wait_s": round(self._last_wait, 3),   # waktu antri batch terakhir
+            "shedding"   : shedding,
+        }
@@ -0,0 +1,265 @@
+"""
+Client LLM async dengan proteksi untuk kondisi flood:
+  - token bucket  → batasi request/detik ke provider
+  - semaphore     → batasi jumlah request in-flight
+  - timeout       → per percobaan
+  - retry         → exponential backoff + full jitter, tiap percobaan
+                    ambil token sendiri; 429 menunggu Retry-After
+  - circuit breaker → kalau provider terus gagal, langsung fallback
+                      tanpa menunggu (OPEN → HALF_OPEN → CLOSED)
+
+Semua request jalan di satu event loop background milik client, supaya
+limit berlaku global baik dari endpoint async FastAPI maupun dari thread
+sync (capture loop NFStream, eve_to_ml).
+"""
+
+import asyncio
+import random
+import threading
+import time
+from groq import AsyncGroq
+import groq
+
+
+class LLMUnavailable(Exception):
+    """LLM tidak bisa dipakai saat ini → caller harus pakai fallback."""
+
+
+class CircuitOpenError(LLMUnavailable):
+    pass
+
+
+class RateLimitedError(LLMUnavailable):
+    pass
+
+
+# Error provider yang layak di-retry
+RETRYABLE = (
+    asyncio.TimeoutError,
+    groq.APITimeoutError,
+    groq.APIConnectionError,
+    groq.RateLimitError,
+    groq.InternalServerError,
+)
+
+
+def _retry_after(error: Exception) -> float:
+    """Detik dari header Retry-After response error (429 / 503); 0 kalau tidak ada."""
+    try:
+        return max(0.0, float(error.response.headers["retry-after"]))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return 0.0
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate     = rate
+        self.capacity = capacity
+        self.tokens   = float(capacity)
+        self.updated  = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, max_wait: float):
+        """Ambil 1 token; raise RateLimitedError kalau harus menunggu > max_wait."""
+        self._refill()
+        wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+        if wait > max_wait:
+            raise RateLimitedError(f"rate limit: would wait {wait:.1f}s")
+        # Reservasi token sekarang (boleh negatif), lalu tunggu giliran
+        self.tokens -= 1
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+
+    CLOSED, OPEN, HALF_OPEN = "CLOSED", "OPEN", "HALF_OPEN"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout     = reset_timeout
+        self.state             = self.CLOSED
+        self.failures          = 0
+        self.opened_at         = 0.0
+        self._probe_in_flight  = False
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            # Hanya satu request percobaan saat HALF_OPEN
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def release(self):
+        """Request batal sebelum sampai ke provider (bukan sukses/gagal)."""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        self.state            = self.CLOSED
+        self.failures         = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state     = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class LLMClient:
+
+    def __init__(self, api_key: str, model: str, base_url: str = None,
+                 rate_per_sec: float = 0.5, burst: int = 5, max_in_flight: int = 4,
+                 timeout: float = 20.0, max_retries: int = 2, max_queue_wait: float = 5.0,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 breaker_failures: int = 5, breaker_reset: float = 60.0):
+        self.model          = model
+        self.timeout        = timeout
+        self.max_retries    = max_retries
+        self.max_queue_wait = max_queue_wait
+        self.backoff_base   = backoff_base
+        self.backoff_max    = backoff_max
+        self.max_in_flight  = max_in_flight
+
+        self._client_kwargs = {"api_key": api_key, "base_url": base_url}
+        self._bucket  = TokenBucket(rate_per_sec, burst)
+        self._breaker = CircuitBreaker(breaker_failures, breaker_reset)
+
+        # Dibuat lazily di loop background
+        self._loop       = None
+        self._init_error = None   # AsyncGroq gagal dibuat → semua call langsung fallback
+        self._client     = None
+        self._semaphore  = None
+        self._start_lock = threading.Lock()
+
+        self.counters = {
+            "calls"       : 0,
+            "success"     : 0,
+            "retries"     : 0,
+            "failures"    : 0,
+            "rate_limited": 0,
+            "circuit_open": 0,
+        }
+
+    # ── Event loop background ───────────────────────────
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._init_error is not None:
+                raise self._init_error
+            if self._loop is None:
+                loop   = asyncio.new_event_loop()
+                ready  = threading.Event()
+                errors = []
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    try:
+                        self._client = AsyncGroq(
+                            **self._client_kwargs, max_retries=0, timeout=self.timeout
+                        )
+                        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+                    except Exception as e:
+                        errors.append(e)
+                        return
+                    finally:
+                        ready.set()
+                    loop.run_forever()
+
+                threading.Thread(target=run, name="llm-client", daemon=True).start()
+                ready.wait()
+                if errors:
+                    loop.close()
+                    # Error konfigurasi (mis. API key kosong) tidak akan sembuh sendiri:
+                    # simpan supaya call berikutnya tidak membuat thread + loop baru
+                    self._init_error = LLMUnavailable(f"LLM client init failed: {errors[0]}")
+                    raise self._init_error
+                self._loop = loop
+        return self._loop
+
+    # ── Request ─────────────────────────────────────────
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _complete(self, messages: list, **kwargs) -> str:
+        self.counters["calls"] += 1
+
+        if not self._breaker.allow():
+            self.counters["circuit_open"] += 1
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+        try:
+            await self._bucket.acquire(self.max_queue_wait)
+        except RateLimitedError:
+            self.counters["rate_limited"] += 1
+            # Bukan kegagalan provider, jangan hitung ke breaker
+            self._breaker.release()
+            raise
+
+        last_error = None
+        delay      = 0.0
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                if attempt > 0:
+                    self.counters["retries"] += 1
+                    await asyncio.sleep(delay)
+                    # Retry juga request ke provider → tetap lewat token bucket
+                    try:
+                        await self._bucket.acquire(self.max_queue_wait)
+                    except RateLimitedError:
+                        self.counters["rate_limited"] += 1
+                        break
+                try:
+                    response = await asyncio.wait_for(
+                        self._client.chat.completions.create(
+                            model=self.model, messages=messages, **kwargs
+                        ),
+                        timeout=self.timeout,
+                    )
+                    self._breaker.record_success()
+                    self.counters["success"] += 1
+                    return response.choices[0].message.content
+                except RETRYABLE as e:
+                    last_error = e
+                    retry_after = _retry_after(e)
+                    if retry_after > self.backoff_max:
+                        break   # provider minta tunggu terlalu lama → fallback sekarang
+                    delay = max(retry_after, self._backoff(attempt))
+                except Exception as e:
+                    last_error = e
+                    break
+
+        self.counters["failures"] += 1
+        self._breaker.record_failure()
+        raise LLMUnavailable(f"{type(last_error).__name__}: {last_error}")
+
+    def complete(self, messages: list, **kwargs) -> str:
+        """Versi sync (untuk thread capture / script). Raise LLMUnavailable."""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(
+            self._complete(messages, **kwargs), loop
+        ).result()
+
+    async def acomplete(self, messages: list, **kwargs) -> str:
+        """Versi async (untuk endpoint FastAPI). Raise LLMUnavailable."""
+        loop = self._ensure_loop()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(
+            self._complete(messages, **kwargs), loop
+        ))
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "circuit_state": self._breaker.state,
+            "tokens"       : round(self._bucket.tokens, 2),
+        }
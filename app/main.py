@@ -1,13 +1,24 @@
-from fastapi import FastAPI, HTTPException
-from app.schemas import NetworkFlow, PredictionResult
+import os
+import asyncio
+import numpy as np
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse
+from pydantic import ValidationError
+from app.schemas import NetworkFlow, PredictionResult, flow_matrix, parse_flow_batch, FlowBatchError
 from app.predictor import predictor
-from app.gemini import explain_anomaly
+from app.gemini import explain_anomaly_async, explain_anomalies_async, render_explanation, client as llm_client
+from app.codec import decode, DecodeError, DECODERS, CT_RAW
+from app.allowlist import allowlist
+from app.tracing import TraceMiddleware, span
+from app.profiler import sample_stacks, to_collapsed, admin_token_ok, ProfilerBusy
+from config import PROFILE_MAX_S
 
 app = FastAPI(
     title="SOC ML Pipeline",
     description="Sistem deteksi anomali jaringan menggunakan ensemble ML + Gemini AI",
     version="1.0.0"
 )
+app.add_middleware(TraceMiddleware)
 
 
 @app.get("/")
@@ -15,14 +26,37 @@ def root():
     return {
         "status" : "online",
         "service": "SOC ML Pipeline",
-        "models" : ["XGBoost", "1D CNN", "ResNet Tabular"],
+        "mode"   : predictor.mode,
+        "models" : ["XGBoost", "1D CNN", "ResNet Tabular"] if predictor.mode == "full" else ["Student (distilled)"],
         "llm"    : "Gemini 1.5 Flash"
     }
 
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return {"status": "ok", "pid": os.getpid()}
+
+
+@app.get("/metrics/drift")
+def drift(top: int = 10):
+    """
+    Drift fitur live vs distribusi training (scaler.pkl), urut PSI tertinggi.
+    z_shift = pergeseran mean dalam satuan std training,
+    std_ratio = std live / std training.
+    """
+    return predictor.drift.report(top=top)
+
+
+@app.get("/metrics/llm")
+def llm_metrics():
+    """Counter client LLM: sukses, retry, rate-limited, status circuit breaker."""
+    return llm_client.stats()
+
+
+@app.get("/metrics/allowlist")
+def allowlist_metrics():
+    """Counter pre-filter allowlist: flow yang di-bypass / di-sample, jumlah aturan, reload."""
+    return allowlist.stats()
 
 
 @app.post("/predict", response_model=PredictionResult)
@@ -31,16 +65,27 @@ async def predict(flow: NetworkFlow):
     Terima satu network flow, prediksi dengan ensemble,
     kalau anomali → kirim ke Gemini untuk penjelasan
     """
+    # Flow known-benign (butuh src_ip/dst_ip) tidak perlu di-score
+    with span("allowlist"):
+        skip = allowlist.skip(flow.src_ip, flow.dst_ip, flow.Destination_Port)
+    if skip:
+        return predictor.allowlisted_result()
+
+    # Convert pydantic model → dict → matrix (cek NaN/inf sama dengan /predict/batch)
+    raw = flow.model_dump()
     try:
-        # Convert pydantic model → dict
-        raw = flow.model_dump()
+        X = flow_matrix([raw])
+    except FlowBatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
+    try:
         # Prediksi dengan ensemble
-        result = predictor.predict(raw)
+        result = predictor.to_results(predictor.predict_matrix(X))[0]
 
         # Kalau anomali → minta penjelasan Gemini
         if result["is_anomaly"]:
-            result["gemini_explanation"] = explain_anomaly(result, raw)
+            result["explanation"]        = await explain_anomaly_async(result, raw)
+            result["gemini_explanation"] = render_explanation(result["explanation"])
 
         return result
 
@@ -48,36 +93,134 @@ async def predict(flow: NetworkFlow):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/predict/batch")
-async def predict_batch(flows: list[NetworkFlow]):
+@app.post("/predict/batch", openapi_extra={
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {
+            "type": "array", "items": NetworkFlow.model_json_schema(),
+        }}},
+    },
+})
+async def predict_batch(request: Request):
     """
     Terima banyak network flow sekaligus (dari Suricata stream)
+    Payload divalidasi sekali jalan langsung ke matrix fitur,
+    lalu diprediksi dalam satu panggilan ensemble.
     Hanya anomali yang dikirim ke Gemini
     """
     try:
-        results = []
-        for flow in flows:
-            raw    = flow.model_dump()
-            result = predictor.predict(raw)
-
-            if result["is_anomaly"]:
-                result["gemini_explanation"] = explain_anomaly(result, raw)
+        body = await request.body()
+        with span("validate"):
+            X, raws = parse_flow_batch(body)
+    except ValidationError as e:
+        # include_input=False: error parse JSON membawa body mentah (bytes) yang tidak bisa di-encode
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_input=False))
+    except FlowBatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-            results.append(result)
+    try:
+        # Pre-filter allowlist: hanya flow yang tidak di-bypass yang masuk model
+        with span("allowlist"):
+            keep = np.array([
+                not allowlist.skip(raw.get("src_ip"), raw.get("dst_ip"), raw["Destination_Port"])
+                for raw in raws
+            ], dtype=bool)
+
+        results = [predictor.allowlisted_result() for _ in raws]
+        if keep.any():
+            scores = predictor.predict_matrix(X if keep.all() else X[keep])
+            with span("to_results"):
+                scored = predictor.to_results(scores)
+            for i, result in zip(np.flatnonzero(keep), scored):
+                results[i] = result
+
+        # Penjelasan LLM: beberapa anomali per prompt, chunk dikirim paralel
+        anomalies    = [(r, raw) for r, raw in zip(results, raws) if r["is_anomaly"]]
+        explanations = await explain_anomalies_async(anomalies)
+        for (result, _), explanation in zip(anomalies, explanations):
+            result["explanation"]        = explanation
+            result["gemini_explanation"] = render_explanation(explanation)
 
         # Ringkasan batch
         total    = len(results)
         anomali  = sum(1 for r in results if r["is_anomaly"])
-        normal   = total - anomali
+        skipped  = total - int(keep.sum())
+        normal   = total - anomali - skipped
 
         return {
             "summary": {
-                "total"  : total,
-                "normal" : normal,
-                "anomali": anomali,
+                "total"      : total,
+                "normal"     : normal,
+                "anomali"    : anomali,
+                "allowlisted": skipped,
             },
             "results": results
         }
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/predict/matrix")
+async def predict_matrix(request: Request):
+    """
+    Ingest biner untuk sensor high-rate: body berisi matrix float32 (N, 36)
+    urutan FEATURE_COLS (raw LE / .npy / Arrow IPC, lihat app/codec.py).
+    Tidak ada penjelasan LLM di sini, hanya skor. Tanpa IP per baris jadi
+    allowlist tidak berlaku di sini — filter di sisi sensor (sensor_agent.py).
+
+    Kalau header Accept = application/octet-stream, response berupa
+    raw float32 LE ensemble_score (N,) — tanpa JSON sama sekali.
+    """
+    content_type = request.headers.get("content-type", CT_RAW)
+    if content_type.split(";")[0].strip().lower() not in DECODERS:
+        raise HTTPException(status_code=415, detail=f"unsupported content type: {content_type}")
+
+    try:
+        body = await request.body()
+        with span("decode"):
+            X = decode(content_type, body)
+    except DecodeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if X.shape[0] == 0:
+        scores = {"ensemble_score": np.zeros(0, dtype=np.float32),
+                  "is_anomaly"    : np.zeros(0, dtype=bool)}
+    else:
+        try:
+            scores = predictor.predict_matrix(X)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    ensemble = np.asarray(scores["ensemble_score"], dtype="<f4")
+
+    if request.headers.get("accept", "").startswith(CT_RAW):
+        return Response(content=ensemble.tobytes(), media_type=CT_RAW)
+
+    anomaly_index = np.flatnonzero(scores["is_anomaly"])
+    return {
+        "total"         : int(X.shape[0]),
+        "anomali"       : int(anomaly_index.size),
+        # float64 dulu: float32 0.1 di-serialize jadi 0.10000000149011612
+        "ensemble_score": np.round(ensemble.astype(np.float64), 4).tolist(),
+        "anomaly_index" : anomaly_index.tolist(),
+    }
+
+
+@app.get("/admin/profile", response_class=PlainTextResponse)
+async def profile(seconds: float = 10.0, lines: bool = False, x_admin_token: str = Header(None)):
+    """
+    Sampling profiler semua thread selama `seconds` detik (request lain
+    tetap dilayani). Output collapsed stack untuk flamegraph.pl / speedscope.
+    Frame dilabeli module:fungsi; lines=true menambahkan nomor baris.
+    Butuh ADMIN_TOKEN di server dan header X-Admin-Token yang sama.
+    """
+    if not admin_token_ok(x_admin_token):
+        raise HTTPException(status_code=403, detail="admin endpoints disabled or bad token")
+    if not 0 < seconds <= PROFILE_MAX_S:
+        raise HTTPException(status_code=422, detail=f"seconds must be in (0, {PROFILE_MAX_S}]")
+    try:
+        counts = await asyncio.to_thread(sample_stacks, seconds, lines=lines)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return to_collapsed(counts)
@@ -0,0 +1,85 @@
+"""
+Inference bersama untuk server multi-worker (serve.py).
+
+Model di-load dan di-warm-up sekali di proses master; worker uvicorn
+memakai RemotePredictor (PREDICTOR_MODE=remote) yang meneruskan
+predict_matrix ke master lewat Unix socket lokal. Worker tidak mengimport
+TensorFlow / XGBoost sama sekali, jadi RSS dan waktu startup per worker
+kecil, dan drift monitor terkumpul di satu tempat.
+
+Dipilih dibanding fork copy-on-write karena runtime TensorFlow dan OpenMP
+(XGBoost) tidak fork-safe setelah thread pool-nya dibuat.
+
+Trade-off: semua inference dari semua worker lewat satu lock di master,
+jadi throughput model = throughput satu proses, berapa pun jumlah worker.
+Worker hanya menambah paralelisme untuk parsing, allowlist, dan LLM.
+TensorFlow / XGBoost sudah memakai semua core per panggilan, jadi
+panggilan bersamaan hanya berebut core; throughput didapat dari batch
+yang lebih besar (/predict/batch, /predict/matrix), bukan worker.
+"""
+
+import threading
+from multiprocessing.connection import Listener, Client
+
+
+def serve_predictor(predictor, address: str, authkey: bytes) -> Listener:
+    """Jalankan server inference di background thread (satu thread per worker)."""
+    listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    lock     = threading.Lock()   # satu inference sekaligus untuk semua worker (lihat docstring modul)
+
+    methods = {
+        "mode"          : lambda: predictor.mode,
+        "predict_matrix": predictor.predict_matrix,
+        "drift_report"  : lambda top: predictor.drift.report(top=top),
+    }
+
+    def handle(conn):
+        with conn:
+            while True:
+                try:
+                    method, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    with lock:
+                        reply = ("ok", methods[method](*args))
+                except Exception as e:
+                    reply = ("error", f"{type(e).__name__}: {e}")
+                conn.send(reply)
+
+    def accept_loop():
+        while True:
+            try:
+                conn = listener.accept()
+            except OSError:
+                return   # listener ditutup
+            except Exception as e:
+                print(f"[WARN] model server rejected connection: {e}")
+                continue
+            threading.Thread(target=handle, args=(conn,), name="model-conn", daemon=True).start()
+
+    threading.Thread(target=accept_loop, name="model-server", daemon=True).start()
+    return listener
+
+
+class RemoteCall:
+    """Koneksi per thread ke master (FastAPI bisa memanggil dari beberapa thread)."""
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = address
+        self.authkey = authkey
+        self._local  = threading.local()
+
+    def __call__(self, method: str, *args):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+        try:
+            conn.send((method, args))
+            status, value = conn.recv()
+        except (EOFError, OSError) as e:
+            self._local.conn = None
+            raise RuntimeError(f"model server unavailable: {e}")
+        if status == "error":
+            raise RuntimeError(value)
+        return value
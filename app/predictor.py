@@ -1,94 +1,157 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import joblib
-from tensorflow import keras
 from config import (
-    XGBOOST_PATH, CNN_PATH, RESNET_PATH, SCALER_PATH,
+    XGBOOST_PATH, CNN_PATH, RESNET_PATH, SCALER_PATH, STUDENT_PATH,
     WEIGHT_XGBOOST, WEIGHT_CNN, WEIGHT_RESNET,
-    ANOMALY_THRESHOLD, FEATURE_COLS
+    ENSEMBLE_PARALLEL, ENSEMBLE_XGB_THREADS, TF_INTRA_OP_THREADS, TF_INTER_OP_THREADS,
+    ANOMALY_THRESHOLD, FEATURE_COLS, DRIFT_REFERENCE_PATH,
+    ATTRIBUTION_TOP_N, PREDICTOR_MODE, PREDICTOR_SOCKET, PREDICTOR_AUTHKEY
 )
+from app.drift import DriftMonitor
+from app.scaling import FusedScaler
+from app.attribution import tree_shap, top_contributions
+from app.tracing import span
+from app.schemas import confidence_level
+
+
+# Mapping: nama field API → nama kolom training
+FIELD_MAP = {
+    'Fwd_Header_Length'           : 'Fwd Header Length',
+    'Destination_Port'            : 'Destination Port',
+    'Flow_Duration'               : 'Flow Duration',
+    'Total_Length_of_Fwd_Packets' : 'Total Length of Fwd Packets',
+    'Total_Length_of_Bwd_Packets' : 'Total Length of Bwd Packets',
+    'Fwd_Packet_Length_Std'       : 'Fwd Packet Length Std',
+    'Bwd_Packet_Length_Std'       : 'Bwd Packet Length Std',
+    'Flow_Bytes_s'                : 'Flow Bytes/s',
+    'Flow_Packets_s'              : 'Flow Packets/s',
+    'Total_Fwd_Packets'           : 'Total Fwd Packets',
+    'Total_Backward_Packets'      : 'Total Backward Packets',
+    'Init_Win_bytes_forward'      : 'Init_Win_bytes_forward',
+    'Init_Win_bytes_backward'     : 'Init_Win_bytes_backward',
+    'Avg_Fwd_Segment_Size'        : 'Avg Fwd Segment Size',
+    'Avg_Bwd_Segment_Size'        : 'Avg Bwd Segment Size',
+    'Average_Packet_Size'         : 'Average Packet Size',
+    'Packet_Length_Mean'          : 'Packet Length Mean',
+    'Fwd_IAT_Std'                 : 'Fwd IAT Std',
+    'Bwd_IAT_Std'                 : 'Bwd IAT Std',
+    'Flow_IAT_Mean'               : 'Flow IAT Mean',
+    'Flow_IAT_Std'                : 'Flow IAT Std',
+    'Flow_IAT_Max'                : 'Flow IAT Max',
+    'Fwd_IAT_Mean'                : 'Fwd IAT Mean',
+    'Bwd_IAT_Mean'                : 'Bwd IAT Mean',
+    'ACK_Flag_Count'              : 'ACK Flag Count',
+    'SYN_Flag_Count'              : 'SYN Flag Count',
+    'FIN_Flag_Count'              : 'FIN Flag Count',
+    'PSH_Flag_Count'              : 'PSH Flag Count',
+    'URG_Flag_Count'              : 'URG Flag Count',
+    'Subflow_Fwd_Packets'         : 'Subflow Fwd Packets',
+    'Subflow_Bwd_Packets'         : 'Subflow Bwd Packets',
+    'Subflow_Fwd_Bytes'           : 'Subflow Fwd Bytes',
+    'Subflow_Bwd_Bytes'           : 'Subflow Bwd Bytes',
+    'Fwd_Packets_s'               : 'Fwd Packets/s',
+    'Bwd_Packets_s'               : 'Bwd Packets/s',
+    'Down_Up_Ratio'               : 'Down/Up Ratio',
+}
+
+# Nama field API sesuai urutan FEATURE_COLS
+_COL_TO_FIELD = {col: field for field, col in FIELD_MAP.items()}
+FIELD_ORDER   = [_COL_TO_FIELD[col] for col in FEATURE_COLS]
 
 
 class EnsemblePredictor:
 
+    mode      = "full"
+    attribute = True   # TreeSHAP untuk anomali; dimatikan distill.py saat ukur latency model
+
     def __init__(self):
+        # Import di sini supaya mode "fast" tidak perlu TensorFlow sama sekali
+        import tensorflow as tf
+        from tensorflow import keras
+
         print("⏳ Loading models...")
-        self.scaler  = joblib.load(SCALER_PATH)
+        self.parallel = ENSEMBLE_PARALLEL
+        self._configure_threads(tf)
+        self._init_scaler()
         self.xgboost = joblib.load(XGBOOST_PATH)
         self.cnn     = keras.models.load_model(CNN_PATH)
         self.resnet  = keras.models.load_model(RESNET_PATH)
-        print("✅ Semua model berhasil diload!")
+        if self.threads["xgboost"]:
+            self.xgboost.set_params(n_jobs=self.threads["xgboost"])
+        # Pool persisten, satu thread per member (bukan dibuat per batch)
+        self._pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="ensemble")
+        self._init_drift()
+        print(f"✅ Semua model berhasil diload! (parallel={self.parallel}, threads={self.threads})")
 
-    def _preprocess(self, raw: dict) -> np.ndarray:
-        # Mapping: nama field API → nama kolom training
-        field_map = {
-            'Fwd_Header_Length'           : 'Fwd Header Length',
-            'Destination_Port'            : 'Destination Port',
-            'Flow_Duration'               : 'Flow Duration',
-            'Total_Length_of_Fwd_Packets' : 'Total Length of Fwd Packets',
-            'Total_Length_of_Bwd_Packets' : 'Total Length of Bwd Packets',
-            'Fwd_Packet_Length_Std'       : 'Fwd Packet Length Std',
-            'Bwd_Packet_Length_Std'       : 'Bwd Packet Length Std',
-            'Flow_Bytes_s'                : 'Flow Bytes/s',
-            'Flow_Packets_s'              : 'Flow Packets/s',
-            'Total_Fwd_Packets'           : 'Total Fwd Packets',
-            'Total_Backward_Packets'      : 'Total Backward Packets',
-            'Init_Win_bytes_forward'      : 'Init_Win_bytes_forward',
-            'Init_Win_bytes_backward'     : 'Init_Win_bytes_backward',
-            'Avg_Fwd_Segment_Size'        : 'Avg Fwd Segment Size',
-            'Avg_Bwd_Segment_Size'        : 'Avg Bwd Segment Size',
-            'Average_Packet_Size'         : 'Average Packet Size',
-            'Packet_Length_Mean'          : 'Packet Length Mean',
-            'Fwd_IAT_Std'                 : 'Fwd IAT Std',
-            'Bwd_IAT_Std'                 : 'Bwd IAT Std',
-            'Flow_IAT_Mean'               : 'Flow IAT Mean',
-            'Flow_IAT_Std'                : 'Flow IAT Std',
-            'Flow_IAT_Max'                : 'Flow IAT Max',
-            'Fwd_IAT_Mean'                : 'Fwd IAT Mean',
-            'Bwd_IAT_Mean'                : 'Bwd IAT Mean',
-            'ACK_Flag_Count'              : 'ACK Flag Count',
-            'SYN_Flag_Count'              : 'SYN Flag Count',
-            'FIN_Flag_Count'              : 'FIN Flag Count',
-            'PSH_Flag_Count'              : 'PSH Flag Count',
-            'URG_Flag_Count'              : 'URG Flag Count',
-            'Subflow_Fwd_Packets'         : 'Subflow Fwd Packets',
-            'Subflow_Bwd_Packets'         : 'Subflow Bwd Packets',
-            'Subflow_Fwd_Bytes'           : 'Subflow Fwd Bytes',
-            'Subflow_Bwd_Bytes'           : 'Subflow Bwd Bytes',
-            'Fwd_Packets_s'               : 'Fwd Packets/s',
-            'Bwd_Packets_s'               : 'Bwd Packets/s',
-            'Down_Up_Ratio'               : 'Down/Up Ratio',
-        }
+    def _configure_threads(self, tf):
+        """
+        Budget thread per model. XGBoost dapat pool OpenMP sendiri; TensorFlow
+        hanya punya satu pool intra-op per proses (dipakai bersama CNN + ResNet)
+        dan harus diset sebelum op pertama dijalankan.
+        Mode paralel: core dibagi supaya ketiga model tidak saling rebut CPU.
+        Mode sekuensial: default library (tiap model pakai semua core bergantian).
+        """
+        cpus = os.cpu_count() or 1
+        if self.parallel:
+            xgb   = ENSEMBLE_XGB_THREADS or max(1, cpus // 4)
+            intra = TF_INTRA_OP_THREADS  or max(1, cpus - xgb)
+            inter = TF_INTER_OP_THREADS  or 2   # op CNN dan ResNet bisa jalan bersamaan
+        else:
+            xgb, intra, inter = ENSEMBLE_XGB_THREADS, TF_INTRA_OP_THREADS, TF_INTER_OP_THREADS
+        self.threads = {"xgboost": xgb, "tf_intra_op": intra, "tf_inter_op": inter}   # 0 = default
 
-        # Susun nilai sesuai urutan FEATURE_COLS
-        ordered = []
-        for col in FEATURE_COLS:
-            for field, mapped in field_map.items():
-                if mapped == col:
-                    ordered.append(raw.get(field, 0.0))
-                    break
+        try:
+            if intra:
+                tf.config.threading.set_intra_op_parallelism_threads(intra)
+            if inter:
+                tf.config.threading.set_inter_op_parallelism_threads(inter)
+        except RuntimeError as e:
+            # TF sudah terinisialisasi sebelum predictor dibuat
+            print(f"[WARN] TensorFlow thread settings not applied: {e}")
 
-        arr = np.array(ordered).reshape(1, -1)
-        arr = self.scaler.transform(arr)
-        # Tidak di-clip supaya nilai out-of-range bisa terdeteksi sebagai anomali
-        return arr
+    def _init_scaler(self):
+        self.scaler = joblib.load(SCALER_PATH)
+        self.fused  = FusedScaler(self.scaler)
+
+    def _init_drift(self):
+        self.drift = DriftMonitor(
+            FEATURE_COLS, self.scaler.mean_, self.scaler.scale_,
+            reference_path=DRIFT_REFERENCE_PATH,
+        )
 
-    def _get_confidence(self, score: float) -> str:
-        if score >= 0.85:
-            return "HIGH"
-        elif score >= 0.65:
-            return "MEDIUM"
-        return "LOW"
+    def _to_matrix(self, raws: list[dict]) -> np.ndarray:
+        # Susun nilai sesuai urutan FEATURE_COLS, satu baris per flow
+        return np.array([
+            [raw.get(field, 0.0) for field in FIELD_ORDER] for raw in raws
+        ], dtype=np.float32)
 
-    def predict(self, raw: dict) -> dict:
-        arr = self._preprocess(raw)
+    def _preprocess(self, raw: dict) -> np.ndarray:
+        return self._preprocess_matrix(self._to_matrix([raw]))
 
-        xgb_score = float(self.xgboost.predict_proba(arr)[0][1])
+    def _preprocess_matrix(self, X: np.ndarray) -> np.ndarray:
+        """
+        X: matrix (N, 36) mentah, kolom sesuai urutan FEATURE_COLS.
+        Return batch float32 C-contiguous yang sudah di-scale.
+        """
+        arr = self.fused.transform(X)
+        # Tidak di-clip supaya nilai out-of-range bisa terdeteksi sebagai anomali
+        return arr
 
-        cnn_score = float(self.cnn.predict(
-            arr.reshape(1, 3, 3, 4, 1), verbose=0
-        )[0][0])
+    def predict_matrix(self, X: np.ndarray) -> dict:
+        """
+        Prediksi batch dari matrix fitur mentah (N, 36) urutan FEATURE_COLS.
+        Return dict berisi array skor per model + ensemble (panjang N).
+        """
+        with span("preprocess"):
+            arr = self._preprocess_matrix(X)
+        with span("drift"):
+            self.drift.update(arr)
 
-        resnet_score = float(self.resnet.predict(arr, verbose=0)[0][0])
+        with span("members"):
+            xgb_score, cnn_score, resnet_score = self._score_members(arr)
 
         ensemble_score = (
             WEIGHT_XGBOOST * xgb_score +
@@ -98,17 +161,172 @@ class EnsemblePredictor:
 
         is_anomaly = ensemble_score >= ANOMALY_THRESHOLD
 
+        return {
+            "ensemble_score": ensemble_score,
+            "xgboost_score" : xgb_score,
+            "cnn_score"     : cnn_score,
+            "resnet_score"  : resnet_score,
+            "is_anomaly"    : is_anomaly,
+            "top_features"  : self._attribute(X, arr, is_anomaly),
+        }
+
+    def _score_members(self, arr: np.ndarray) -> list[np.ndarray]:
+        """Skor XGBoost, CNN, ResNet — bersamaan di thread pool kalau self.parallel."""
+        n = arr.shape[0]
+        jobs = (
+            ("xgboost", lambda: self.xgboost.predict_proba(arr)[:, 1]),
+            # arr C-contiguous → reshape berupa view, tanpa salin
+            ("cnn",     lambda: self.cnn.predict(arr.reshape(n, 3, 3, 4, 1), verbose=0)[:, 0]),
+            ("resnet",  lambda: self.resnet.predict(arr, verbose=0)[:, 0]),
+        )
+        if not self.parallel:
+            return [_timed(name, fn) for name, fn in jobs]
+
+        # copy_context: span di thread pool tetap tercatat ke trace pemanggil
+        futures = [
+            self._pool.submit(contextvars.copy_context().run, _timed, name, fn)
+            for name, fn in jobs
+        ]
+        return [f.result() for f in futures]
+
+    def _attribute(self, X: np.ndarray, arr: np.ndarray, is_anomaly: np.ndarray) -> dict:
+        """TreeSHAP XGBoost untuk baris anomali saja → {index: top fitur}."""
+        idx = np.flatnonzero(is_anomaly)
+        if not self.attribute or idx.size == 0:
+            return {}
+        with span("attribution"):
+            contribs = tree_shap(self.xgboost.get_booster(), arr[idx])
+            top      = top_contributions(contribs, X[idx], ATTRIBUTION_TOP_N)
+        return dict(zip(idx.tolist(), top))
+
+    def to_results(self, scores: dict) -> list[dict]:
+        """Ubah output predict_matrix → list dict PredictionResult per flow."""
+        return [self._to_result(scores, i) for i in range(len(scores["ensemble_score"]))]
+
+    def _to_result(self, scores: dict, i: int) -> dict:
+        ensemble_score = float(scores["ensemble_score"][i])
+        is_anomaly     = bool(scores["is_anomaly"][i])
+
+        def member(name):
+            # Mode fast tidak punya skor per model
+            s = scores[name]
+            return None if s is None else round(float(s[i]), 4)
+
         return {
             "status"            : "ANOMALI" if is_anomaly else "NORMAL",
             "ensemble_score"    : round(ensemble_score, 4),
-            "xgboost_score"     : round(xgb_score, 4),
-            "cnn_score"         : round(cnn_score, 4),
-            "resnet_score"      : round(resnet_score, 4),
+            "xgboost_score"     : member("xgboost_score"),
+            "cnn_score"         : member("cnn_score"),
+            "resnet_score"      : member("resnet_score"),
             "is_anomaly"        : is_anomaly,
-            "confidence"        : self._get_confidence(ensemble_score),
-            "gemini_explanation": None
+            "confidence"        : confidence_level(ensemble_score),
+            "top_features"      : scores["top_features"].get(i),
+            "explanation"       : None,
+            "gemini_explanation": None   # deprecated, lihat PredictionResult
         }
 
+    def allowlisted_result(self) -> dict:
+        """Result untuk flow yang di-bypass pre-filter allowlist (tidak di-score)."""
+        return {
+            "status"            : "ALLOWLISTED",
+            "ensemble_score"    : None,
+            "xgboost_score"     : None,
+            "cnn_score"         : None,
+            "resnet_score"      : None,
+            "is_anomaly"        : False,
+            "confidence"        : None,
+            "top_features"      : None,
+            "explanation"       : None,
+            "gemini_explanation": None   # deprecated, lihat PredictionResult
+        }
+
+    def predict_many(self, raws: list[dict]) -> list[dict]:
+        """Prediksi banyak flow dalam satu panggilan model (bukan per flow)."""
+        if not raws:
+            return []
+        with span("to_matrix"):
+            X = self._to_matrix(raws)
+        return self.to_results(self.predict_matrix(X))
+
+    def predict(self, raw: dict) -> dict:
+        return self.predict_many([raw])[0]
+
+
+def _timed(name: str, fn):
+    with span(name):
+        return fn()
+
+
+class FastPredictor(EnsemblePredictor):
+    """
+    Mode "fast" untuk sensor edge: satu model student (XGBoost kecil hasil
+    distill.py) yang meniru ensemble_score. Tanpa TensorFlow.
+    Skor per model (xgboost/cnn/resnet) bernilai None.
+    """
+
+    mode = "fast"
+
+    def __init__(self, student_path: str = STUDENT_PATH):
+        import xgboost as xgb
+
+        print("⏳ Loading student model (fast mode)...")
+        self._init_scaler()
+        self.xgboost = xgb.XGBRegressor()
+        self.xgboost.load_model(student_path)
+        self._init_drift()
+        print("✅ Student model berhasil diload!")
+
+    def predict_matrix(self, X: np.ndarray) -> dict:
+        with span("preprocess"):
+            arr = self._preprocess_matrix(X)
+        with span("drift"):
+            self.drift.update(arr)
+
+        with span("student"):
+            ensemble_score = np.clip(self.xgboost.predict(arr), 0.0, 1.0)
+        is_anomaly     = ensemble_score >= ANOMALY_THRESHOLD
+
+        return {
+            "ensemble_score": ensemble_score,
+            "xgboost_score" : None,
+            "cnn_score"     : None,
+            "resnet_score"  : None,
+            "is_anomaly"    : is_anomaly,
+            "top_features"  : self._attribute(X, arr, is_anomaly),
+        }
+
+
+class RemotePredictor(EnsemblePredictor):
+    """
+    Mode "remote" untuk worker serve.py: model ada di proses master,
+    predict_matrix dan laporan drift diteruskan lewat Unix socket.
+    Worker tidak load model, scaler, maupun TensorFlow.
+    """
+
+    def __init__(self, address: str = PREDICTOR_SOCKET, authkey: str = PREDICTOR_AUTHKEY):
+        from app.model_server import RemoteCall
+
+        self._call = RemoteCall(address, bytes.fromhex(authkey))
+        self.mode  = self._call("mode")
+        self.drift = _RemoteDrift(self._call)
+
+    def predict_matrix(self, X: np.ndarray) -> dict:
+        with span("remote_predict"):
+            return self._call("predict_matrix", X)
+
+
+class _RemoteDrift:
+    def __init__(self, call):
+        self._call = call
+
+    def report(self, top: int = 10) -> dict:
+        return self._call("drift_report", top)
+
 
 # Singleton
-predictor = EnsemblePredictor()
\ No newline at end of file
+if PREDICTOR_MODE == "remote":
+    predictor = RemotePredictor()
+elif PREDICTOR_MODE == "fast":
+    predictor = FastPredictor()
+else:
+    predictor = EnsemblePredictor()
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Sampling profiler untuk proses yang sedang jalan (semua thread).
+
+Tiap PROFILE_INTERVAL_S, stack semua thread diambil lewat
+sys._current_frames() dan dihitung. Output format "collapsed stack"
+(satu baris `thread;frame;frame;... count`), langsung bisa dipakai
+flamegraph.pl, speedscope.app, atau inferno.
+
+Berbeda dengan cProfile, tidak perlu instrumentasi per fungsi dan ikut
+melihat thread lain (capture loop, scorer, LLM client).
+"""
+
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from config import ADMIN_TOKEN, PROFILE_INTERVAL_S
+
+_lock = threading.Lock()   # satu sesi profiling sekaligus
+
+
+class ProfilerBusy(RuntimeError):
+    """Sesi profiling lain sedang berjalan."""
+
+
+def admin_token_ok(token: str | None) -> bool:
+    """Cek header X-Admin-Token (constant-time). Tanpa ADMIN_TOKEN endpoint admin mati."""
+    if not ADMIN_TOKEN or token is None:
+        return False
+    return secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def _frame_label(frame, lines: bool) -> str:
+    # Default module:fungsi, supaya satu fungsi = satu kotak di flamegraph
+    # (dengan nomor baris tiap baris yang sedang jalan jadi stack terpisah)
+    module = frame.f_globals.get("__name__", "?")
+    label  = f"{module}:{frame.f_code.co_name}"
+    return f"{label}:{frame.f_lineno}" if lines else label
+
+
+def sample_stacks(seconds: float, interval: float = PROFILE_INTERVAL_S,
+                  lines: bool = False) -> Counter:
+    """
+    Blocking selama `seconds`. Return Counter collapsed-stack → jumlah sampel.
+    lines=True menambahkan nomor baris ke tiap frame.
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy("another profiling session is running")
+    try:
+        me       = threading.get_ident()
+        counts   = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame, lines))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                counts[";".join(reversed(stack))] += 1
+            time.sleep(interval)
+        return counts
+    finally:
+        _lock.release()
+
+
+def to_collapsed(counts: Counter) -> str:
+    return "\n".join(f"{stack} {n}" for stack, n in counts.most_common()) + "\n"
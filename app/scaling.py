@@ -0,0 +1,33 @@
+"""
+StandardScaler yang dilipat ke float32 untuk jalur inference.
+
+scaler.transform() memvalidasi input di setiap panggilan dan selalu
+menghasilkan float64, padahal XGBoost dan Keras sama-sama bekerja di
+float32 (input float64 disalin + di-cast lagi di dalam model). Di sini
+mean dan 1/scale diambil sekali dari scaler.pkl, lalu transform menjadi
+dua operasi vektor:
+
+    arr  = X - mean      (cast ke float32 + kurangi dalam satu pass)
+    arr *= inv_scale     (in-place)
+
+Output C-contiguous, jadi reshape untuk CNN berupa view tanpa salin.
+"""
+
+import numpy as np
+
+
+class FusedScaler:
+
+    def __init__(self, scaler):
+        n = scaler.n_features_in_
+        mean  = scaler.mean_  if scaler.with_mean else np.zeros(n)
+        scale = scaler.scale_ if scaler.with_std  else np.ones(n)
+        self.mean      = np.asarray(mean, dtype=np.float32)
+        # Reciprocal dihitung di float64 dulu supaya pembulatan cuma sekali
+        self.inv_scale = (1.0 / np.asarray(scale, dtype=np.float64)).astype(np.float32)
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        """X: matrix (N, 36) mentah (dtype apa saja). Return float32 baru, X tidak diubah."""
+        arr = np.subtract(X, self.mean, dtype=np.float32)
+        arr *= self.inv_scale
+        return arr
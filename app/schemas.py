@@ -1,5 +1,7 @@
-from pydantic import BaseModel
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import Optional
+from typing_extensions import NotRequired, TypedDict
 
 # ── Input Schema ─────────────────────────────────────
 class NetworkFlow(BaseModel):
@@ -44,16 +46,111 @@ class NetworkFlow(BaseModel):
     Bwd_Packets_s               : float
     Down_Up_Ratio               : float
 
+    # Metadata opsional, bukan fitur model — dipakai pre-filter allowlist
+    src_ip                      : Optional[str] = None
+    dst_ip                      : Optional[str] = None
+
+# ── Batch Input (columnar) ───────────────────────────
+FLOW_META = ("src_ip", "dst_ip")
+
+# Field fitur NetworkFlow sudah berurutan sama dengan FEATURE_COLS
+FLOW_FIELDS = [name for name in NetworkFlow.model_fields if name not in FLOW_META]
+
+# Versi TypedDict dari NetworkFlow: divalidasi langsung oleh pydantic-core
+# jadi dict biasa, tanpa bikin objek model + model_dump() per flow
+FlowRow = TypedDict("FlowRow", {
+    **{name: float for name in FLOW_FIELDS},
+    **{name: NotRequired[Optional[str]] for name in FLOW_META},
+})
+
+FlowBatchAdapter = TypeAdapter(list[FlowRow])
+
+
+class FlowBatchError(ValueError):
+    """Payload valid secara tipe tapi berisi nilai non-finite."""
+
+
+def flow_matrix(rows: list[dict]) -> np.ndarray:
+    """
+    Flow yang sudah divalidasi → matrix float32 (N, 36) urutan FEATURE_COLS.
+    Raise FlowBatchError kalau ada NaN/inf, termasuk nilai di luar range
+    float32 yang overflow jadi inf saat konversi.
+    """
+    with np.errstate(over="ignore"):   # > float32 max → inf, ditolak di bawah
+        X = np.array([[row[name] for name in FLOW_FIELDS] for row in rows], dtype=np.float32)
+    X = X.reshape(len(rows), len(FLOW_FIELDS))
+    if not np.isfinite(X).all():
+        raise FlowBatchError("flows contain NaN/inf or out-of-float32-range values")
+    return X
+
+
+def parse_flow_batch(body: bytes | str) -> tuple[np.ndarray, list[dict]]:
+    """
+    Validasi seluruh payload JSON batch sekali jalan → matrix float32 (N, 36)
+    urutan FEATURE_COLS + list dict mentah (untuk prompt LLM).
+    Raise pydantic.ValidationError kalau field hilang / bukan angka.
+    """
+    rows = FlowBatchAdapter.validate_json(body)
+    return flow_matrix(rows), rows
+
+
 # ── Output Schema ─────────────────────────────────────
+class FeatureContribution(BaseModel):
+    """
+    Kontribusi satu fitur (TreeSHAP XGBoost, satuan log-odds)
+    """
+    feature      : str      # nama kolom FEATURE_COLS
+    value        : float    # nilai mentah fitur
+    contribution : float    # > 0 mendorong ke anomali
+
+
+class Explanation(BaseModel):
+    """
+    Penjelasan anomali terstruktur. validation_alias = key JSON ringkas yang
+    diminta dari LLM (hemat token output), hanya dipakai saat parsing;
+    response API (/predict maupun /predict/batch) selalu pakai field name.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    source            : str = "llm"     # "llm", "local", "unavailable"
+    threat_level      : Optional[str] = Field(None, validation_alias="lvl")     # LOW/MEDIUM/HIGH/CRITICAL
+    attack_type_id    : Optional[str] = Field(None, validation_alias="atk_id")
+    attack_type_en    : Optional[str] = Field(None, validation_alias="atk_en")
+    mitre_technique   : Optional[str] = Field(None, validation_alias="mitre")
+    summary_id        : Optional[str] = Field(None, validation_alias="sum_id")
+    summary_en        : Optional[str] = Field(None, validation_alias="sum_en")
+    impact_id         : Optional[str] = Field(None, validation_alias="imp_id")
+    impact_en         : Optional[str] = Field(None, validation_alias="imp_en")
+    recommendation_id : Optional[str] = Field(None, validation_alias="rec_id")
+    recommendation_en : Optional[str] = Field(None, validation_alias="rec_en")
+    data_evidence     : Optional[str] = Field(None, validation_alias="evid")
+    error             : Optional[str] = None   # alasan fallback kalau LLM gagal
+
+
 class PredictionResult(BaseModel):
     """
     Hasil prediksi dari ensemble 3 model
     """
-    status              : str           # "NORMAL" atau "ANOMALI"
-    ensemble_score      : float         # 0.0 - 1.0
-    xgboost_score       : float
-    cnn_score           : float
-    resnet_score        : float
+    status              : str           # "NORMAL", "ANOMALI", atau "ALLOWLISTED"
+    ensemble_score      : Optional[float]   # 0.0 - 1.0, None kalau ALLOWLISTED (tidak di-score)
+    xgboost_score       : Optional[float]   # None di mode fast
+    cnn_score           : Optional[float]
+    resnet_score        : Optional[float]
     is_anomaly          : bool
-    gemini_explanation  : Optional[str] # Penjelasan dari Gemini
-    confidence          : str           # "LOW", "MEDIUM", "HIGH"
\ No newline at end of file
+    explanation         : Optional[Explanation] = None  # hanya anomali
+    gemini_explanation  : Optional[str] = None  # deprecated: teks render `explanation`, akan dihapus
+    confidence          : Optional[str] # "LOW", "MEDIUM", "HIGH"
+    top_features        : Optional[list[FeatureContribution]] = None  # hanya anomali
+
+
+# Batas skor → PredictionResult.confidence (dipakai predictor, sensor_agent, distill)
+CONFIDENCE_HIGH   = 0.85
+CONFIDENCE_MEDIUM = 0.65
+
+
+def confidence_level(score: float) -> str:
+    if score >= CONFIDENCE_HIGH:
+        return "HIGH"
+    elif score >= CONFIDENCE_MEDIUM:
+        return "MEDIUM"
+    return "LOW"
\ No newline at end of file
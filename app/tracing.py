@@ -0,0 +1,157 @@
+"""
+Timing span opt-in per request / per batch streaming.
+
+    trace = start_trace()           # aktifkan untuk context ini
+    with span("preprocess"):
+        ...
+    trace.timings()                 # {"preprocess": 0.42, ...} (ms)
+
+Tanpa trace aktif, span() tidak melakukan apa-apa (satu lookup ContextVar),
+jadi aman dipasang permanen di jalur panas. ContextVar ikut ter-copy ke
+task asyncio dan threadpool FastAPI, jadi span di dalam predictor / LLM
+client tercatat ke trace request yang sama.
+
+API: header request `X-Trace: 1` (atau TRACE_ENABLED=1) → response dapat
+header `Server-Timing` (bisa dilihat di DevTools browser).
+Loop streaming: StageStats mengakumulasi trace per batch.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from config import TRACE_ENABLED
+
+_current: ContextVar = ContextVar("trace", default=None)
+
+
+class Trace:
+
+    def __init__(self):
+        self.t0     = time.perf_counter()
+        self._spans = {}   # nama → [total detik, jumlah]
+
+    def add(self, name: str, seconds: float):
+        entry = self._spans.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def timings(self) -> dict:
+        """Total ms per span (span yang berulang dijumlah)."""
+        return {name: round(total * 1000, 3) for name, (total, _) in self._spans.items()}
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000
+
+    def server_timing(self) -> str:
+        parts = [f"{name};dur={ms}" for name, ms in self.timings().items()]
+        parts.append(f"total;dur={self.total_ms():.3f}")
+        return ", ".join(parts)
+
+
+class _Span:
+    __slots__ = ("trace", "name", "t0")
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace, self.name = trace, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+def span(name: str):
+    trace = _current.get()
+    return _NULL if trace is None else _Span(trace, name)
+
+
+def start_trace() -> Trace:
+    trace = Trace()
+    _current.set(trace)
+    return trace
+
+
+def stop_trace():
+    _current.set(None)
+
+
+def current_trace():
+    return _current.get()
+
+
+class StageStats:
+    """Akumulasi trace per batch untuk loop streaming (EVE / NFStream / dashboard)."""
+
+    def __init__(self):
+        self._lock   = threading.Lock()
+        self._stages = {}   # nama → [total ms, jumlah batch, max ms]
+        self.batches = 0
+
+    def add(self, trace: Trace):
+        timings = trace.timings()
+        timings["total"] = trace.total_ms()
+        with self._lock:
+            self.batches += 1
+            for name, ms in timings.items():
+                entry = self._stages.setdefault(name, [0.0, 0, 0.0])
+                entry[0] += ms
+                entry[1] += 1
+                entry[2]  = max(entry[2], ms)
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "stages" : {
+                    name: {"mean_ms": round(total / n, 3), "max_ms": round(peak, 3), "total_ms": round(total, 1)}
+                    for name, (total, n, peak) in sorted(self._stages.items(), key=lambda kv: -kv[1][0])
+                },
+            }
+
+    def summary(self) -> str:
+        stages = self.report()["stages"]
+        return " ".join(f"{name}={s['mean_ms']:.2f}ms" for name, s in stages.items())
+
+
+class TraceMiddleware:
+    """ASGI middleware: trace request kalau `X-Trace: 1` atau TRACE_ENABLED."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        if not (TRACE_ENABLED or headers.get(b"x-trace") in (b"1", b"true")):
+            return await self.app(scope, receive, send)
+
+        trace = start_trace()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", trace.server_timing().encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            stop_trace()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+bench_ensemble.py
+Bandingkan latency predict_matrix ensemble:
+  - sequential : XGBoost → CNN → ResNet bergantian (ENSEMBLE_PARALLEL=0)
+  - parallel   : ketiganya bersamaan di thread pool (ENSEMBLE_PARALLEL=1)
+
+Tiap mode jalan di proses terpisah karena budget thread TensorFlow hanya
+bisa diset sekali per proses. Butuh model di folder models/.
+
+Cara pakai:
+    python3 bench_ensemble.py
+    python3 bench_ensemble.py --sizes 1,32,256,2048 --repeat 30
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+
+MODES = {"sequential": "0", "parallel": "1"}
+
+
+def measure(sizes: list, repeat: int) -> dict:
+    """Jalan di proses anak: latency p50/p95 per ukuran batch (ms)."""
+    from config import FEATURE_COLS
+    from app.predictor import predictor
+    from app.tracing import start_trace, stop_trace
+
+    rng = np.random.default_rng(42)
+    out = {"threads": predictor.threads, "sizes": {}}
+    for n in sizes:
+        X = np.abs(rng.standard_normal((n, len(FEATURE_COLS)))).astype(np.float32)
+        X *= predictor.scaler.scale_.astype(np.float32)
+        for _ in range(3):   # warm-up: trace graph Keras untuk shape ini
+            predictor.predict_matrix(X)
+
+        latencies, members = [], {"xgboost": [], "cnn": [], "resnet": []}
+        for _ in range(repeat):
+            trace = start_trace()
+            t0 = time.perf_counter()
+            predictor.predict_matrix(X)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            for name, ms in trace.timings().items():
+                if name in members:
+                    members[name].append(ms)
+            stop_trace()
+        out["sizes"][n] = {
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+            **{name: float(np.median(v)) for name, v in members.items()},
+        }
+    return out
+
+
+def run_mode(mode: str, sizes: list, repeat: int) -> dict:
+    env = {**os.environ, "ENSEMBLE_PARALLEL": MODES[mode], "PREDICTOR_MODE": "full"}
+    cmd = [sys.executable, __file__, "--child", "--sizes", ",".join(map(str, sizes)), "--repeat", str(repeat)]
+    print(f"▶ {mode} ...")
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs parallel ensemble latency")
+    parser.add_argument("--sizes",  default="1,16,256,1024,4096")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--child",  action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    if args.child:
+        print(json.dumps(measure(sizes, args.repeat)))
+        return
+
+    results = {mode: run_mode(mode, sizes, args.repeat) for mode in MODES}
+    for mode, r in results.items():
+        print(f"   {mode:<10} threads: {r['threads']}")
+
+    print(f"\n{'batch':>6} | {'seq p50':>8} | {'par p50':>8} | {'seq p95':>8} | {'par p95':>8} | speedup"
+          f" | xgb / cnn / resnet (par, ms)")
+    print("-" * 96)
+    for n in sizes:
+        seq, par = results["sequential"]["sizes"][str(n)], results["parallel"]["sizes"][str(n)]
+        print(f"{n:>6} | {seq['p50']:>8.2f} | {par['p50']:>8.2f} | {seq['p95']:>8.2f} | {par['p95']:>8.2f} |"
+              f" {seq['p50'] / par['p50']:>6.2f}x | {par['xgboost']:.2f} / {par['cnn']:.2f} / {par['resnet']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
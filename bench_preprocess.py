@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+bench_preprocess.py
+Bandingkan preprocessing sebelum model:
+  - lama : matrix float64 → scaler.transform() (validasi sklearn tiap panggilan)
+  - baru : mean/scale dilipat ke float32, (x - mean) * inv_scale in-place
+
+Hanya butuh models/scaler.pkl (tanpa TensorFlow / XGBoost). Selisih
+numerik dilaporkan dalam satuan z (hasil scaling).
+
+Cara pakai:
+    python3 bench_preprocess.py
+"""
+
+import time
+import joblib
+import numpy as np
+
+from config import SCALER_PATH, FEATURE_COLS
+from app.scaling import FusedScaler
+
+
+def make_batch(scaler, n: int) -> np.ndarray:
+    rng = np.random.default_rng(42)
+    z   = rng.standard_normal((n, len(FEATURE_COLS)))
+    return np.abs(z * scaler.scale_ + scaler.mean_)   # fitur flow selalu >= 0
+
+
+def bench(fn, X: np.ndarray, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn(X)
+        best = min(best, (time.perf_counter() - t0) / repeat)
+    return best
+
+
+def main():
+    scaler = joblib.load(SCALER_PATH)
+    fused  = FusedScaler(scaler)
+
+    print(f"{'rows':>6} | {'sklearn f64 (µs)':>16} | {'fused f32 (µs)':>14} | speedup | max |Δz|")
+    print("-" * 66)
+    for n in (1, 256, 4096, 65536):
+        X64    = make_batch(scaler, n)
+        X32    = X64.astype(np.float32)   # input dari _to_matrix / parse_flow_batch / codec
+        repeat = max(10, 200_000 // n)
+
+        delta  = np.abs(scaler.transform(X64) - fused.transform(X32)).max()
+        t_old  = bench(scaler.transform, X64, repeat)
+        t_new  = bench(fused.transform, X32, repeat)
+        print(f"{n:>6} | {t_old * 1e6:>16.1f} | {t_new * 1e6:>14.1f} | {t_old / t_new:>6.1f}x | {delta:.2e}")
+
+
+if __name__ == "__main__":
+    main()
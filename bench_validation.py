@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+bench_validation.py
+Bandingkan validasi payload /predict/batch:
+  - lama : list[NetworkFlow] → model_dump() per flow → susun matrix
+  - baru : parse_flow_batch() (TypeAdapter sekali jalan → matrix)
+
+Tidak butuh model ML, hanya pydantic + numpy.
+
+Cara pakai:
+    python3 bench_validation.py
+"""
+
+import json
+import time
+import random
+import numpy as np
+from pydantic import TypeAdapter
+
+from app.schemas import NetworkFlow, FLOW_FIELDS, parse_flow_batch
+
+OldAdapter = TypeAdapter(list[NetworkFlow])
+
+
+def make_payload(n: int) -> bytes:
+    rnd = random.Random(42)
+    flows = [{name: rnd.uniform(0, 1e5) for name in FLOW_FIELDS} for _ in range(n)]
+    return json.dumps(flows).encode()
+
+
+def old_path(body: bytes) -> np.ndarray:
+    # Sama seperti FastAPI lama: json → list[NetworkFlow] → model_dump() per flow
+    flows = OldAdapter.validate_python(json.loads(body))
+    raws  = [flow.model_dump() for flow in flows]
+    return np.array([[raw[name] for name in FLOW_FIELDS] for raw in raws])
+
+
+def new_path(body: bytes) -> np.ndarray:
+    X, _ = parse_flow_batch(body)
+    return X
+
+
+def bench(fn, body: bytes, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(body)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    print(f"{'flows':>7} | {'old (ms)':>9} | {'new (ms)':>9} | speedup")
+    print("-" * 44)
+    for n in (1_000, 10_000):
+        body = make_payload(n)
+        assert np.allclose(old_path(body), new_path(body))
+        t_old = bench(old_path, body)
+        t_new = bench(new_path, body)
+        print(f"{n:>7} | {t_old * 1000:>9.2f} | {t_new * 1000:>9.2f} | {t_old / t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
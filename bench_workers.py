@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+bench_workers.py
+Bandingkan RSS / PSS per proses dan waktu startup:
+  - uvicorn : `uvicorn app.main:app --workers N` (tiap worker load semua model)
+  - serve   : `serve.py --workers N` (model di master, worker mode remote)
+
+PSS membagi halaman shared rata antar proses, jadi total PSS = memori
+fisik sebenarnya. Butuh Linux (/proc) dan model di folder models/.
+
+Cara pakai:
+    python3 bench_workers.py --workers 4
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+import urllib.request
+
+PORT = 8799
+
+
+def children(pid: int) -> list:
+    """Semua keturunan pid (rekursif) dari /proc."""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            kids = [int(p) for p in f.read().split()]
+    except FileNotFoundError:
+        return []
+    return kids + [d for k in kids for d in children(k)]
+
+
+def memory_mb(pid: int) -> dict:
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss"):
+                out[key.lower()] = int(value.split()[0]) / 1024
+    return out
+
+
+def cmdline(pid: int) -> str:
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        return f.read().replace(b"\0", b" ").decode(errors="replace").strip()[:60]
+
+
+def wait_ready(workers: int, timeout: float = 600.0) -> float:
+    """Detik sampai /health dijawab oleh `workers` pid berbeda."""
+    t0, seen = time.perf_counter(), set()
+    while time.perf_counter() - t0 < timeout:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{PORT}/health", timeout=2) as r:
+                seen.add(json.loads(r.read())["pid"])
+            if len(seen) >= workers:
+                return time.perf_counter() - t0
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"only {len(seen)}/{workers} workers ready after {timeout}s")
+
+
+def run(name: str, cmd: list, workers: int) -> dict:
+    print(f"\n▶ {name}: {' '.join(cmd)}")
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        startup = wait_ready(workers)
+        time.sleep(2)   # biar lazy allocation worker selesai
+        pids = [proc.pid] + children(proc.pid)
+        rows = [(pid, cmdline(pid), memory_mb(pid)) for pid in pids]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    print(f"   startup (all {workers} workers answering): {startup:.1f}s")
+    print(f"   {'pid':>7} | {'RSS MB':>8} | {'PSS MB':>8} | cmd")
+    for pid, cmd_str, mem in rows:
+        print(f"   {pid:>7} | {mem['rss']:>8.0f} | {mem['pss']:>8.0f} | {cmd_str}")
+    total = {k: sum(m[k] for _, _, m in rows) for k in ("rss", "pss")}
+    print(f"   {'total':>7} | {total['rss']:>8.0f} | {total['pss']:>8.0f} |")
+    return {"startup_s": startup, **total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker memory and startup: uvicorn vs serve.py")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    n = str(args.workers)
+    base  = run("uvicorn", [sys.executable, "-m", "uvicorn", "app.main:app",
+                            "--port", str(PORT), "--workers", n], args.workers)
+    serve = run("serve", [sys.executable, "serve.py", "--port", str(PORT), "--workers", n], args.workers)
+
+    print(f"\n{'':>10} | {'startup s':>9} | {'total PSS MB':>12}")
+    print("-" * 38)
+    for name, r in (("uvicorn", base), ("serve", serve)):
+        print(f"{name:>10} | {r['startup_s']:>9.1f} | {r['pss']:>12.0f}")
+    print(f"PSS saved: {base['pss'] - serve['pss']:.0f} MB ({base['pss'] / max(serve['pss'], 1):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+collector_server.py
+Node scoring pusat untuk banyak sensor. Sensor (sensor_agent.py) mengirim
+batch fitur lewat koneksi persisten (protokol app/collector.py); batch dari
+semua sensor digabung sampai COLLECTOR_MAX_BATCH_ROWS atau
+COLLECTOR_MAX_WAIT_MS, di-score dalam satu panggilan predict_matrix,
+lalu verdict dikirim balik ke masing-masing sensor secara async.
+
+Sensor harus lolos handshake HMAC dengan COLLECTOR_AUTHKEY (shared secret,
+sama di collector dan semua sensor) sebelum boleh mengirim batch. Default
+hanya listen di 127.0.0.1; buka ke jaringan secara eksplisit.
+
+Cara pakai:
+    export COLLECTOR_AUTHKEY=$(python3 -c 'import secrets; print(secrets.token_hex(32))')
+    COLLECTOR_ADDRESS=tcp://10.0.0.5:9500 python3 collector_server.py
+    COLLECTOR_ADDRESS=unix:///run/threatflow/collector.sock python3 collector_server.py
+"""
+
+import asyncio
+import os
+import secrets
+import socket
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from config import (
+    COLLECTOR_ADDRESS, COLLECTOR_AUTHKEY, COLLECTOR_MAX_BATCH_ROWS, COLLECTOR_MAX_WAIT_MS
+)
+from app.codec import decode_raw, DecodeError, N_FEATURES
+from app.collector import (
+    MSG_HELLO, MSG_BATCH, MSG_ERROR, MSG_CHALLENGE, ProtocolError,
+    HANDSHAKE_MAX_BYTES, NONCE_BYTES, parse_address, read_frame, check_hello,
+    encode_frame, encode_verdict
+)
+from app.predictor import predictor
+
+STATS_EVERY_S   = 30
+MAX_QUEUED      = 256   # batch antri; penuh → berhenti baca socket (backpressure TCP ke sensor)
+MAX_WRITE_BUF   = 16 * 1024 * 1024   # verdict belum terkirim per sensor; lewat → sensor diputus
+HANDSHAKE_S     = 10    # batas waktu sensor menjawab CHALLENGE
+MAX_BATCH_BYTES = COLLECTOR_MAX_BATCH_ROWS * N_FEATURES * 4   # frame BATCH terbesar yang diterima
+
+stats = {
+    "sensors_connected": 0,
+    "batches_in"       : 0,
+    "rows_in"          : 0,
+    "rows_scored"      : 0,
+    "predict_calls"    : 0,
+    "rejected"         : 0,
+    "auth_failed"      : 0,
+    "anomalies"        : 0,
+    "dropped_slow"     : 0,   # sensor diputus karena tidak membaca verdict
+}
+
+
+def send_reply(writer: asyncio.StreamWriter, frame: bytes):
+    """
+    Kirim verdict dari score_loop tanpa await drain(): satu sensor lambat
+    tidak boleh menahan verdict sensor lain. Sebagai gantinya buffer tulis
+    dibatasi — sensor yang tidak membaca sampai MAX_WRITE_BUF diputus
+    (sensor_agent reconnect dan kirim ulang batch yang belum dijawab).
+    """
+    if writer.is_closing():
+        return
+    writer.write(frame)
+    if writer.transport.get_write_buffer_size() > MAX_WRITE_BUF:
+        stats["dropped_slow"] += 1
+        print(f"[WARN] sensor {writer.get_extra_info('peername')}: write buffer full, dropping")
+        writer.transport.abort()
+
+
+async def authenticate(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                       authkey: bytes) -> str:
+    """CHALLENGE → HELLO (HMAC). Return sensor id; raise ProtocolError kalau ditolak."""
+    nonce = secrets.token_bytes(NONCE_BYTES)
+    writer.write(encode_frame(MSG_CHALLENGE, payload=nonce))
+    await writer.drain()
+    try:
+        msg_type, _, _, payload = await asyncio.wait_for(
+            read_frame(reader, HANDSHAKE_MAX_BYTES), HANDSHAKE_S
+        )
+    except asyncio.TimeoutError:
+        raise ProtocolError("handshake timeout")
+    if msg_type != MSG_HELLO:
+        raise ProtocolError("expected HELLO after CHALLENGE")
+    try:
+        sensor = check_hello(authkey, nonce, payload)
+    except ProtocolError as e:
+        stats["auth_failed"] += 1
+        writer.write(encode_frame(MSG_ERROR, payload=str(e).encode()))
+        await writer.drain()
+        raise ProtocolError(f"{e} from {writer.get_extra_info('peername')}")
+    writer.write(encode_frame(MSG_HELLO))
+    await writer.drain()
+    return sensor
+
+
+async def handle_sensor(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                        pending: asyncio.Queue, authkey: bytes):
+    sensor = "?"
+    try:
+        sensor = await authenticate(reader, writer, authkey)
+        stats["sensors_connected"] += 1
+        print(f"🔌 Sensor connected: {sensor}")
+
+        while True:
+            msg_type, batch_id, n_rows, payload = await read_frame(reader, MAX_BATCH_BYTES)
+            if msg_type != MSG_BATCH:
+                continue
+            if n_rows > COLLECTOR_MAX_BATCH_ROWS:
+                raise ProtocolError(f"batch of {n_rows} rows exceeds {COLLECTOR_MAX_BATCH_ROWS}")
+            try:
+                X = decode_raw(payload)
+                if len(X) != n_rows:
+                    raise DecodeError(f"header says {n_rows} rows, payload has {len(X)}")
+            except DecodeError as e:
+                stats["rejected"] += 1
+                writer.write(encode_frame(MSG_ERROR, batch_id, 0, str(e).encode()))
+                await writer.drain()   # hanya menahan sensor ini sendiri
+                continue
+            stats["batches_in"] += 1
+            stats["rows_in"]    += n_rows
+            await pending.put((writer, batch_id, X))
+    except (asyncio.IncompleteReadError, ConnectionError, ProtocolError) as e:
+        if not isinstance(e, asyncio.IncompleteReadError):
+            print(f"[WARN] sensor {sensor}: {e}")
+    finally:
+        if sensor != "?":
+            stats["sensors_connected"] -= 1
+            print(f"🔌 Sensor disconnected: {sensor}")
+        writer.close()
+
+
+async def score_loop(pending: asyncio.Queue):
+    """Gabung batch lintas sensor → satu predict_matrix → pecah verdict per batch."""
+    loop     = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scorer")
+    max_wait = COLLECTOR_MAX_WAIT_MS / 1000
+
+    while True:
+        batch    = [await pending.get()]
+        rows     = len(batch[0][2])
+        deadline = loop.time() + max_wait
+        while rows < COLLECTOR_MAX_BATCH_ROWS:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(pending.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            rows += len(item[2])
+
+        X = np.concatenate([item[2] for item in batch]) if len(batch) > 1 else batch[0][2]
+        try:
+            scores = await loop.run_in_executor(executor, predictor.predict_matrix, X)
+        except Exception as e:
+            print(f"[ERROR] predict failed: {e}")
+            for writer, batch_id, _ in batch:
+                send_reply(writer, encode_frame(MSG_ERROR, batch_id, 0, f"predict failed: {e}".encode()))
+            continue
+
+        stats["predict_calls"] += 1
+        stats["rows_scored"]   += rows
+        stats["anomalies"]     += int(scores["is_anomaly"].sum())
+
+        offset = 0
+        for writer, batch_id, Xi in batch:
+            end = offset + len(Xi)
+            send_reply(writer, encode_verdict(
+                batch_id, scores["ensemble_score"][offset:end], scores["is_anomaly"][offset:end]
+            ))
+            offset = end
+
+
+async def stats_loop():
+    last = dict(stats)
+    while True:
+        await asyncio.sleep(STATS_EVERY_S)
+        rows  = stats["rows_scored"] - last["rows_scored"]
+        calls = stats["predict_calls"] - last["predict_calls"]
+        print(
+            f"📊 sensors={stats['sensors_connected']} rows/s={rows / STATS_EVERY_S:.0f} "
+            f"rows/predict={rows / max(calls, 1):.0f} anomalies={stats['anomalies']} "
+            f"rejected={stats['rejected']} dropped_slow={stats['dropped_slow']}"
+        )
+        last = dict(stats)
+
+
+async def main():
+    if not COLLECTOR_AUTHKEY:
+        sys.exit("❌ COLLECTOR_AUTHKEY belum diset (hex, sama di collector dan semua sensor)")
+    authkey = bytes.fromhex(COLLECTOR_AUTHKEY)
+    pending = asyncio.Queue(MAX_QUEUED)
+    handler = lambda r, w: handle_sensor(r, w, pending, authkey)
+
+    family, addr = parse_address(COLLECTOR_ADDRESS)
+    if family == socket.AF_UNIX:
+        if os.path.exists(addr):
+            os.unlink(addr)
+        server = await asyncio.start_unix_server(handler, path=addr)
+    else:
+        server = await asyncio.start_server(handler, host=addr[0], port=addr[1])
+
+    print("🚀 ThreatFlow SOC - Collector")
+    print(f"   Listen   : {COLLECTOR_ADDRESS}")
+    print(f"   Mode     : {predictor.mode}")
+    print(f"   Batching : {COLLECTOR_MAX_BATCH_ROWS} rows / {COLLECTOR_MAX_WAIT_MS} ms")
+    print("-" * 60)
+
+    async with server:
+        await asyncio.gather(server.serve_forever(), score_loop(pending), stats_loop())
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n⛔ Stopped.")
@@ -16,15 +16,89 @@ XGBOOST_PATH = os.path.join(MODEL_DIR, "xgboost_model.pkl")
 CNN_PATH     = os.path.join(MODEL_DIR, "cnn_model.keras")
 RESNET_PATH  = os.path.join(MODEL_DIR, "resnet_best.keras")
 SCALER_PATH  = os.path.join(MODEL_DIR, "scaler.pkl")
+STUDENT_PATH = os.path.join(MODEL_DIR, "student_model.json")   # hasil distill.py
+
+# "full" = ensemble 3 model, "fast" = student hasil distilasi (tanpa TensorFlow),
+# "remote" = worker serve.py, inference di proses master (diset otomatis oleh serve.py)
+PREDICTOR_MODE    = os.getenv("PREDICTOR_MODE", "full")
+PREDICTOR_SOCKET  = os.getenv("PREDICTOR_SOCKET")
+PREDICTOR_AUTHKEY = os.getenv("PREDICTOR_AUTHKEY")
+
+# Histogram referensi PSI drift, dibuat dengan drift_reference.py (tanpa file ini psi = null)
+DRIFT_REFERENCE_PATH = os.path.join(MODEL_DIR, "drift_reference.npz")
 
 # ── Ensemble Weights ─────────────────────────────────
 WEIGHT_XGBOOST = 0.50
 WEIGHT_RESNET  = 0.30
 WEIGHT_CNN     = 0.20
 
+# ── Eksekusi Ensemble ───────────────────────────────
+# Paralel: XGBoost, CNN, ResNet jalan bersamaan di thread pool (native code
+# melepas GIL), latency batch ≈ model paling lambat, bukan jumlah ketiganya.
+# Default mati sampai ada angka bench_ensemble.py dari hardware produksi.
+# Budget thread 0 = otomatis dari jumlah CPU (lihat EnsemblePredictor._configure_threads)
+ENSEMBLE_PARALLEL    = os.getenv("ENSEMBLE_PARALLEL", "0") == "1"
+ENSEMBLE_XGB_THREADS = int(os.getenv("ENSEMBLE_XGB_THREADS", "0"))   # thread OpenMP XGBoost
+TF_INTRA_OP_THREADS  = int(os.getenv("TF_INTRA_OP_THREADS", "0"))    # dibagi CNN + ResNet
+TF_INTER_OP_THREADS  = int(os.getenv("TF_INTER_OP_THREADS", "0"))
+
 # ── Threshold ────────────────────────────────────────
 ANOMALY_THRESHOLD = 0.35
 
+# ── Atribusi & LLM ───────────────────────────────────
+ATTRIBUTION_TOP_N  = 5          # top fitur TreeSHAP per anomali
+LLM_MIN_CONFIDENCE = "MEDIUM"   # di bawah ini pakai penjelasan lokal, tanpa LLM
+
+# ── LLM Client (Groq) ────────────────────────────────
+LLM_MODEL            = "llama-3.3-70b-versatile"
+LLM_BASE_URL         = os.getenv("GROQ_BASE_URL")   # mis. mock server lokal
+LLM_RATE_PER_SEC     = 0.5     # token bucket: request/detik
+LLM_BURST            = 5       # token bucket: kapasitas
+LLM_MAX_IN_FLIGHT    = 4       # request paralel maksimum
+LLM_TIMEOUT_S        = 20.0    # timeout per percobaan
+LLM_MAX_RETRIES      = 2       # retry dengan jittered backoff
+LLM_MAX_QUEUE_WAIT_S = 5.0     # lebih lama dari ini → fallback
+LLM_BREAKER_FAILURES = 5       # gagal berturut-turut → circuit OPEN
+LLM_BREAKER_RESET_S  = 60.0    # lama OPEN sebelum HALF_OPEN
+LLM_BATCH_SIZE       = 8       # anomali maksimum per prompt batch
+LLM_BATCH_MAX_WAIT_S = 2.0     # streaming: tunggu maksimum sebelum kirim batch
+
+# ── Ingest Streaming (backpressure & load shedding) ─
+INGEST_QUEUE_SIZE    = 20000   # flow maksimum antri sebelum dibuang
+INGEST_BATCH_SIZE    = 256     # flow per panggilan predict
+INGEST_LAG_SOFT_S    = 2.0     # lag >= ini → mode shedding
+INGEST_BENIGN_PORTS  = {53, 123, 443, 5353}   # DNS, NTP, HTTPS, mDNS
+INGEST_BENIGN_SAMPLE = 0.1     # fraksi flow port benign yang tetap di-score saat shedding
+
+# ── Allowlist (pre-filter flow known-benign) ────────
+ALLOWLIST_PATH     = os.getenv("ALLOWLIST_PATH", os.path.join(BASE_DIR, "allowlist.txt"))
+ALLOWLIST_RELOAD_S = 5.0      # interval cek perubahan file (hot reload)
+ALLOWLIST_SAMPLE   = 0.01     # fraksi flow allowlisted yang tetap di-score (audit)
+ALLOWLIST_BLOOM_FP = 1e-6     # false positive rate Bloom filter tuple (src, dst, port)
+
+# ── Korelasi EVE per flow_id (alert + dns/http/tls + verdict ML) ──
+CORRELATE_MAX_FLOWS    = 200_000   # entry aktif maksimum (flow dengan event non-flow)
+CORRELATE_TTL_S        = 900.0     # entry tanpa update selama ini dibuang (> flow timeout Suricata)
+CORRELATE_MAX_PER_KIND = 16        # event per jenis per flow yang disimpan
+
+# ── Collector (sensor ringan → node scoring pusat) ──
+# Alamat: tcp://host:port atau unix:///path/socket
+# Default loopback saja; listen di jaringan harus eksplisit (mis. tcp://10.0.0.5:9500)
+COLLECTOR_ADDRESS        = os.getenv("COLLECTOR_ADDRESS", "tcp://127.0.0.1:9500")
+COLLECTOR_AUTHKEY        = os.getenv("COLLECTOR_AUTHKEY")   # hex shared secret, wajib di collector + sensor
+COLLECTOR_NODES          = [n.strip() for n in os.getenv("COLLECTOR_NODES", "tcp://127.0.0.1:9500").split(",") if n.strip()]
+COLLECTOR_MAX_BATCH_ROWS = 4096    # flow maksimum per panggilan predict (gabungan semua sensor)
+COLLECTOR_MAX_WAIT_MS    = 20      # tunggu batch dari sensor lain maksimal segini
+SENSOR_BATCH_SIZE        = 256     # flow per frame dari sensor
+SENSOR_FLUSH_MS          = 200     # frame dikirim walau belum penuh setelah segini
+SENSOR_MAX_PENDING       = 64      # batch belum dijawab sebelum yang tertua dibuang
+
+# ── Tracing & Profiling ─────────────────────────────
+TRACE_ENABLED      = os.getenv("TRACE_ENABLED", "0") == "1"   # semua request / batch di-trace
+PROFILE_INTERVAL_S = 0.005    # interval sampling profiler
+PROFILE_MAX_S      = 60       # durasi maksimum satu sesi /admin/profile
+ADMIN_TOKEN        = os.getenv("ADMIN_TOKEN")   # kosong → endpoint admin nonaktif
+
 # ── Feature Columns ──────────────────────────────────
 FEATURE_COLS = [
     'Fwd Header Length', 'Destination Port', 'Flow Duration',
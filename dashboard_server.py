@@ -5,25 +5,30 @@ FastAPI server dengan WebSocket untuk SOC dashboard realtime.
 Jalankan: uvicorn dashboard_server:app --host 0.0.0.0 --port 8000
 """
 
-import sys, os, json, math, asyncio
+import sys, os, json, math, time, asyncio
 from datetime import datetime
 from collections import deque
 from typing import List
 
 PIPELINE_PATH = "/opt/threatflow-soc"
-INTERFACE     = "ens160"
+INTERFACE     = os.getenv("NFSTREAM_INTERFACE", "ens160")   # "mock[:rate[:mix]]" → loadgen.py
 ANOMALY_LOG   = "/var/log/suricata/anomaly_detected_nf.log"
 
 sys.path.insert(0, PIPELINE_PATH)
 os.chdir(PIPELINE_PATH)
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 
 from nfstream import NFStreamer
 from app.predictor import predictor
-from app.gemini import explain_anomaly
+from app.gemini import StreamingExplainer, local_explanation
+from app.ingest import IngestQueue
+from app.allowlist import allowlist
+from app.tracing import StageStats, Trace, start_trace, span
+from app.profiler import sample_stacks, to_collapsed, admin_token_ok, ProfilerBusy
+from config import TRACE_ENABLED, PROFILE_MAX_S
 
 app = FastAPI(title="ThreatFlow SOC Dashboard")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
@@ -40,6 +45,11 @@ stats = {
     "low"          : 0,
 }
 clients: List[WebSocket] = []
+explainer = StreamingExplainer()
+ingest    = IngestQueue()
+
+# Waktu per tahap (hanya terisi kalau TRACE_ENABLED=1)
+timings = {"capture": StageStats(), "scoring": StageStats(), "broadcast": StageStats()}
 
 
 # ── Feature extraction ────────────────────────────────────────────────
@@ -99,6 +109,7 @@ def flow_to_features(flow):
 
 # ── Broadcast ke semua WebSocket client ──────────────────────────────
 async def broadcast(message: dict):
+    trace = Trace() if TRACE_ENABLED else None
     disconnected = []
     for ws in clients:
         try:
@@ -107,6 +118,82 @@ async def broadcast(message: dict):
             disconnected.append(ws)
     for ws in disconnected:
         clients.remove(ws)
+    if trace is not None:
+        trace.add("ws_send", time.perf_counter() - trace.t0)
+        timings["broadcast"].add(trace)
+
+
+# ── Penjelasan anomali (async, batch) ────────────────────────────────
+def on_explanation(event: dict, loop):
+    def callback(explanation: dict):
+        event["explanation"] = explanation
+
+        # Log ke file
+        with open(ANOMALY_LOG, "a") as f:
+            f.write(json.dumps(event) + "\n")
+
+        asyncio.run_coroutine_threadsafe(broadcast({
+            "type"       : "explanation",
+            "id"         : event["id"],
+            "explanation": explanation,
+        }), loop)
+    return callback
+
+
+# ── Satu hasil prediksi → stats, event, dashboard ───────────────────
+def handle_result(flow, features, result, shedding: bool, loop):
+    stats["total_flows"] += 1
+    is_anomaly = result["is_anomaly"]
+
+    event = {
+        "id"         : stats["total_flows"],
+        "type"       : "anomaly" if is_anomaly else "normal",
+        "timestamp"  : datetime.now().isoformat(),
+        "src_ip"     : flow.src_ip,
+        "src_port"   : flow.src_port,
+        "dst_ip"     : flow.dst_ip,
+        "dst_port"   : flow.dst_port,
+        "proto"      : flow.application_name or str(flow.protocol),
+        "score"      : result["ensemble_score"],
+        "confidence" : result["confidence"],
+        "xgb_score"  : result["xgboost_score"],
+        "cnn_score"  : result["cnn_score"],
+        "resnet_score": result["resnet_score"],
+        "top_features": result["top_features"],
+        "explanation": None,
+        "stats"      : dict(stats),
+    }
+
+    if is_anomaly:
+        stats["total_anomaly"] += 1
+        conf = result["confidence"]
+        if conf == "HIGH":   stats["high"] += 1
+        elif conf == "MEDIUM": stats["medium"] += 1
+        else: stats["low"] += 1
+
+        with span("explain_submit"):
+            if shedding:
+                # Tertinggal: skip LLM, langsung penjelasan lokal
+                ingest.record("skipped_llm")
+                on_explanation(event, loop)(local_explanation(result))
+            else:
+                # Penjelasan LLM di-batch di background, capture tidak menunggu
+                explainer.submit(result, features, on_explanation(event, loop))
+
+        recent_anomaly.appendleft(event)
+    else:
+        stats["total_normal"] += 1
+
+    recent_events.appendleft(event)
+    event["stats"] = dict(stats)
+
+    if shedding and not is_anomaly:
+        # Tertinggal: flow normal tidak di-broadcast satu per satu
+        ingest.record("skipped_dashboard")
+        return
+
+    with span("broadcast_schedule"):
+        asyncio.run_coroutine_threadsafe(broadcast(event), loop)
 
 
 # ── Background task: NFStream capture ────────────────────────────────
@@ -114,68 +201,54 @@ async def capture_loop():
     loop = asyncio.get_event_loop()
 
     def run_nfstream():
-        streamer = NFStreamer(
-            source=INTERFACE,
-            statistical_analysis=True,
-            splt_analysis=0,
-            n_dissections=20,
-            idle_timeout=30,
-            active_timeout=300,
-        )
+        if INTERFACE.startswith("mock"):
+            from loadgen import MockStreamer   # flow sintetis untuk load test
+            streamer = MockStreamer.from_spec(INTERFACE)
+        else:
+            streamer = NFStreamer(
+                source=INTERFACE,
+                statistical_analysis=True,
+                splt_analysis=0,
+                n_dissections=20,
+                idle_timeout=30,
+                active_timeout=300,
+            )
+        # Producer: capture + ekstraksi saja, tidak pernah menunggu model
         for flow in streamer:
-            features = flow_to_features(flow)
+            trace = start_trace() if TRACE_ENABLED else None
+            with span("allowlist"):
+                skip = allowlist.skip(flow.src_ip, flow.dst_ip, flow.dst_port)
+            if skip:
+                continue
+            with span("extract"):
+                features = flow_to_features(flow)
+            with span("enqueue"):
+                ingest.put((flow, features), flow.dst_port)
+            if trace is not None:
+                timings["capture"].add(trace)
+
+    def run_scoring():
+        while True:
+            batch = ingest.get_batch()
+            trace = start_trace() if TRACE_ENABLED else None
             try:
-                result = predictor.predict(features)
+                results = predictor.predict_many([features for _, features in batch])
             except Exception as e:
+                print(f"[ERROR] predict failed ({len(batch)} flows dropped): {e}")
+                ingest.record("failed", len(batch))
                 continue
+            ingest.record("scored", len(batch))
 
-            stats["total_flows"] += 1
-            is_anomaly = result["is_anomaly"]
-
-            event = {
-                "type"       : "anomaly" if is_anomaly else "normal",
-                "timestamp"  : datetime.now().isoformat(),
-                "src_ip"     : flow.src_ip,
-                "src_port"   : flow.src_port,
-                "dst_ip"     : flow.dst_ip,
-                "dst_port"   : flow.dst_port,
-                "proto"      : flow.application_name or str(flow.protocol),
-                "score"      : result["ensemble_score"],
-                "confidence" : result["confidence"],
-                "xgb_score"  : result["xgboost_score"],
-                "cnn_score"  : result["cnn_score"],
-                "resnet_score": result["resnet_score"],
-                "explanation": None,
-                "stats"      : dict(stats),
-            }
-
-            if is_anomaly:
-                stats["total_anomaly"] += 1
-                conf = result["confidence"]
-                if conf == "HIGH":   stats["high"] += 1
-                elif conf == "MEDIUM": stats["medium"] += 1
-                else: stats["low"] += 1
-
-                try:
-                    explanation = explain_anomaly(result, features)
-                    event["explanation"] = explanation
-                except:
-                    event["explanation"] = "⚠️ LLM explanation unavailable"
-
-                # Log ke file
-                with open(ANOMALY_LOG, "a") as f:
-                    f.write(json.dumps(event) + "\n")
-
-                recent_anomaly.appendleft(event)
-            else:
-                stats["total_normal"] += 1
-
-            recent_events.appendleft(event)
-            event["stats"] = dict(stats)
-
-            asyncio.run_coroutine_threadsafe(broadcast(event), loop)
+            shedding = ingest.shedding
+            for (flow, features), result in zip(batch, results):
+                handle_result(flow, features, result, shedding, loop)
+            if trace is not None:
+                timings["scoring"].add(trace)
 
-    await loop.run_in_executor(None, run_nfstream)
+    await asyncio.gather(
+        loop.run_in_executor(None, run_nfstream),
+        loop.run_in_executor(None, run_scoring),
+    )
 
 
 @app.on_event("startup")
@@ -196,6 +269,40 @@ def get_events(limit: int = 50):
 def get_anomalies(limit: int = 20):
     return list(recent_anomaly)[:limit]
 
+@app.get("/api/drift")
+def get_drift(top: int = 10):
+    return predictor.drift.report(top=top)
+
+@app.get("/api/ingest")
+def get_ingest():
+    return ingest.stats()
+
+@app.get("/api/allowlist")
+def get_allowlist():
+    return allowlist.stats()
+
+@app.get("/api/trace")
+def get_trace():
+    """Rata-rata waktu per tahap: capture (per flow), scoring & LLM (per batch), broadcast."""
+    return {
+        "enabled": TRACE_ENABLED,
+        **{name: s.report() for name, s in timings.items()},
+        "llm"    : explainer.timings.report(),
+    }
+
+@app.get("/api/profile", response_class=PlainTextResponse)
+async def get_profile(seconds: float = 10.0, lines: bool = False, x_admin_token: str = Header(None)):
+    """Sampling profiler semua thread (capture, scoring, LLM) → collapsed stack."""
+    if not admin_token_ok(x_admin_token):
+        raise HTTPException(status_code=403, detail="admin endpoints disabled or bad token")
+    if not 0 < seconds <= PROFILE_MAX_S:
+        raise HTTPException(status_code=422, detail=f"seconds must be in (0, {PROFILE_MAX_S}]")
+    try:
+        counts = await asyncio.to_thread(sample_stacks, seconds, lines=lines)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return to_collapsed(counts)
+
 
 # ── WebSocket endpoint ────────────────────────────────────────────────
 @app.websocket("/ws")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+distill.py
+Distilasi ensemble (XGBoost + CNN + ResNet) → satu model student kecil
+(XGBoost regressor dangkal) yang meniru ensemble_score, untuk mode
+PREDICTOR_MODE=fast di sensor edge (tanpa TensorFlow).
+
+Data replay bisa berupa:
+  --eve  file EVE JSON Suricata (hanya event flow yang dipakai)
+  --npy  matrix fitur mentah (N, 36) urutan FEATURE_COLS
+
+Output:
+  models/student_model.json          model student (format native XGBoost)
+  models/student_report.json         laporan agreement vs ensemble penuh
+
+Cara pakai:
+    python3 distill.py --eve /var/log/suricata/eve.json
+    PREDICTOR_MODE=fast uvicorn app.main:app --port 8000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+os.environ["PREDICTOR_MODE"] = "full"   # teacher selalu ensemble penuh
+
+import xgboost as xgb
+from config import ANOMALY_THRESHOLD, STUDENT_PATH, MODEL_DIR
+from app.predictor import predictor, FastPredictor, FIELD_ORDER
+from app.eve import extract_features
+from app.schemas import CONFIDENCE_HIGH, CONFIDENCE_MEDIUM
+
+REPORT_PATH = os.path.join(MODEL_DIR, "student_report.json")
+CHUNK       = 4096
+
+
+def load_eve(path: str) -> np.ndarray:
+    rows = []
+    with open(path) as f:
+        for line in f:
+            try:
+                features = extract_features(json.loads(line))
+            except (json.JSONDecodeError, ValueError):
+                continue
+            if features is not None:
+                rows.append([features[field] for field in FIELD_ORDER])
+    return np.array(rows, dtype=np.float64).reshape(-1, len(FIELD_ORDER))
+
+
+def teacher_scores(X: np.ndarray) -> np.ndarray:
+    return np.concatenate([
+        predictor.predict_matrix(X[i:i + CHUNK])["ensemble_score"]
+        for i in range(0, len(X), CHUNK)
+    ])
+
+
+def confidence(scores: np.ndarray) -> np.ndarray:
+    # Versi vektor dari app.schemas.confidence_level
+    return np.where(scores >= CONFIDENCE_HIGH, 2, np.where(scores >= CONFIDENCE_MEDIUM, 1, 0))
+
+
+def latency_ms(fn, X: np.ndarray, repeat: int = 5) -> float:
+    fn(X)   # warm-up
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def agreement_report(y_teacher: np.ndarray, y_student: np.ndarray) -> dict:
+    t_anom = y_teacher >= ANOMALY_THRESHOLD
+    s_anom = y_student >= ANOMALY_THRESHOLD
+    tp     = int((t_anom & s_anom).sum())
+    return {
+        "samples"              : int(len(y_teacher)),
+        "teacher_anomaly_rate" : round(float(t_anom.mean()), 4),
+        "student_anomaly_rate" : round(float(s_anom.mean()), 4),
+        "verdict_agreement"    : round(float((t_anom == s_anom).mean()), 4),
+        "anomaly_precision"    : round(tp / max(int(s_anom.sum()), 1), 4),
+        "anomaly_recall"       : round(tp / max(int(t_anom.sum()), 1), 4),
+        "confidence_agreement" : round(float((confidence(y_teacher) == confidence(y_student)).mean()), 4),
+        "score_mae"            : round(float(np.abs(y_teacher - y_student).mean()), 4),
+        "score_max_abs_error"  : round(float(np.abs(y_teacher - y_student).max()), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill ensemble → fast student model")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--eve", help="file EVE JSON untuk replay")
+    src.add_argument("--npy", help="matrix fitur mentah (N, 36) .npy")
+    parser.add_argument("--trees",   type=int,   default=150)
+    parser.add_argument("--depth",   type=int,   default=5)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--threads", type=int,   default=2, help="thread inference student")
+    parser.add_argument("--out",     default=STUDENT_PATH)
+    args = parser.parse_args()
+
+    X = load_eve(args.eve) if args.eve else np.load(args.npy).astype(np.float64)
+    if len(X) < 100:
+        sys.exit(f"❌ Data replay terlalu sedikit ({len(X)} flow), butuh >= 100")
+    print(f"📦 {len(X)} flow replay")
+
+    print("🎓 Scoring teacher (ensemble penuh)...")
+    y   = teacher_scores(X)
+    arr = predictor._preprocess_matrix(X)
+
+    rng   = np.random.default_rng(42)
+    idx   = rng.permutation(len(X))
+    n_val = max(int(len(X) * args.holdout), 1)
+    val, train = idx[:n_val], idx[n_val:]
+
+    print(f"🌱 Training student ({args.trees} trees, depth {args.depth})...")
+    student = xgb.XGBRegressor(
+        n_estimators  = args.trees,
+        max_depth     = args.depth,
+        learning_rate = 0.1,
+        objective     = "reg:logistic",   # target ensemble_score di [0, 1]
+        tree_method   = "hist",
+        n_jobs        = args.threads,
+    )
+    student.fit(arr[train], y[train], eval_set=[(arr[val], y[val])], verbose=False)
+
+    y_student = np.clip(student.predict(arr[val]), 0.0, 1.0)
+    report    = agreement_report(y[val], y_student)
+
+    student.save_model(args.out)
+
+    # Latency lewat interface yang sama (predict_matrix: preprocess + drift + model),
+    # attribution dimatikan di keduanya supaya yang dibandingkan hanya biaya model
+    fast = FastPredictor(args.out)
+    fast.xgboost.set_params(n_jobs=args.threads)
+    predictor.attribute = fast.attribute = False
+    single, batch = X[val[:1]], X[val[:256]]
+    report["latency_ms"] = {
+        "ensemble_1"  : round(latency_ms(predictor.predict_matrix, single), 3),
+        "student_1"   : round(latency_ms(fast.predict_matrix, single), 3),
+        "ensemble_256": round(latency_ms(predictor.predict_matrix, batch), 3),
+        "student_256" : round(latency_ms(fast.predict_matrix, batch), 3),
+    }
+    predictor.attribute = True
+    lat = report["latency_ms"]
+    report["speedup_1"]   = round(lat["ensemble_1"] / max(lat["student_1"], 1e-6), 1)
+    report["speedup_256"] = round(lat["ensemble_256"] / max(lat["student_256"], 1e-6), 1)
+    report["threshold"]   = ANOMALY_THRESHOLD
+
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report, indent=2))
+    print(f"✅ Student disimpan ke {args.out}")
+    print(f"📝 Laporan agreement: {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
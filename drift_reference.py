@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+drift_reference.py
+Bangun histogram referensi PSI untuk /metrics/drift dari data training:
+baris mentah → scaler.pkl (FusedScaler, sama dengan jalur inference)
+→ DriftMonitor.update → save_reference(DRIFT_REFERENCE_PATH).
+
+Tanpa file ini drift monitor tetap melaporkan z_shift / std_ratio,
+tapi psi = null. Tidak load model / TensorFlow.
+
+Data training bisa berupa:
+  --csv  CSV training (header berisi nama kolom FEATURE_COLS, mis. CIC-IDS2017)
+  --npy  matrix fitur mentah (N, 36) urutan FEATURE_COLS
+  --eve  file EVE JSON Suricata dari traffic normal (event flow)
+
+Cara pakai:
+    python3 drift_reference.py --csv data/train.csv
+    python3 drift_reference.py --npy features.npy --out models/drift_reference.npz
+"""
+
+import argparse
+import csv
+import json
+import sys
+import joblib
+import numpy as np
+
+from config import FEATURE_COLS, SCALER_PATH, DRIFT_REFERENCE_PATH
+from app.drift import DriftMonitor
+from app.scaling import FusedScaler
+from app.eve import extract_features
+from app.schemas import FLOW_FIELDS
+
+CHUNK = 65536
+
+
+def load_csv(path: str) -> np.ndarray:
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader)]   # CIC-IDS: nama kolom diawali spasi
+        missing = [col for col in FEATURE_COLS if col not in header]
+        if missing:
+            sys.exit(f"❌ Kolom tidak ada di {path}: {missing}")
+        idx  = [header.index(col) for col in FEATURE_COLS]
+        rows = [[row[i] for i in idx] for row in reader]
+    X = np.array(rows, dtype=np.float64).reshape(-1, len(FEATURE_COLS))
+    # CIC-IDS berisi Infinity / NaN di Flow Bytes/s; dibuang seperti saat training
+    return X[np.isfinite(X).all(axis=1)]
+
+
+def load_eve(path: str) -> np.ndarray:
+    rows = []
+    with open(path) as f:
+        for line in f:
+            try:
+                features = extract_features(json.loads(line))
+            except (json.JSONDecodeError, ValueError):
+                continue
+            if features is not None:
+                rows.append([features[field] for field in FLOW_FIELDS])
+    return np.array(rows, dtype=np.float64).reshape(-1, len(FLOW_FIELDS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build PSI reference histogram for drift monitor")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--csv", help="CSV training dengan kolom FEATURE_COLS")
+    src.add_argument("--npy", help="matrix fitur mentah (N, 36) .npy")
+    src.add_argument("--eve", help="file EVE JSON traffic normal")
+    parser.add_argument("--out", default=DRIFT_REFERENCE_PATH)
+    args = parser.parse_args()
+
+    if args.csv:
+        X = load_csv(args.csv)
+    elif args.eve:
+        X = load_eve(args.eve)
+    else:
+        X = np.load(args.npy).astype(np.float64)
+    if len(X) < 1000:
+        sys.exit(f"❌ Data terlalu sedikit ({len(X)} baris), butuh >= 1000 untuk referensi PSI")
+    print(f"📦 {len(X)} baris")
+
+    scaler  = joblib.load(SCALER_PATH)
+    fused   = FusedScaler(scaler)
+    monitor = DriftMonitor(FEATURE_COLS, scaler.mean_, scaler.scale_)
+    for i in range(0, len(X), CHUNK):
+        monitor.update(fused.transform(X[i:i + CHUNK]))
+
+    monitor.save_reference(args.out)
+    worst = max(monitor.report()["features"], key=lambda f: abs(f["z_shift"]))
+    print(f"✅ Referensi PSI disimpan: {args.out}")
+    # Sanity check: data training scaler seharusnya z_shift ≈ 0 di semua fitur
+    print(f"   |z_shift| terbesar: {worst['feature']} = {worst['z_shift']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,153 +3,36 @@
 eve_to_ml.py
 Baca EVE JSON Suricata secara real-time, extract features,
 lalu kirim ke EnsemblePredictor dari threatflow-soc pipeline.
+Event alert / dns / http / tls dikorelasikan dengan verdict ML per
+flow_id (app/correlate.py) → satu incident per flow di INCIDENT_LOG.
 
 Cara pakai:
     python3 eve_to_ml.py
 """
 
 import json
-import time
 import sys
 import os
-import math
-from datetime import datetime
+import threading
 
 # ── Path ke pipeline kamu (sesuaikan setelah clone) ──────────────────
 PIPELINE_PATH = "/opt/threatflow-soc"
 EVE_JSON_PATH = "/var/log/suricata/eve.json"
 ANOMALY_LOG   = "/var/log/suricata/anomaly_detected.log"
+INCIDENT_LOG  = "/var/log/suricata/incidents.log"
+DRIFT_EVERY   = 5000   # print ringkasan drift fitur tiap N flow
 
 # Tambahkan path pipeline ke sys.path
 sys.path.insert(0, PIPELINE_PATH)
 
 # ── Import pipeline ───────────────────────────────────────────────────
 from app.predictor import predictor  # EnsemblePredictor singleton
-
-
-# ── Feature extractor dari EVE flow record ────────────────────────────
-def extract_features(eve: dict) -> dict | None:
-    """
-    Map EVE JSON flow record → dict fitur yang dibutuhkan model.
-    Return None kalau bukan event_type 'flow'.
-    """
-    if eve.get("event_type") != "flow":
-        return None
-
-    flow = eve.get("flow", {})
-    tcp  = eve.get("tcp", {})
-
-    # Durasi dalam microseconds (seperti CICFlowMeter)
-    start_str = flow.get("start", "")
-    end_str   = flow.get("end", "")
-    duration_us = 0.0
-    try:
-        fmt = "%Y-%m-%dT%H:%M:%S.%f%z"
-        t_start = datetime.strptime(start_str, fmt)
-        t_end   = datetime.strptime(end_str, fmt)
-        duration_us = (t_end - t_start).total_seconds() * 1_000_000
-    except Exception:
-        duration_us = float(flow.get("age", 0)) * 1_000_000
-
-    duration_s = duration_us / 1_000_000 if duration_us > 0 else 1e-9
-
-    # Bytes dan packets
-    bytes_fwd  = float(flow.get("bytes_toserver", 0))
-    bytes_bwd  = float(flow.get("bytes_toclient", 0))
-    pkts_fwd   = float(flow.get("pkts_toserver", 0))
-    pkts_bwd   = float(flow.get("pkts_toclient", 0))
-    total_pkts = pkts_fwd + pkts_bwd
-    total_bytes= bytes_fwd + bytes_bwd
-
-    # Avg segment size
-    avg_fwd_seg = bytes_fwd / pkts_fwd if pkts_fwd > 0 else 0.0
-    avg_bwd_seg = bytes_bwd / pkts_bwd if pkts_bwd > 0 else 0.0
-    avg_pkt     = total_bytes / total_pkts if total_pkts > 0 else 0.0
-
-    # TCP flags — Suricata catat di tcp.tcp_flags (hex string)
-    # Juga tersedia tcp_flags_ts (to server) dan tcp_flags_tc (to client)
-    flags_ts = int(tcp.get("tcp_flags_ts", "0x00"), 16) if tcp else 0
-    flags_tc = int(tcp.get("tcp_flags_tc", "0x00"), 16) if tcp else 0
-    flags_all = flags_ts | flags_tc
-
-    syn_flag = 1 if (flags_all & 0x02) else 0
-    ack_flag = 1 if (flags_all & 0x10) else 0
-    fin_flag = 1 if (flags_all & 0x01) else 0
-    psh_flag = 1 if (flags_all & 0x08) else 0
-    urg_flag = 1 if (flags_all & 0x20) else 0
-
-    # Init window bytes — tersedia di tcp jika ada
-    init_win_fwd = float(tcp.get("win", 0)) if tcp else 0.0
-    init_win_bwd = 0.0
-
-    # Down/Up ratio
-    down_up = bytes_bwd / bytes_fwd if bytes_fwd > 0 else 0.0
-
-    features = {
-        "Fwd_Header_Length"           : 20.0,           # default TCP header
-        "Destination_Port"            : float(eve.get("dest_port", 0)),
-        "Flow_Duration"               : duration_us,
-        "Total_Length_of_Fwd_Packets" : bytes_fwd,
-        "Total_Length_of_Bwd_Packets" : bytes_bwd,
-        "Fwd_Packet_Length_Std"       : 0.0,            # tidak tersedia langsung
-        "Bwd_Packet_Length_Std"       : 0.0,
-        "Flow_Bytes_s"                : total_bytes / duration_s,
-        "Flow_Packets_s"              : total_pkts / duration_s,
-        "Total_Fwd_Packets"           : pkts_fwd,
-        "Total_Backward_Packets"      : pkts_bwd,
-        "Init_Win_bytes_forward"      : init_win_fwd,
-        "Init_Win_bytes_backward"     : init_win_bwd,
-        "Avg_Fwd_Segment_Size"        : avg_fwd_seg,
-        "Avg_Bwd_Segment_Size"        : avg_bwd_seg,
-        "Average_Packet_Size"         : avg_pkt,
-        "Packet_Length_Mean"          : avg_pkt,
-        "Fwd_IAT_Std"                 : 0.0,
-        "Bwd_IAT_Std"                 : 0.0,
-        "Flow_IAT_Mean"               : duration_us / total_pkts if total_pkts > 1 else 0.0,
-        "Flow_IAT_Std"                : 0.0,
-        "Flow_IAT_Max"                : duration_us,
-        "Fwd_IAT_Mean"                : duration_us / pkts_fwd if pkts_fwd > 1 else 0.0,
-        "Bwd_IAT_Mean"                : duration_us / pkts_bwd if pkts_bwd > 1 else 0.0,
-        "ACK_Flag_Count"              : ack_flag,
-        "SYN_Flag_Count"              : syn_flag,
-        "FIN_Flag_Count"              : fin_flag,
-        "PSH_Flag_Count"              : psh_flag,
-        "URG_Flag_Count"              : urg_flag,
-        "Subflow_Fwd_Packets"         : pkts_fwd,
-        "Subflow_Bwd_Packets"         : pkts_bwd,
-        "Subflow_Fwd_Bytes"           : bytes_fwd,
-        "Subflow_Bwd_Bytes"           : bytes_bwd,
-        "Fwd_Packets_s"               : pkts_fwd / duration_s,
-        "Bwd_Packets_s"               : pkts_bwd / duration_s,
-        "Down_Up_Ratio"               : down_up,
-    }
-
-    # Sanitize: ganti inf/nan dengan 0
-    for k, v in features.items():
-        if isinstance(v, float) and (math.isnan(v) or math.isinf(v)):
-            features[k] = 0.0
-
-    return features
-
-
-# ── Tail EVE JSON ─────────────────────────────────────────────────────
-def follow_eve(path: str):
-    """Generator: yield satu EVE record per baris secara real-time."""
-    print(f"📡 Monitoring {path} ...")
-    with open(path, "r") as f:
-        f.seek(0, 2)  # seek ke akhir file (tail mode)
-        while True:
-            line = f.readline()
-            if not line:
-                time.sleep(0.05)
-                continue
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                yield json.loads(line)
-            except json.JSONDecodeError:
-                continue
+from app.ingest import IngestQueue
+from app.eve import extract_features, follow_eve
+from app.allowlist import allowlist
+from app.correlate import FlowCorrelator
+from app.tracing import StageStats, start_trace, span
+from config import TRACE_ENABLED
 
 
 # ── Log anomali ───────────────────────────────────────────────────────
@@ -169,54 +52,132 @@ def log_anomaly(eve: dict, result: dict):
         f.write(json.dumps(entry) + "\n")
 
 
+def log_incident(incident: dict):
+    with open(INCIDENT_LOG, "a") as f:
+        f.write(json.dumps(incident) + "\n")
+    if incident["alerts"] and incident["ml"] and incident["ml"]["is_anomaly"]:
+        sigs = ", ".join(a.get("signature", "?") for a in incident["alerts"][:3])
+        print(
+            f"🔗 INCIDENT flow_id={incident['flow_id']} | "
+            f"{incident.get('src_ip')} → {incident.get('dest_ip')}:{incident.get('dest_port')} | "
+            f"score={incident['ml']['ensemble_score']} | alerts: {sigs}"
+        )
+
+
+correlator = FlowCorrelator(emit=log_incident)
+
+
+# ── Drift fitur vs training ───────────────────────────────────────────
+def print_drift(top: int = 5):
+    report = predictor.drift.report(top=top)
+    print(f"📈 Drift (n={report['count']}, ref={report['reference']}):")
+    for f in report["features"]:
+        print(
+            f"   {f['feature']:<28} psi={f['psi']:<8} [{f['level']}] "
+            f"z_shift={f['z_shift']:<8} std_ratio={f['std_ratio']}"
+        )
+
+
+# ── Scoring (consumer antrian ingest) ─────────────────────────────────
+def print_ingest(ingest: IngestQueue):
+    s = ingest.stats()
+    print(
+        f"📥 Ingest: lag={s['lag_s']}s queue={s['queue_size']}/{s['queue_max']} "
+        f"shedding={s['shedding']} | shed_benign={s['shed_benign_sample']} "
+        f"dropped_full={s['dropped_full']} failed={s['failed']}"
+    )
+    a = allowlist.stats()
+    print(f"📋 Allowlist: bypassed={a['bypassed']} sampled={a['sampled']} rules={a['rules']}")
+    c = correlator.stats()
+    print(
+        f"🔗 Correlate: active={c['active']}/{c['max_flows']} incidents={c['incidents']} "
+        f"(alert={c['incidents_alert']} ml={c['incidents_ml']} both={c['incidents_both']}) "
+        f"expired={c['expired']} evicted={c['evicted']}"
+    )
+
+
+def score_loop(ingest: IngestQueue):
+    count_total   = 0
+    count_anomaly = 0
+    timings       = StageStats()   # rata-rata waktu per tahap (TRACE_ENABLED=1)
+
+    while True:
+        batch = ingest.get_batch()
+        trace = start_trace() if TRACE_ENABLED else None
+        try:
+            results = predictor.predict_many([features for _, features in batch])
+        except Exception as e:
+            print(f"[ERROR] predict failed ({len(batch)} flows dropped): {e}")
+            ingest.record("failed", len(batch))
+            continue
+        ingest.record("scored", len(batch))
+
+        for (eve, _), result in zip(batch, results):
+            count_total += 1
+
+            score      = result["ensemble_score"]
+            confidence = result["confidence"]
+            is_anomaly = result["is_anomaly"]
+
+            src  = f"{eve.get('src_ip')}:{eve.get('src_port')}"
+            dst  = f"{eve.get('dest_ip')}:{eve.get('dest_port')}"
+            proto= eve.get("proto", "?")
+            ts   = eve.get("timestamp", "")
+
+            with span("correlate"):
+                correlator.verdict(eve, result)
+
+            if is_anomaly:
+                count_anomaly += 1
+                with span("log"):
+                    log_anomaly(eve, result)
+                print(
+                    f"🚨 [{ts}] ANOMALI | {src} → {dst} | {proto} | "
+                    f"score={score} | confidence={confidence}"
+                )
+            else:
+                # Print setiap 100 normal flow biar tidak spam
+                if count_total % 100 == 0:
+                    print(
+                        f"✅ [{ts}] NORMAL  | {src} → {dst} | {proto} | "
+                        f"score={score} | total={count_total} anomali={count_anomaly}"
+                    )
+
+            if count_total % DRIFT_EVERY == 0:
+                correlator.sweep()
+                print_drift()
+                print_ingest(ingest)
+                if timings.batches:
+                    print(f"⏱️ Per batch: {timings.summary()}")
+
+        if trace is not None:
+            timings.add(trace)
+
+
 # ── Main ──────────────────────────────────────────────────────────────
 def main():
     print("🚀 ThreatFlow SOC - EVE → ML Integration")
     print(f"   Pipeline : {PIPELINE_PATH}")
     print(f"   EVE log  : {EVE_JSON_PATH}")
     print(f"   Anomaly  : {ANOMALY_LOG}")
+    print(f"   Incident : {INCIDENT_LOG}")
     print("-" * 60)
 
-    count_total   = 0
-    count_anomaly = 0
+    ingest = IngestQueue()
+    threading.Thread(target=score_loop, args=(ingest,), name="scorer", daemon=True).start()
 
+    # Producer: tail + ekstraksi saja, scoring jalan di thread scorer
     for eve in follow_eve(EVE_JSON_PATH):
         features = extract_features(eve)
         if features is None:
+            # Bukan event flow: simpan alert / dns / http / tls per flow_id
+            correlator.add_event(eve)
             continue
-
-        count_total += 1
-
-        try:
-            result = predictor.predict(features)
-        except Exception as e:
-            print(f"[ERROR] predict failed: {e}")
+        if allowlist.skip(eve.get("src_ip"), eve.get("dest_ip"), eve.get("dest_port")):
+            correlator.flow_closed(eve, scored=False)
             continue
-
-        status     = result["status"]
-        score      = result["ensemble_score"]
-        confidence = result["confidence"]
-        is_anomaly = result["is_anomaly"]
-
-        src  = f"{eve.get('src_ip')}:{eve.get('src_port')}"
-        dst  = f"{eve.get('dest_ip')}:{eve.get('dest_port')}"
-        proto= eve.get("proto", "?")
-        ts   = eve.get("timestamp", "")
-
-        if is_anomaly:
-            count_anomaly += 1
-            log_anomaly(eve, result)
-            print(
-                f"🚨 [{ts}] ANOMALI | {src} → {dst} | {proto} | "
-                f"score={score} | confidence={confidence}"
-            )
-        else:
-            # Print setiap 100 normal flow biar tidak spam
-            if count_total % 100 == 0:
-                print(
-                    f"✅ [{ts}] NORMAL  | {src} → {dst} | {proto} | "
-                    f"score={score} | total={count_total} anomali={count_anomaly}"
-                )
+        scored = ingest.put((eve, features), eve.get("dest_port"))
+        correlator.flow_closed(eve, scored)
 
 
 if __name__ == "__main__":
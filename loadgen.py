@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+loadgen.py
+Generator trafik sintetis untuk load test tanpa jaringan asli.
+
+Mode:
+  eve       tulis event EVE `flow` ke file dengan rate target (+ rotasi file),
+            untuk di-tail eve_to_ml.py / sensor_agent.py. Lag deteksi diukur
+            dari anomaly log (join lewat flow_id).
+  api       POST batch ke /predict/batch; ukur latency dan detection rate.
+  nfstream  objek flow NFStream tiruan (MockStreamer). Capture loop bisa
+            memakainya langsung: NFSTREAM_INTERFACE=mock[:rate[:mix]]
+            untuk nfstream_to_ml.py / dashboard_server.py.
+
+Mix trafik (dinormalisasi): --mix benign=0.9,port_scan=0.04,syn_flood=0.04,exfil=0.02
+
+Cara pakai:
+    python3 loadgen.py eve --rate 2000 --out /var/log/suricata/eve.json --duration 60
+    python3 loadgen.py api --rate 5000 --batch 256 --url http://127.0.0.1:8000
+    NFSTREAM_INTERFACE=mock:3000:benign=0.95,syn_flood=0.05 python3 nfstream_to_ml.py
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+KINDS       = ("benign", "port_scan", "syn_flood", "exfil")
+DEFAULT_MIX = "benign=0.9,port_scan=0.04,syn_flood=0.04,exfil=0.02"
+EVE_TS_FMT  = "%Y-%m-%dT%H:%M:%S.%f%z"   # format timestamp Suricata
+
+# Flag TCP
+FIN, SYN, RST, PSH, ACK = 0x01, 0x02, 0x04, 0x08, 0x10
+
+_BENIGN_SERVICES = [
+    # (dst_port, proto, app_proto, bobot)
+    (443, "TCP", "tls",  0.55),
+    (80,  "TCP", "http", 0.15),
+    (53,  "UDP", "dns",  0.20),
+    (22,  "TCP", "ssh",  0.05),
+    (123, "UDP", "ntp",  0.05),
+]
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise ValueError(f"unknown traffic kind {kind!r}, expected one of {KINDS}")
+        mix[kind] = float(weight or 1)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("traffic mix weights must sum to > 0")
+    return {kind: w / total for kind, w in mix.items()}
+
+
+# ── Profil flow ───────────────────────────────────────────────────────
+class FlowFactory:
+    """Spec flow netral (dipakai untuk EVE, baris API, maupun flow NFStream tiruan)."""
+
+    def __init__(self, mix: dict, seed: int = None):
+        self.rng       = random.Random(seed)
+        self.kinds     = list(mix)
+        self.weights   = list(mix.values())
+        self._scan_src = "203.0.113.7"
+        self._scan_dst = "10.0.1.20"
+        self._scan_pos = 0
+
+    def next(self) -> dict:
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        spec = getattr(self, f"_{kind}")()
+        spec["kind"] = kind
+        return spec
+
+    def _internal_ip(self) -> str:
+        return f"10.0.{self.rng.randint(0, 15)}.{self.rng.randint(2, 254)}"
+
+    def _public_ip(self) -> str:
+        return ".".join(str(self.rng.randint(1, 223)) for _ in range(4))
+
+    def _benign(self) -> dict:
+        r = self.rng
+        port, proto, app, _ = r.choices(_BENIGN_SERVICES, [s[3] for s in _BENIGN_SERVICES])[0]
+        if proto == "UDP":
+            pkts_ts, pkts_tc = r.randint(1, 2), r.randint(1, 2)
+            bytes_ts, bytes_tc = pkts_ts * r.randint(60, 120), pkts_tc * r.randint(80, 500)
+            duration = r.uniform(0.001, 0.2)
+            flags_ts = flags_tc = 0
+        else:
+            pkts_ts = max(3, int(r.lognormvariate(2.5, 1.0)))
+            pkts_tc = max(3, int(pkts_ts * r.uniform(0.8, 2.0)))
+            bytes_ts = pkts_ts * r.randint(60, 600)
+            bytes_tc = pkts_tc * r.randint(200, 1400)
+            duration = r.uniform(0.05, 30.0)
+            flags_ts = flags_tc = SYN | ACK | PSH | FIN
+        return {
+            "src_ip": self._internal_ip(), "src_port": r.randint(32768, 60999),
+            "dst_ip": self._public_ip() if port in (443, 80) else "10.0.0.53" if port == 53 else self._internal_ip(),
+            "dst_port": port, "proto": proto, "app_proto": app, "duration": duration,
+            "pkts_ts": pkts_ts, "pkts_tc": pkts_tc, "bytes_ts": bytes_ts, "bytes_tc": bytes_tc,
+            "flags_ts": flags_ts, "flags_tc": flags_tc,
+        }
+
+    def _port_scan(self) -> dict:
+        r = self.rng
+        self._scan_pos = self._scan_pos % 65535 + 1   # port berurutan seperti nmap -p-
+        replied = r.random() < 0.9                    # port tertutup → RST
+        return {
+            "src_ip": self._scan_src, "src_port": r.randint(40000, 65000),
+            "dst_ip": self._scan_dst, "dst_port": self._scan_pos, "proto": "TCP", "app_proto": "failed",
+            "duration": r.uniform(0.0001, 0.002),
+            "pkts_ts": 1, "pkts_tc": 1 if replied else 0, "bytes_ts": 60, "bytes_tc": 54 if replied else 0,
+            "flags_ts": SYN, "flags_tc": RST | ACK if replied else 0,
+        }
+
+    def _syn_flood(self) -> dict:
+        r = self.rng
+        pkts = r.randint(1, 3)
+        return {
+            "src_ip": self._public_ip(), "src_port": r.randint(1024, 65535),   # source spoofed
+            "dst_ip": "10.0.1.80", "dst_port": 80, "proto": "TCP", "app_proto": "failed",
+            "duration": r.uniform(0.0, 0.001),
+            "pkts_ts": pkts, "pkts_tc": 0, "bytes_ts": 60 * pkts, "bytes_tc": 0,
+            "flags_ts": SYN, "flags_tc": 0,
+        }
+
+    def _exfil(self) -> dict:
+        r = self.rng
+        bytes_ts = r.randint(50_000_000, 500_000_000)
+        pkts_ts  = bytes_ts // 1400
+        return {
+            "src_ip": self._internal_ip(), "src_port": r.randint(32768, 60999),
+            "dst_ip": f"198.51.100.{r.randint(2, 254)}", "dst_port": r.choice([443, 8443, 53]),
+            "proto": "TCP", "app_proto": "tls", "duration": r.uniform(60.0, 600.0),
+            "pkts_ts": pkts_ts, "pkts_tc": pkts_ts // 2, "bytes_ts": bytes_ts, "bytes_tc": (pkts_ts // 2) * 60,
+            "flags_ts": SYN | ACK | PSH | FIN, "flags_tc": SYN | ACK | FIN,
+        }
+
+
+def to_eve(spec: dict, flow_id: int, end: datetime = None) -> dict:
+    """Spec → event EVE `flow` seperti yang ditulis Suricata."""
+    end   = end or datetime.now(timezone.utc)
+    start = end - timedelta(seconds=spec["duration"])
+    eve = {
+        "timestamp" : end.strftime(EVE_TS_FMT),
+        "flow_id"   : flow_id,
+        "event_type": "flow",
+        "src_ip"    : spec["src_ip"],
+        "src_port"  : spec["src_port"],
+        "dest_ip"   : spec["dst_ip"],
+        "dest_port" : spec["dst_port"],
+        "proto"     : spec["proto"],
+        "app_proto" : spec["app_proto"],
+        "flow": {
+            "pkts_toserver" : spec["pkts_ts"],
+            "pkts_toclient" : spec["pkts_tc"],
+            "bytes_toserver": spec["bytes_ts"],
+            "bytes_toclient": spec["bytes_tc"],
+            "start"         : start.strftime(EVE_TS_FMT),
+            "end"           : end.strftime(EVE_TS_FMT),
+            "age"           : int(spec["duration"]),
+            "state"         : "closed",
+            "reason"        : "timeout",
+            "alerted"       : False,
+        },
+    }
+    if spec["proto"] == "TCP":
+        eve["tcp"] = {
+            "tcp_flags"   : f"{spec['flags_ts'] | spec['flags_tc']:02x}",
+            "tcp_flags_ts": f"{spec['flags_ts']:02x}",
+            "tcp_flags_tc": f"{spec['flags_tc']:02x}",
+        }
+    return eve
+
+
+def to_nfstream(spec: dict) -> SimpleNamespace:
+    """Spec → objek dengan atribut NFStream yang dipakai flow_to_features."""
+    pkts  = spec["pkts_ts"] + spec["pkts_tc"]
+    flags = spec["flags_ts"] | spec["flags_tc"]
+    count = lambda bit: (1 if spec["flags_ts"] & bit else 0) + (1 if spec["flags_tc"] & bit else 0)
+    return SimpleNamespace(
+        src_ip                    = spec["src_ip"],
+        src_port                  = spec["src_port"],
+        dst_ip                    = spec["dst_ip"],
+        dst_port                  = spec["dst_port"],
+        protocol                  = 6 if spec["proto"] == "TCP" else 17,
+        application_name          = spec["app_proto"],
+        bidirectional_duration_ms = spec["duration"] * 1000.0,
+        src2dst_bytes             = spec["bytes_ts"],
+        dst2src_bytes             = spec["bytes_tc"],
+        src2dst_packets           = spec["pkts_ts"],
+        dst2src_packets           = spec["pkts_tc"],
+        src2dst_mean_ps           = spec["bytes_ts"] / spec["pkts_ts"] if spec["pkts_ts"] else 0.0,
+        dst2src_mean_ps           = spec["bytes_tc"] / spec["pkts_tc"] if spec["pkts_tc"] else 0.0,
+        bidirectional_max_ps      = (spec["bytes_ts"] + spec["bytes_tc"]) / pkts if pkts else 0.0,
+        bidirectional_syn_packets = count(SYN),
+        bidirectional_ack_packets = max(pkts - 1, 0) if flags & ACK else 0,
+        bidirectional_fin_packets = count(FIN),
+        bidirectional_psh_packets = count(PSH),
+        bidirectional_urg_packets = 0,
+        loadgen_kind              = spec["kind"],
+    )
+
+
+# ── Pacing & pelaporan ────────────────────────────────────────────────
+class Pacer:
+    """Rate konstan: due() = jumlah event yang seharusnya sudah terkirim tapi belum."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.t0   = time.monotonic()
+        self.sent = 0
+
+    def due(self, max_chunk: int) -> int:
+        n = int((time.monotonic() - self.t0) * self.rate) - self.sent
+        if n <= 0:
+            time.sleep(min(0.005, 1 / self.rate))
+            return 0
+        return min(n, max_chunk)
+
+    def achieved(self) -> float:
+        return self.sent / max(time.monotonic() - self.t0, 1e-9)
+
+
+def _pct(values: list, q: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(q * len(values)), len(values) - 1)] * 1000, 1)
+
+
+class DetectionTracker:
+    """Per jenis trafik: jumlah terkirim, terdeteksi, dan lag deteksi."""
+
+    def __init__(self, max_pending: int = 1_000_000):
+        self._lock    = threading.Lock()
+        self._pending = OrderedDict()   # flow_id → (t_kirim, kind)
+        self._max     = max_pending
+        self.sent     = {k: 0 for k in KINDS}
+        self.detected = {k: 0 for k in KINDS}
+        self.lags     = {k: [] for k in KINDS}
+
+    def record_sent(self, flow_id, kind: str, t: float):
+        with self._lock:
+            self.sent[kind] += 1
+            if flow_id is not None:
+                self._pending[flow_id] = (t, kind)
+                if len(self._pending) > self._max:
+                    self._pending.popitem(last=False)
+
+    def record_detected(self, flow_id, t: float, kind: str = None, sent_at: float = None):
+        with self._lock:
+            if flow_id is not None:
+                entry = self._pending.pop(flow_id, None)
+                if entry is None:
+                    return
+                sent_at, kind = entry
+            self.detected[kind] += 1
+            self.lags[kind].append(t - sent_at)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                kind: {
+                    "sent"          : self.sent[kind],
+                    "detected"      : self.detected[kind],
+                    "detection_rate": round(self.detected[kind] / self.sent[kind], 4) if self.sent[kind] else None,
+                    "lag_p50_ms"    : _pct(self.lags[kind], 0.50),
+                    "lag_p95_ms"    : _pct(self.lags[kind], 0.95),
+                    "lag_max_ms"    : _pct(self.lags[kind], 1.0),
+                }
+                for kind in KINDS if self.sent[kind]
+            }
+
+
+def tail_anomaly_log(path: str, tracker: DetectionTracker, stop: threading.Event):
+    """Baca anomaly log eve_to_ml.py / sensor_agent.py, join flow_id → lag deteksi."""
+    while not os.path.exists(path) and not stop.is_set():
+        time.sleep(0.2)
+    if stop.is_set():
+        return
+    with open(path) as f:
+        f.seek(0, 2)
+        while not stop.is_set():
+            line = f.readline()
+            if not line:
+                time.sleep(0.02)
+                continue
+            try:
+                flow_id = json.loads(line).get("flow_id")
+            except json.JSONDecodeError:
+                continue
+            tracker.record_detected(flow_id, time.monotonic())
+
+
+def progress(label: str, pacer: Pacer, extra: str = ""):
+    print(f"⏱️ {label}: sent={pacer.sent} achieved={pacer.achieved():.0f}/s target={pacer.rate:.0f}/s {extra}")
+
+
+# ── Mode EVE ──────────────────────────────────────────────────────────
+class RotatingWriter:
+    """Append ke file, rotasi ke path.1 .. path.N saat ukuran >= rotate_bytes."""
+
+    def __init__(self, path: str, rotate_bytes: int, keep: int):
+        self.path, self.rotate_bytes, self.keep = path, rotate_bytes, keep
+        self.rotations = 0
+        self._open()
+
+    def _open(self):
+        self.f    = open(self.path, "a")
+        self.size = self.f.tell()
+
+    def write(self, text: str):
+        self.f.write(text)
+        self.f.flush()
+        self.size += len(text)
+        if self.rotate_bytes and self.size >= self.rotate_bytes:
+            self.rotate()
+
+    def rotate(self):
+        self.f.close()
+        for i in range(self.keep - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        self.rotations += 1
+        self._open()
+
+    def close(self):
+        self.f.close()
+
+
+def run_eve(args, factory: FlowFactory, tracker: DetectionTracker) -> dict:
+    stop = threading.Event()
+    threading.Thread(target=tail_anomaly_log, args=(args.anomaly_log, tracker, stop),
+                     name="anomaly-tail", daemon=True).start()
+
+    writer  = RotatingWriter(args.out, int(args.rotate_mb * 1024 * 1024), args.keep)
+    pacer   = Pacer(args.rate)
+    flow_id = random.getrandbits(40) << 10
+    end_at  = time.monotonic() + args.duration
+    next_report = time.monotonic() + 1
+    try:
+        while time.monotonic() < end_at:
+            n = pacer.due(max_chunk=max(int(args.rate / 20), 1))
+            if not n:
+                continue
+            now, lines = datetime.now(timezone.utc), []
+            for _ in range(n):
+                flow_id += 1
+                spec = factory.next()
+                lines.append(json.dumps(to_eve(spec, flow_id, now)))
+                tracker.record_sent(flow_id, spec["kind"], time.monotonic())
+            writer.write("\n".join(lines) + "\n")
+            pacer.sent += n
+            if time.monotonic() >= next_report:
+                progress("eve", pacer, f"rotations={writer.rotations}")
+                next_report += 1
+    finally:
+        writer.close()
+
+    achieved = pacer.achieved()
+    time.sleep(args.drain)   # beri waktu pipeline menyelesaikan flow terakhir
+    stop.set()
+    return {"achieved_rate": round(achieved, 1), "rotations": writer.rotations}
+
+
+# ── Mode API ──────────────────────────────────────────────────────────
+def run_api(args, factory: FlowFactory, tracker: DetectionTracker) -> dict:
+    from app.eve import extract_features
+
+    url       = args.url.rstrip("/") + "/predict/batch"
+    lock      = threading.Lock()
+    latencies = []
+    errors    = [0]
+    end_at    = time.monotonic() + args.duration
+    pacers    = [Pacer(args.rate / args.concurrency) for _ in range(args.concurrency)]
+
+    def worker(pacer: Pacer):
+        while time.monotonic() < end_at:
+            if pacer.due(max_chunk=args.batch) < args.batch:
+                time.sleep(0.001)   # tunggu sampai satu batch penuh jatuh tempo
+                continue
+            with lock:
+                specs = [factory.next() for _ in range(args.batch)]
+            now  = datetime.now(timezone.utc)
+            rows = [{**extract_features(to_eve(s, 0, now)), "src_ip": s["src_ip"], "dst_ip": s["dst_ip"]}
+                    for s in specs]
+            req = urllib.request.Request(url, data=json.dumps(rows).encode(),
+                                         headers={"Content-Type": "application/json"})
+            t0 = time.monotonic()
+            try:
+                with urllib.request.urlopen(req, timeout=args.timeout) as resp:
+                    results = json.loads(resp.read())["results"]
+            except (OSError, ValueError, KeyError) as e:
+                with lock:
+                    errors[0] += 1
+                print(f"[WARN] POST failed: {e}")
+                continue
+            t1 = time.monotonic()
+            pacer.sent += len(specs)
+            with lock:
+                latencies.append(t1 - t0)
+            for spec, result in zip(specs, results):
+                tracker.record_sent(None, spec["kind"], t0)
+                if result["is_anomaly"]:
+                    tracker.record_detected(None, t1, spec["kind"], t0)
+
+    threads = [threading.Thread(target=worker, args=(p,), daemon=True) for p in pacers]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        time.sleep(1)
+        total = sum(p.sent for p in pacers)
+        print(f"⏱️ api: sent={total} achieved={total / max(time.monotonic() - pacers[0].t0, 1e-9):.0f}/s "
+              f"target={args.rate:.0f}/s errors={errors[0]}")
+
+    elapsed = time.monotonic() - pacers[0].t0
+    return {
+        "achieved_rate"    : round(sum(p.sent for p in pacers) / elapsed, 1),
+        "http_errors"      : errors[0],
+        "batch_latency_p50_ms": _pct(latencies, 0.50),
+        "batch_latency_p95_ms": _pct(latencies, 0.95),
+    }
+
+
+# ── Mode NFStream ─────────────────────────────────────────────────────
+class MockStreamer:
+    """Iterable pengganti NFStreamer: flow tiruan dengan rate target."""
+
+    def __init__(self, rate: float = 1000, mix: dict = None, duration: float = None, seed: int = None):
+        self.factory  = FlowFactory(mix or parse_mix(DEFAULT_MIX), seed)
+        self.pacer    = Pacer(rate)
+        self.duration = duration
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "MockStreamer":
+        """'mock', 'mock:2000', atau 'mock:2000:benign=0.9,syn_flood=0.1'."""
+        _, _, rest = spec.partition(":")
+        rate, _, mix = rest.partition(":")
+        return cls(float(rate or 1000), parse_mix(mix) if mix else None)
+
+    def __iter__(self):
+        end_at = time.monotonic() + self.duration if self.duration else float("inf")
+        while time.monotonic() < end_at:
+            n = self.pacer.due(max_chunk=max(int(self.pacer.rate / 20), 1))
+            for _ in range(n):
+                yield to_nfstream(self.factory.next())
+            self.pacer.sent += n
+
+
+def run_nfstream(args, factory: FlowFactory, tracker: DetectionTracker) -> dict:
+    streamer = MockStreamer(args.rate, duration=args.duration)
+    streamer.factory = factory
+    next_report = time.monotonic() + 1
+    for flow in streamer:
+        tracker.record_sent(None, flow.loadgen_kind, 0.0)
+        if time.monotonic() >= next_report:
+            progress("nfstream", streamer.pacer)
+            next_report += 1
+    return {"achieved_rate": round(streamer.pacer.achieved(), 1)}
+
+
+MODES = {"eve": run_eve, "api": run_api, "nfstream": run_nfstream}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic Suricata/NFStream traffic generator")
+    parser.add_argument("mode", choices=MODES)
+    parser.add_argument("--rate",        type=float, default=1000, help="flow/detik target")
+    parser.add_argument("--duration",    type=float, default=30,   help="detik")
+    parser.add_argument("--mix",         default=DEFAULT_MIX)
+    parser.add_argument("--seed",        type=int,   default=None)
+    # eve
+    parser.add_argument("--out",         default="/tmp/loadgen-eve.json")
+    parser.add_argument("--rotate-mb",   type=float, default=100, help="0 = tanpa rotasi")
+    parser.add_argument("--keep",        type=int,   default=3)
+    parser.add_argument("--anomaly-log", default="/var/log/suricata/anomaly_detected.log")
+    parser.add_argument("--drain",       type=float, default=5, help="detik menunggu deteksi terakhir")
+    # api
+    parser.add_argument("--url",         default="http://127.0.0.1:8000")
+    parser.add_argument("--batch",       type=int,   default=256)
+    parser.add_argument("--concurrency", type=int,   default=2)
+    parser.add_argument("--timeout",     type=float, default=60)
+    args = parser.parse_args()
+
+    factory = FlowFactory(parse_mix(args.mix), args.seed)
+    tracker = DetectionTracker()
+    print(f"🚦 loadgen {args.mode}: {args.rate:.0f} flow/s for {args.duration:.0f}s, mix={args.mix}")
+
+    report = {"mode": args.mode, "target_rate": args.rate, **MODES[args.mode](args, factory, tracker)}
+    if args.mode != "nfstream":
+        report["by_kind"] = tracker.summary()
+    else:
+        report["by_kind"] = {k: {"sent": n} for k, n in tracker.sent.items() if n}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
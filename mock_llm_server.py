@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+mock_llm_server.py
+Mock server Groq (OpenAI-compatible) untuk uji client LLM tanpa API key
+dan tanpa kena rate limit provider asli.
+
+Perilaku diatur lewat environment variable:
+    MOCK_LATENCY_S    latency per request (default 0.2)
+    MOCK_ERROR_RATE   probabilitas HTTP 500 (default 0.0)
+    MOCK_429_RATE     probabilitas HTTP 429 (default 0.0)
+    MOCK_RETRY_AFTER  header Retry-After (detik) pada 429 (default 1)
+    MOCK_HANG_RATE    probabilitas request menggantung 120s → timeout (default 0.0)
+
+Cara pakai:
+    uvicorn mock_llm_server:app --port 9000
+    GROQ_BASE_URL=http://127.0.0.1:9000 GROQ_API_KEY=mock \\
+        uvicorn app.main:app --port 8000
+
+Smoke test LLMClient (rate limit + circuit breaker) memakai server ini:
+    python3 -m pytest tests/test_llm_client.py
+"""
+
+import os
+import re
+import json
+import time
+import random
+import asyncio
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY_S   = float(os.getenv("MOCK_LATENCY_S", "0.2"))
+ERROR_RATE  = float(os.getenv("MOCK_ERROR_RATE", "0.0"))
+RATE_429    = float(os.getenv("MOCK_429_RATE", "0.0"))
+RETRY_AFTER = os.getenv("MOCK_RETRY_AFTER", "1")
+HANG_RATE   = float(os.getenv("MOCK_HANG_RATE", "0.0"))
+
+app = FastAPI(title="Mock LLM")
+
+stats = {"requests": 0, "ok": 0, "error_500": 0, "error_429": 0, "hang": 0}
+
+# Prompt berisi baris "[id] ..." — jawab satu objek per id (JSON mode)
+_BATCH_ID = re.compile(r"^\[(\w+)\]", re.MULTILINE)
+
+
+def _item(item_id: str) -> dict:
+    return {
+        "id"    : item_id,
+        "lvl"   : "HIGH",
+        "atk_id": "Pemindaian Port",
+        "atk_en": "Port Scanning",
+        "mitre" : "T1046 - Network Service Discovery",
+        "sum_id": "Respons mock.",
+        "sum_en": "Mock response.",
+        "imp_id": "Respons mock.",
+        "imp_en": "Mock response.",
+        "rec_id": "Respons mock.",
+        "rec_en": "Mock response.",
+        "evid"  : "mock",
+    }
+
+
+def _canned(prompt: str) -> str:
+    ids = _BATCH_ID.findall(prompt) or ["0"]
+    return json.dumps({"results": [_item(i) for i in ids]})
+
+
+def _completion(model: str, content: str) -> dict:
+    return {
+        "id"     : f"mock-{time.time_ns()}",
+        "object" : "chat.completion",
+        "created": int(time.time()),
+        "model"  : model,
+        "choices": [{
+            "index"        : 0,
+            "message"      : {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+
+    roll = random.random()
+    if roll < HANG_RATE:
+        stats["hang"] += 1
+        await asyncio.sleep(120)
+    elif roll < HANG_RATE + ERROR_RATE:
+        stats["error_500"] += 1
+        return JSONResponse(status_code=500, content={"error": {"message": "mock failure"}})
+    elif roll < HANG_RATE + ERROR_RATE + RATE_429:
+        stats["error_429"] += 1
+        return JSONResponse(
+            status_code=429, headers={"retry-after": RETRY_AFTER},
+            content={"error": {"message": "mock rate limit"}},
+        )
+
+    await asyncio.sleep(LATENCY_S)
+    stats["ok"] += 1
+    prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+    return _completion(body.get("model", "mock"), _canned(prompt))
+
+
+@app.get("/stats")
+def get_stats():
+    return stats
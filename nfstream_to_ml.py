@@ -15,15 +15,19 @@ import math
 from datetime import datetime
 
 PIPELINE_PATH = "/opt/threatflow-soc"
-INTERFACE     = "ens160"
+INTERFACE     = os.getenv("NFSTREAM_INTERFACE", "ens160")   # "mock[:rate[:mix]]" → loadgen.py
 ANOMALY_LOG   = "/var/log/suricata/anomaly_detected_nf.log"
+TIMING_EVERY  = 1000   # print rata-rata waktu per tahap tiap N flow (TRACE_ENABLED=1)
 
 sys.path.insert(0, PIPELINE_PATH)
 os.chdir(PIPELINE_PATH)
 
 from nfstream import NFStreamer
 from app.predictor import predictor
-from app.gemini import explain_anomaly
+from app.allowlist import allowlist
+from app.gemini import StreamingExplainer, render_explanation
+from app.tracing import StageStats, start_trace, span
+from config import TRACE_ENABLED
 
 
 def flow_to_features(flow):
@@ -134,6 +138,15 @@ def log_anomaly(flow, features, result):
         f.write(json.dumps(entry) + "\n")
 
 
+def on_explanation(flow, features, result, src, dst):
+    def callback(explanation: dict):
+        result["explanation"] = explanation
+        log_anomaly(flow, features, result)
+        print(f"\n🧠 Analisis {src} → {dst}\n{render_explanation(explanation)}")
+        print("-" * 60)
+    return callback
+
+
 def main():
     print("🚀 ThreatFlow SOC - NFStream → ML Integration")
     print(f"   Interface : {INTERFACE}")
@@ -142,21 +155,36 @@ def main():
 
     count_total   = 0
     count_anomaly = 0
-
-    streamer = NFStreamer(
-        source=INTERFACE,
-        statistical_analysis=True,   # aktifkan IAT, stddev, dll
-        splt_analysis=0,
-        n_dissections=20,
-        idle_timeout=30,             # flow dianggap selesai setelah 30s idle
-        active_timeout=300,          # max 5 menit per flow
-    )
+    explainer     = StreamingExplainer()
+    timings       = StageStats()
+
+    if INTERFACE.startswith("mock"):
+        from loadgen import MockStreamer   # flow sintetis untuk load test
+        streamer = MockStreamer.from_spec(INTERFACE)
+    else:
+        streamer = NFStreamer(
+            source=INTERFACE,
+            statistical_analysis=True,   # aktifkan IAT, stddev, dll
+            splt_analysis=0,
+            n_dissections=20,
+            idle_timeout=30,             # flow dianggap selesai setelah 30s idle
+            active_timeout=300,          # max 5 menit per flow
+        )
 
     print(f"📡 Capturing on {INTERFACE} ...")
 
     for flow in streamer:
+        trace = start_trace() if TRACE_ENABLED else None
+
+        # Flow known-benign: tanpa ekstraksi fitur dan tanpa model
+        with span("allowlist"):
+            skip = allowlist.skip(flow.src_ip, flow.dst_ip, flow.dst_port)
+        if skip:
+            continue
+
         count_total += 1
-        features = flow_to_features(flow)
+        with span("extract"):
+            features = flow_to_features(flow)
 
         try:
             result = predictor.predict(features)
@@ -170,13 +198,11 @@ def main():
 
         if result["is_anomaly"]:
             count_anomaly += 1
-            explanation = explain_anomaly(result, features)
-            result["gemini_explanation"] = explanation
-            log_anomaly(flow, features, result)
             print(f"\n🚨 ANOMALI | {src} → {dst} | {proto}")
             print(f"   Score={result['ensemble_score']} | Confidence={result['confidence']}")
-            print(f"\n{explanation}")
-            print("-" * 60)
+            # Penjelasan LLM di-batch di background, capture tidak menunggu
+            with span("explain_submit"):
+                explainer.submit(result, features, on_explanation(flow, features, result, src, dst))
         else:
             if count_total % 50 == 0:
                 print(
@@ -185,6 +211,12 @@ def main():
                     f"total={count_total} anomali={count_anomaly}"
                 )
 
+        if trace is not None:
+            timings.add(trace)
+            if count_total % TIMING_EVERY == 0:
+                print(f"⏱️ Per flow: {timings.summary()}")
+                print(f"⏱️ LLM batch: {explainer.timings.summary()}")
+
 
 if __name__ == "__main__":
     try:
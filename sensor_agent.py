@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+sensor_agent.py
+Agent ringan untuk sensor Suricata: tail EVE JSON, extract features, kirim
+batch float32 ke node collector (collector_server.py) lewat koneksi
+persisten. Tidak load model / TensorFlow di sensor.
+
+Cara pakai (COLLECTOR_AUTHKEY sama dengan di collector):
+    COLLECTOR_AUTHKEY=... COLLECTOR_NODES=tcp://10.0.0.5:9500,tcp://10.0.0.6:9500 python3 sensor_agent.py
+"""
+
+import json
+import socket
+import sys
+import threading
+import time
+import numpy as np
+
+# ── Path ke pipeline kamu (sesuaikan setelah clone) ──────────────────
+PIPELINE_PATH = "/opt/threatflow-soc"
+EVE_JSON_PATH = "/var/log/suricata/eve.json"
+ANOMALY_LOG   = "/var/log/suricata/anomaly_detected.log"
+STATS_EVERY   = 50   # print statistik client tiap N batch
+
+sys.path.insert(0, PIPELINE_PATH)
+
+from config import (
+    COLLECTOR_NODES, COLLECTOR_AUTHKEY, SENSOR_BATCH_SIZE, SENSOR_FLUSH_MS, SENSOR_MAX_PENDING
+)
+from app.collector import CollectorClient
+from app.eve import extract_features, follow_eve
+from app.allowlist import allowlist
+from app.schemas import FLOW_FIELDS, confidence_level   # FLOW_FIELDS urut sama dengan FEATURE_COLS
+
+SENSOR_ID = socket.gethostname()
+
+
+def on_verdict(events: list, scores: np.ndarray, is_anomaly: np.ndarray):
+    """Dipanggil dari thread receiver CollectorClient, satu kali per batch."""
+    for eve, score, anomaly in zip(events, scores, is_anomaly):
+        if not anomaly:
+            continue
+        score = round(float(score), 4)
+        entry = {
+            "timestamp" : eve.get("timestamp"),
+            "sensor"    : SENSOR_ID,
+            "src_ip"    : eve.get("src_ip"),
+            "src_port"  : eve.get("src_port"),
+            "dest_ip"   : eve.get("dest_ip"),
+            "dest_port" : eve.get("dest_port"),
+            "proto"     : eve.get("proto"),
+            "app_proto" : eve.get("app_proto"),
+            "flow_id"   : eve.get("flow_id"),
+            "prediction": {
+                "status"        : "ANOMALI",
+                "ensemble_score": score,
+                "is_anomaly"    : True,
+                "confidence"    : confidence_level(score),
+            },
+        }
+        with open(ANOMALY_LOG, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        print(
+            f"🚨 [{eve.get('timestamp', '')}] ANOMALI | "
+            f"{eve.get('src_ip')}:{eve.get('src_port')} → {eve.get('dest_ip')}:{eve.get('dest_port')} | "
+            f"{eve.get('proto', '?')} | score={score} | confidence={confidence_level(score)}"
+        )
+
+
+class Batcher:
+    """Kumpulkan flow sampai SENSOR_BATCH_SIZE, atau kirim tiap SENSOR_FLUSH_MS."""
+
+    def __init__(self, client: CollectorClient):
+        self.client  = client
+        self._lock   = threading.Lock()
+        self._rows   = []
+        self._events = []
+        self._sent   = 0
+        threading.Thread(target=self._timer, name="sensor-flush", daemon=True).start()
+
+    def add(self, eve: dict, features: dict):
+        with self._lock:
+            self._rows.append([features[name] for name in FLOW_FIELDS])
+            self._events.append(eve)
+            full = len(self._rows) >= SENSOR_BATCH_SIZE
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, events = self._rows, self._events
+            self._rows, self._events = [], []
+        if not rows:
+            return
+        self.client.send(np.asarray(rows, dtype="<f4"), events)
+        self._sent += 1
+        if self._sent % STATS_EVERY == 0:
+            print(f"📤 Collector: {self.client.stats()}")
+
+    def _timer(self):
+        while True:
+            time.sleep(SENSOR_FLUSH_MS / 1000)
+            self.flush()
+
+
+# ── Main ──────────────────────────────────────────────────────────────
+def main():
+    print("🚀 ThreatFlow SOC - Sensor Agent")
+    print(f"   Sensor   : {SENSOR_ID}")
+    print(f"   EVE log  : {EVE_JSON_PATH}")
+    print(f"   Collector: {', '.join(COLLECTOR_NODES)}")
+    print("-" * 60)
+
+    if not COLLECTOR_AUTHKEY:
+        sys.exit("❌ COLLECTOR_AUTHKEY belum diset (hex, sama dengan collector_server.py)")
+    client  = CollectorClient(COLLECTOR_NODES, SENSOR_ID, on_verdict, bytes.fromhex(COLLECTOR_AUTHKEY),
+                              max_pending=SENSOR_MAX_PENDING)
+    batcher = Batcher(client)
+
+    for eve in follow_eve(EVE_JSON_PATH):
+        features = extract_features(eve)
+        if features is None:
+            continue
+        # Flow known-benign tidak dikirim ke collector sama sekali
+        if allowlist.skip(eve.get("src_ip"), eve.get("dest_ip"), eve.get("dest_port")):
+            continue
+        batcher.add(eve, features)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n⛔ Stopped.")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+serve.py
+API multi-worker dengan model di-load sekali. Proses master load + warm-up
+ensemble, lalu menjalankan server inference lokal (app/model_server.py);
+worker uvicorn berjalan di mode PREDICTOR_MODE=remote sehingga tidak
+mengimport TensorFlow dan tidak menyalin bobot model.
+
+Bandingkan dengan `uvicorn app.main:app --workers N` (tiap worker load
+semua model sendiri) lewat bench_workers.py.
+
+Cara pakai:
+    python3 serve.py --workers 4 --host 0.0.0.0 --port 8000
+"""
+
+import argparse
+import os
+import secrets
+import shutil
+import tempfile
+import time
+import numpy as np
+
+WARMUP_ROWS = 256
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ThreatFlow API, model shared across workers")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--host",    default="0.0.0.0")
+    parser.add_argument("--port",    type=int, default=8000)
+    args = parser.parse_args()
+
+    # Import di dalam main(): worker uvicorn di-spawn dan meng-import ulang
+    # modul ini, jadi model tidak boleh di-load di top level
+    t0 = time.perf_counter()
+    from config import FEATURE_COLS
+    from app.predictor import predictor
+    from app.model_server import serve_predictor
+
+    # Warm-up: trace graph Keras + thread pool sebelum request pertama
+    predictor.predict_matrix(np.zeros((WARMUP_ROWS, len(FEATURE_COLS))))
+    predictor.drift.reset()
+    print(f"✅ Master ready in {time.perf_counter() - t0:.1f}s (mode={predictor.mode}, pid={os.getpid()})")
+
+    sock_dir = tempfile.mkdtemp(prefix="threatflow-")
+    address  = os.path.join(sock_dir, "predictor.sock")
+    authkey  = secrets.token_bytes(32)
+    listener = serve_predictor(predictor, address, authkey)
+
+    # Dibaca config.py di tiap worker
+    os.environ.update(
+        PREDICTOR_MODE    = "remote",
+        PREDICTOR_SOCKET  = address,
+        PREDICTOR_AUTHKEY = authkey.hex(),
+    )
+
+    import uvicorn
+    try:
+        uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        listener.close()
+        shutil.rmtree(sock_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Fixture API tanpa TensorFlow / XGBoost: predictor dijalankan sebagai master
+palsu lewat app/model_server.py (jalur yang sama dengan worker serve.py),
+app.main di-import dengan PREDICTOR_MODE=remote.
+"""
+
+import os
+import secrets
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Diset sebelum config.py di-import (dibaca sekali saat import)
+SOCK_DIR = tempfile.mkdtemp(prefix="threatflow-test-")
+AUTHKEY  = secrets.token_bytes(32)
+os.environ.update(
+    PREDICTOR_MODE    = "remote",
+    PREDICTOR_SOCKET  = os.path.join(SOCK_DIR, "predictor.sock"),
+    PREDICTOR_AUTHKEY = AUTHKEY.hex(),
+)
+
+from config import FEATURE_COLS, PREDICTOR_SOCKET
+from app.model_server import serve_predictor
+
+
+class _FakeDrift:
+    def report(self, top=10):
+        return {"count": 0, "reference": "unavailable", "features": []}
+
+
+ANOMALY_PORT = 4444.0   # Destination_Port yang diberi skor anomali
+
+
+class FakePredictor:
+    """Skor 0.9 (ANOMALI) kalau Destination_Port == ANOMALY_PORT, selain itu 0.1."""
+
+    mode  = "full"
+    drift = _FakeDrift()
+
+    def __init__(self):
+        self.calls = []
+
+    def predict_matrix(self, X):
+        self.calls.append(np.array(X))
+        port  = np.asarray(X)[:, FEATURE_COLS.index("Destination Port")]
+        score = np.where(port == ANOMALY_PORT, 0.9, 0.1).astype(np.float32)
+        return {
+            "ensemble_score": score,
+            "xgboost_score" : score,
+            "cnn_score"     : score,
+            "resnet_score"  : score,
+            "is_anomaly"    : score >= 0.35,
+            "top_features"  : {},
+        }
+
+
+@pytest.fixture(scope="session")
+def fake_predictor():
+    return FakePredictor()
+
+
+@pytest.fixture(scope="session")
+def model_server(fake_predictor):
+    """Master palsu; harus jalan sebelum app.predictor di-import (RemotePredictor)."""
+    listener = serve_predictor(fake_predictor, PREDICTOR_SOCKET, AUTHKEY)
+    yield listener
+    listener.close()
+
+
+@pytest.fixture(scope="session")
+def client(model_server):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,24 @@
+import pytest
+
+from app.allowlist import Allowlist
+
+
+def load(tmp_path, text: str) -> Allowlist:
+    path = tmp_path / "allowlist.txt"
+    path.write_text(text)
+    return Allowlist(path=str(path), reload_s=0, sample=0.0)
+
+
+def test_flow_rule_matches_every_listed_port(tmp_path):
+    allow = load(tmp_path, "flow 10.1.1.5 10.2.2.9 873,874\n")
+    assert allow.skip("10.1.1.5", "10.2.2.9", 873)
+    assert allow.skip("10.1.1.5", "10.2.2.9", 874)
+    assert not allow.skip("10.1.1.5", "10.2.2.9", 875)
+    assert not allow.skip("10.2.2.9", "10.1.1.5", 873)
+
+
+@pytest.mark.parametrize("rule", ["flow 10.1.1.5 10.2.2.9 ,", "dst 10.0.0.53 70000"])
+def test_invalid_ports_reject_whole_file(tmp_path, rule):
+    allow = load(tmp_path, f"src 10.10.5.0/24\n{rule}\n")
+    assert allow.stats()["reload_errors"] == 1
+    assert not allow.skip("10.10.5.1", "10.0.0.1", 80)
@@ -0,0 +1,99 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.codec import CT_RAW
+from app.schemas import FLOW_FIELDS, Explanation
+from conftest import ANOMALY_PORT
+
+
+def make_flow(**overrides) -> dict:
+    flow = {name: 1.0 for name in FLOW_FIELDS}
+    flow["Destination_Port"] = 443.0
+    flow.update(overrides)
+    return flow
+
+
+@pytest.mark.parametrize("body", [b"not json", b'[{"x":'])
+def test_predict_batch_malformed_json_is_422(client, body):
+    resp = client.post("/predict/batch", content=body,
+                       headers={"Content-Type": "application/json"})
+    assert resp.status_code == 422
+    assert all("input" not in err for err in resp.json()["detail"])
+
+
+def test_predict_batch_missing_field_is_422(client):
+    flow = make_flow()
+    del flow["Flow_Duration"]
+    resp = client.post("/predict/batch", content=json.dumps([flow]))
+    assert resp.status_code == 422
+
+
+def test_predict_batch_scores_rows(client):
+    resp = client.post("/predict/batch", content=json.dumps([make_flow(), make_flow()]))
+    assert resp.status_code == 200
+    assert resp.json()["summary"]["total"] == 2
+
+
+def test_explanation_keys_match_between_single_and_batch(client):
+    flow   = make_flow(Destination_Port=ANOMALY_PORT)
+    single = client.post("/predict", json=flow).json()
+    batch  = client.post("/predict/batch", content=json.dumps([flow])).json()["results"][0]
+
+    assert single["is_anomaly"] and batch["is_anomaly"]
+    assert set(single["explanation"]) == set(batch["explanation"]) == set(Explanation.model_fields)
+    # Field lama tetap ada untuk consumer lama
+    assert single["gemini_explanation"] and batch["gemini_explanation"]
+
+
+@pytest.mark.parametrize("token, status", [(None, 403), ("wrong", 403), ("s3cret", 422)])
+def test_admin_profile_token(client, monkeypatch, token, status):
+    monkeypatch.setattr("app.profiler.ADMIN_TOKEN", "s3cret")
+    headers = {} if token is None else {"X-Admin-Token": token}
+    # seconds=0 ditolak setelah cek token → 422 berarti token diterima
+    resp = client.get("/admin/profile", params={"seconds": 0}, headers=headers)
+    assert resp.status_code == status
+
+
+@pytest.mark.parametrize("endpoint", ["/predict", "/predict/batch"])
+def test_out_of_float32_range_is_422(client, fake_predictor, endpoint):
+    flow  = make_flow(Flow_Bytes_s=1e39)   # overflow → inf di float32
+    body  = flow if endpoint == "/predict" else [flow]
+    calls = len(fake_predictor.calls)
+    resp  = client.post(endpoint, json=body)
+    assert resp.status_code == 422
+    assert len(fake_predictor.calls) == calls   # tidak sampai ke model
+
+
+def matrix_body(port: float = 443.0, n: int = 2) -> bytes:
+    X = np.ones((n, len(FLOW_FIELDS)), dtype="<f4")
+    X[:, FLOW_FIELDS.index("Destination_Port")] = port
+    return X.tobytes()
+
+
+def test_predict_matrix_json(client):
+    resp = client.post("/predict/matrix", content=matrix_body(ANOMALY_PORT),
+                       headers={"Content-Type": CT_RAW})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["total"] == 2 and body["anomaly_index"] == [0, 1]
+    assert body["ensemble_score"] == [0.9, 0.9]   # dibulatkan sebagai float64, bukan 0.899999976…
+
+
+def test_predict_matrix_raw_output(client):
+    resp = client.post("/predict/matrix", content=matrix_body(),
+                       headers={"Content-Type": CT_RAW, "Accept": CT_RAW})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == CT_RAW
+    np.testing.assert_allclose(np.frombuffer(resp.content, "<f4"), [0.1, 0.1])
+
+
+@pytest.mark.parametrize("body, content_type, status", [
+    (b"\x00" * 12, CT_RAW, 422),
+    (np.full((1, len(FLOW_FIELDS)), np.nan, "<f4").tobytes(), CT_RAW, 422),
+    (matrix_body(), "text/csv", 415),
+])
+def test_predict_matrix_rejects(client, body, content_type, status):
+    resp = client.post("/predict/matrix", content=body, headers={"Content-Type": content_type})
+    assert resp.status_code == status
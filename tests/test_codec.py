@@ -0,0 +1,58 @@
+import io
+
+import numpy as np
+import pytest
+
+from app.codec import N_FEATURES, CT_ARROW, CT_NPY, CT_RAW, DecodeError, decode
+
+
+def matrix(n: int = 3) -> np.ndarray:
+    return np.arange(n * N_FEATURES, dtype=np.float32).reshape(n, N_FEATURES)
+
+
+def npy_bytes(X: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    np.save(buf, X)
+    return buf.getvalue()
+
+
+def test_decode_raw():
+    X = matrix()
+    np.testing.assert_array_equal(decode(CT_RAW, X.astype("<f4").tobytes()), X)
+
+
+@pytest.mark.parametrize("X", [matrix(), matrix().astype(np.float64), np.asfortranarray(matrix())])
+def test_decode_npy(X):
+    out = decode(CT_NPY, npy_bytes(X))
+    assert out.dtype == np.float32
+    np.testing.assert_array_equal(out, X)
+
+
+def test_decode_arrow_both_layouts():
+    pa = pytest.importorskip("pyarrow")
+    X  = matrix()
+
+    def stream(table) -> bytes:
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as w:
+            w.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    fixed   = pa.FixedSizeListArray.from_arrays(pa.array(X.ravel()), N_FEATURES)
+    columns = pa.table({f"c{i}": X[:, i] for i in range(N_FEATURES)})
+    np.testing.assert_array_equal(decode(CT_ARROW, stream(pa.table({"x": fixed}))), X)
+    np.testing.assert_array_equal(decode(CT_ARROW, stream(columns)), X)
+
+
+@pytest.mark.parametrize("content_type, body", [
+    (CT_RAW, b"\x00" * 5),                                                 # bukan kelipatan baris
+    (CT_NPY, npy_bytes(np.zeros((2, N_FEATURES - 1), np.float32))),       # shape salah
+    (CT_NPY, npy_bytes(np.zeros((2, N_FEATURES), np.int32))),             # dtype bukan float
+    (CT_NPY, npy_bytes(matrix())[:-4]),                                    # terpotong
+    (CT_NPY, b"not npy"),
+    (CT_RAW, np.full((1, N_FEATURES), np.inf, "<f4").tobytes()),
+    ("text/csv", b""),
+])
+def test_decode_rejects(content_type, body):
+    with pytest.raises(DecodeError):
+        decode(content_type, body)
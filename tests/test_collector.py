@@ -0,0 +1,151 @@
+import asyncio
+import secrets
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.codec import N_FEATURES, decode_raw
+from app.collector import (
+    HEADER, MSG_BATCH, MSG_CHALLENGE, MSG_ERROR, MSG_HELLO, MSG_VERDICT, ProtocolError,
+    CollectorClient, auth_digest, decode_verdict, encode_batch, encode_frame, encode_verdict,
+    recv_frame
+)
+from config import COLLECTOR_MAX_BATCH_ROWS, FEATURE_COLS
+from conftest import ANOMALY_PORT
+
+AUTHKEY = secrets.token_bytes(32)
+PORT_COL = FEATURE_COLS.index("Destination Port")
+
+
+def rows(n: int, port: float = 443.0) -> np.ndarray:
+    X = np.ones((n, N_FEATURES), dtype="<f4")
+    X[:, PORT_COL] = port
+    return X
+
+
+# ── Frame codec ──────────────────────────────────────
+def test_batch_frame_round_trip():
+    X = rows(3)
+    frame = encode_batch(7, X)
+    payload_len, msg_type, batch_id, n_rows = HEADER.unpack(frame[:HEADER.size])
+    assert (payload_len, msg_type, batch_id, n_rows) == (len(frame) - HEADER.size, MSG_BATCH, 7, 3)
+    np.testing.assert_array_equal(decode_raw(frame[HEADER.size:]), X)
+
+
+def test_verdict_round_trip():
+    scores, anomaly = np.array([0.1, 0.9], np.float32), np.array([False, True])
+    frame = encode_verdict(9, scores, anomaly)
+    _, msg_type, batch_id, n_rows = HEADER.unpack(frame[:HEADER.size])
+    out_scores, out_anomaly = decode_verdict(n_rows, frame[HEADER.size:])
+    assert (msg_type, batch_id) == (MSG_VERDICT, 9)
+    np.testing.assert_array_equal(out_scores, scores)
+    np.testing.assert_array_equal(out_anomaly, anomaly)
+    with pytest.raises(ProtocolError):
+        decode_verdict(3, frame[HEADER.size:])
+
+
+# ── Collector end-to-end ─────────────────────────────
+@pytest.fixture(scope="module")
+def collector(model_server):
+    import collector_server
+
+    loop  = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def start():
+        pending = asyncio.Queue(collector_server.MAX_QUEUED)
+        server  = await asyncio.start_server(
+            lambda r, w: collector_server.handle_sensor(r, w, pending, AUTHKEY), "127.0.0.1", 0
+        )
+        state["server"] = server
+        state["port"]   = server.sockets[0].getsockname()[1]
+        asyncio.ensure_future(collector_server.score_loop(pending))
+        ready.set()
+
+    async def stop():
+        state["server"].close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(start())
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    assert ready.wait(5)
+    yield f"tcp://127.0.0.1:{state['port']}", collector_server.stats
+    asyncio.run_coroutine_threadsafe(stop(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def raw_handshake(address: str, authkey: bytes) -> tuple[socket.socket, int]:
+    host, port = address[len("tcp://"):].rsplit(":", 1)
+    sock = socket.create_connection((host, int(port)), timeout=5)
+    msg_type, _, _, nonce = recv_frame(sock)
+    assert msg_type == MSG_CHALLENGE
+    sock.sendall(encode_frame(MSG_HELLO, payload=auth_digest(authkey, nonce) + b"raw"))
+    return sock, recv_frame(sock)[0]
+
+
+def test_client_round_trip(collector):
+    address, _ = collector
+    verdicts, done = {}, threading.Event()
+
+    def on_verdict(context, scores, is_anomaly):
+        verdicts[context] = (scores.tolist(), is_anomaly.tolist())
+        if len(verdicts) == 3:
+            done.set()
+
+    client = CollectorClient([address], "test-sensor", on_verdict, AUTHKEY, reconnect_s=0.05)
+    deadline = time.monotonic() + 5
+    while not client.stats()["connected"]:
+        assert time.monotonic() < deadline, "sensor did not connect"
+        time.sleep(0.01)
+
+    client.send(rows(2), "normal")
+    client.send(rows(1, ANOMALY_PORT), "anomaly")
+    client.send(rows(0), "empty")
+    assert done.wait(5), client.stats()
+
+    np.testing.assert_allclose(verdicts["normal"][0], [0.1, 0.1])
+    assert verdicts["normal"][1] == [False, False]
+    np.testing.assert_allclose(verdicts["anomaly"][0], [0.9])
+    assert verdicts["anomaly"][1] == [True]
+    assert verdicts["empty"] == ([], [])
+    assert client.stats()["pending"] == 0
+
+
+def test_wrong_authkey_is_rejected(collector):
+    address, stats = collector
+    before = stats["auth_failed"]
+    sock, reply = raw_handshake(address, secrets.token_bytes(32))
+    with sock:
+        assert reply == MSG_ERROR
+        assert sock.recv(1) == b""   # collector menutup koneksi
+    assert stats["auth_failed"] == before + 1
+
+
+def test_batch_over_row_limit_disconnects(collector):
+    address, _ = collector
+    sock, reply = raw_handshake(address, AUTHKEY)
+    with sock:
+        assert reply == MSG_HELLO
+        n = COLLECTOR_MAX_BATCH_ROWS + 1
+        sock.sendall(HEADER.pack(n * N_FEATURES * 4, MSG_BATCH, 1, n))
+        assert sock.recv(1) == b""
+
+
+def test_malformed_verdict_keeps_batch_pending():
+    client = CollectorClient(["unix:///nonexistent/collector.sock"], "test", lambda *a: None,
+                             AUTHKEY, reconnect_s=60)
+    client._pending[5] = [None, rows(2), "ctx"]
+    with pytest.raises(ProtocolError):
+        client._handle(MSG_VERDICT, 5, 2, b"bad")
+    assert 5 in client._pending   # dikirim ulang setelah reconnect, tidak hilang
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from app.drift import DriftMonitor, psi_score
+
+N_FEATURES = 4
+NAMES      = [f"f{i}" for i in range(N_FEATURES)]
+
+
+def monitor(reference_path=None) -> DriftMonitor:
+    return DriftMonitor(NAMES, np.zeros(N_FEATURES), np.ones(N_FEATURES), reference_path)
+
+
+def heavy_tailed(rng, n: int) -> np.ndarray:
+    # Mirip fitur flow setelah scaling: banyak nol + ekor panjang
+    z = rng.lognormal(0.0, 2.0, (n, N_FEATURES))
+    z[rng.random((n, N_FEATURES)) < 0.4] = 0.0
+    return z
+
+
+def test_split_batches_match_numpy():
+    rng = np.random.default_rng(0)
+    z   = heavy_tailed(rng, 5000)
+    m   = monitor()
+    for part in np.split(z, [1, 7, 1000, 1001, 3500]):   # termasuk batch 1 baris
+        m.update(part)
+    m.update(np.zeros((0, N_FEATURES)))
+
+    assert m.count == len(z)
+    np.testing.assert_allclose(m.mean, z.mean(axis=0), rtol=1e-10)
+    np.testing.assert_allclose(np.sqrt(m.m2 / (m.count - 1)), z.std(axis=0, ddof=1), rtol=1e-10)
+
+
+def test_psi_score():
+    even = np.full((1, 4), 0.25)
+    assert psi_score(even, even)[0] == pytest.approx(0.0)
+    a, e = np.array([[0.4, 0.1, 0.25, 0.25]]), even
+    expected = (0.15 * np.log(0.4 / 0.25)) + (-0.15 * np.log(0.1 / 0.25))
+    assert psi_score(a, e)[0] == pytest.approx(expected)
+
+
+def test_no_reference_reports_unavailable():
+    m = monitor()
+    m.update(heavy_tailed(np.random.default_rng(1), 1000))
+    report = m.report()
+    assert report["reference"] == "unavailable"
+    assert all(f["psi"] is None and f["level"] == "unavailable" for f in report["features"])
+
+
+def test_saved_reference_gives_low_psi_on_same_distribution(tmp_path):
+    rng  = np.random.default_rng(2)
+    path = str(tmp_path / "drift_reference.npz")
+    train = monitor()
+    train.update(heavy_tailed(rng, 20000))
+    train.save_reference(path)
+
+    same = monitor(path)
+    same.update(heavy_tailed(rng, 20000))
+    assert all(f["level"] == "LOW" for f in same.report()["features"])
+
+    shifted = monitor(path)
+    shifted.update(heavy_tailed(rng, 20000) + 1.5)
+    assert all(f["level"] == "HIGH" for f in shifted.report()["features"])
@@ -0,0 +1,15 @@
+from app.ingest import IngestQueue
+
+
+def test_counters_add_up_with_failed_batch():
+    ingest = IngestQueue(maxsize=16, batch_size=4, benign_ports=())
+    for i in range(6):
+        ingest.put(i, 443)
+
+    first, second = ingest.get_batch(), ingest.get_batch()
+    ingest.record("failed", len(first))    # predict error → seluruh batch hilang
+    ingest.record("scored", len(second))
+
+    s = ingest.stats()
+    assert s["failed"] == 4 and s["scored"] == 2
+    assert s["enqueued"] == s["scored"] + s["failed"] + s["queue_size"]
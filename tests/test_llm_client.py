@@ -0,0 +1,111 @@
+"""Smoke test LLMClient terhadap mock_llm_server.py (tanpa API key / jaringan)."""
+
+import json
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+import mock_llm_server
+from app.llm_client import LLMClient, LLMUnavailable, RateLimitedError, CircuitOpenError
+
+MESSAGES = [{"role": "user", "content": "[a] flow 1\n[b] flow 2"}]
+
+
+@pytest.fixture(scope="module")
+def mock_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(mock_llm_server.app, host="127.0.0.1",
+                                           port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert time.monotonic() < deadline, "mock LLM server did not start"
+        time.sleep(0.05)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+
+
+@pytest.fixture
+def mock_behaviour(monkeypatch):
+    monkeypatch.setattr(mock_llm_server, "LATENCY_S", 0.0)
+    return lambda **kw: [monkeypatch.setattr(mock_llm_server, k, v) for k, v in kw.items()]
+
+
+def make_client(url: str, **kw) -> LLMClient:
+    opts = dict(rate_per_sec=100, burst=10, max_retries=0, timeout=5, max_queue_wait=1,
+                backoff_base=0.01, breaker_failures=5, breaker_reset=60)
+    opts.update(kw)
+    return LLMClient(api_key="mock", model="mock", base_url=url, **opts)
+
+
+def test_batch_completion(mock_url, mock_behaviour):
+    client = make_client(mock_url)
+    content = json.loads(client.complete(MESSAGES))
+    assert [r["id"] for r in content["results"]] == ["a", "b"]
+    assert client.stats()["success"] == 1
+
+
+def test_rate_limit_rejects_instead_of_queueing(mock_url, mock_behaviour):
+    client = make_client(mock_url, rate_per_sec=0.1, burst=1, max_queue_wait=0.1)
+    client.complete(MESSAGES)
+    with pytest.raises(RateLimitedError):
+        client.complete(MESSAGES)
+    stats = client.stats()
+    assert stats["rate_limited"] == 1
+    assert stats["circuit_state"] == "CLOSED"   # rate limit lokal bukan kegagalan provider
+
+
+def test_circuit_breaker_opens_after_failures(mock_url, mock_behaviour):
+    mock_behaviour(ERROR_RATE=1.0)
+    client = make_client(mock_url, breaker_failures=2)
+    for _ in range(2):
+        with pytest.raises(LLMUnavailable):
+            client.complete(MESSAGES)
+    assert client.stats()["circuit_state"] == "OPEN"
+
+    sent = mock_llm_server.stats["requests"]
+    with pytest.raises(CircuitOpenError):
+        client.complete(MESSAGES)
+    assert mock_llm_server.stats["requests"] == sent   # tidak sampai ke provider
+
+
+def test_429_waits_for_retry_after(mock_url, mock_behaviour):
+    mock_behaviour(RATE_429=1.0, RETRY_AFTER="0.3")
+    client = make_client(mock_url, max_retries=1, backoff_base=0.001)
+    sent   = mock_llm_server.stats["requests"]
+    t0     = time.monotonic()
+    with pytest.raises(LLMUnavailable):
+        client.complete(MESSAGES)
+    assert time.monotonic() - t0 >= 0.3
+    assert mock_llm_server.stats["requests"] - sent == 2
+
+
+def test_retries_take_tokens(mock_url, mock_behaviour):
+    mock_behaviour(ERROR_RATE=1.0)
+    client = make_client(mock_url, rate_per_sec=0.1, burst=2, max_retries=3, max_queue_wait=0.1)
+    sent   = mock_llm_server.stats["requests"]
+    with pytest.raises(LLMUnavailable):
+        client.complete(MESSAGES)
+    # burst 2 → percobaan pertama + satu retry; retry berikutnya ditolak bucket
+    assert mock_llm_server.stats["requests"] - sent == 2
+    assert client.stats()["rate_limited"] == 1
+
+
+def test_init_failure_is_cached(monkeypatch):
+    calls = []
+
+    def broken_client(**kw):
+        calls.append(kw)
+        raise ValueError("no api key")
+
+    monkeypatch.setattr("app.llm_client.AsyncGroq", broken_client)
+    client = make_client("http://127.0.0.1:1")
+    for _ in range(3):
+        with pytest.raises(LLMUnavailable, match="no api key"):
+            client.complete(MESSAGES)
+    assert len(calls) == 1
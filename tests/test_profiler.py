@@ -0,0 +1,28 @@
+import threading
+import time
+
+from app.profiler import sample_stacks
+
+
+def _busy(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_frames_labelled_by_function_unless_lines_requested():
+    stop   = threading.Event()
+    worker = threading.Thread(target=_busy, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        time.sleep(0.01)
+        plain    = sample_stacks(0.1, interval=0.005)
+        numbered = sample_stacks(0.1, interval=0.005, lines=True)
+    finally:
+        stop.set()
+        worker.join()
+
+    busy = [s for s in plain if s.startswith("busy-worker;")]
+    # Satu fungsi → satu stack, walau sampel jatuh di baris berbeda
+    assert len(busy) == 1 and busy[0].endswith("test_profiler:_busy")
+    assert all(frame.count(":") == 2 for s in numbered if s.startswith("busy-worker;")
+               for frame in s.split(";")[1:])